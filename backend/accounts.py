@@ -0,0 +1,77 @@
+"""
+Account provisioning: everything a brand-new user starts with.
+
+RegisterView, GuestLoginView and get_or_create_user all go through
+provision_user, which writes the user, its attributes, its goal and its
+starter tasks in one transaction with one INSERT per table.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Goal, Task, User, UserAttribute, derived_task_fields
+
+GETTING_STARTED_GOAL = {
+    'title': 'Getting Started',
+    'description': 'Learn how to use the gamified productivity system',
+}
+
+# Starter board for guests and auto-created users.
+STARTER_TASKS = (
+    {'title': '🧹 Organise workspace',     'description': 'Clean and organise your desk',         'reward_point': 6, 'difficulty': 1, 'attribute': 'discipline'},
+    {'title': '📝 Write journal entry',    'description': "Reflect on today's experiences",      'reward_point': 5, 'difficulty': 1, 'attribute': 'discipline'},
+    {'title': '🏃‍♂️ 30-minute workout', 'description': 'Include cardio and strength training', 'reward_point': 9, 'difficulty': 2, 'attribute': 'energy'},
+    {'title': '💻 Practice coding',        'description': 'Solve a Leetcode problem',             'reward_point': 8, 'difficulty': 2, 'attribute': 'intelligence'},
+    {'title': '🧘‍♀️ Meditation',       'description': '10 minutes of mindfulness',            'reward_point': 4, 'difficulty': 1, 'attribute': 'energy'},
+    {'title': '📚 Learn something new',    'description': 'Read an educational article',          'reward_point': 7, 'difficulty': 1, 'attribute': 'intelligence'},
+)
+
+# Starter board for accounts created through RegisterView.
+REGISTERED_STARTER_TASKS = (
+    {'title': '🧠 Practice Algorithm Problem', 'description': 'Complete a coding problem on LeetCode, HackerRank, or CodeWars', 'attribute': 'intelligence', 'difficulty': 2, 'reward_point': 14},
+    {'title': '📚 Study Tech Documentation', 'description': 'Read 30 pages of technical documentation or programming book', 'attribute': 'intelligence', 'difficulty': 1, 'reward_point': 10},
+    {'title': '💻 Code Review Session', 'description': 'Review and refactor existing code for better performance', 'attribute': 'discipline', 'difficulty': 2, 'reward_point': 12},
+    {'title': '🧘‍♀️ Debug Mindfully', 'description': 'Practice focused debugging techniques for 10 minutes', 'attribute': 'discipline', 'difficulty': 1, 'reward_point': 8},
+    {'title': '🗣️ Tech Presentation', 'description': 'Practice explaining a technical concept or present to team', 'attribute': 'social', 'difficulty': 3, 'reward_point': 20},
+    {'title': '🧹 Organize Dev Environment', 'description': 'Clean up workspace, organize project files, update IDE settings', 'attribute': 'discipline', 'difficulty': 1, 'reward_point': 8},
+    {'title': '📝 Technical Journaling', 'description': 'Write about what you learned or challenges you solved today', 'attribute': 'discipline', 'difficulty': 1, 'reward_point': 6},
+    {'title': '💡 Learn New Technology', 'description': 'Watch a tutorial or read about a new programming tool/framework', 'attribute': 'intelligence', 'difficulty': 2, 'reward_point': 12},
+)
+
+
+def provision_user(username, password=None, email='', goal=GETTING_STARTED_GOAL,
+                   tasks=STARTER_TASKS, task_lifetime=timedelta(days=3650)):
+    """Create a user with every attribute at 0, one goal and the given starter tasks.
+
+    Without a password the account gets an unusable one: guests and
+    auto-created users authenticate by token only, and skipping the hash
+    keeps PBKDF2 off their signup path. Raises IntegrityError if the
+    username is already taken.
+    """
+    with transaction.atomic():
+        user = User.objects.create(
+            username=username,
+            email=email,
+            password=make_password(password),
+        )
+        UserAttribute.objects.bulk_create(
+            UserAttribute(user=user, name=name, value=0)
+            for name, _ in UserAttribute.ATTRIBUTE_CHOICES
+        )
+        # bulk_create skips Goal.save(), whose only extra work is dropping a
+        # cached daily board this user can't have yet.
+        Goal.objects.bulk_create([Goal(user=user, **goal)])
+        deadline = timezone.now() + task_lifetime
+        # ... and Task.save(), so derive its fields here instead.
+        Task.objects.bulk_create(
+            Task(
+                user=user,
+                deadline=deadline,
+                **derived_task_fields(task['title'], task['description']),
+                **task,
+            )
+            for task in tasks
+        )
+    return user
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import User, Task, UserTaskLog, Goal, UserAttribute
+from .models import (
+    User, Task, UserTaskLog, Goal, UserAttribute, UserDailyActivity, DailySelection, SystemChatJob,
+    DailyJudgement,
+)
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -33,3 +36,29 @@ class UserAttributeAdmin(admin.ModelAdmin):
     list_display = ('user', 'name', 'value')
     list_filter = ('name',)
     search_fields = ('user__username',)
+
+@admin.register(UserDailyActivity)
+class UserDailyActivityAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'assigned', 'completed', 'missed', 'exp_gained')
+    list_filter = ('date',)
+    search_fields = ('user__username',)
+    date_hierarchy = 'date'
+
+@admin.register(DailySelection)
+class DailySelectionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'task_ids')
+    search_fields = ('user__username',)
+
+@admin.register(SystemChatJob)
+class SystemChatJobAdmin(admin.ModelAdmin):
+    list_display = ('user', 'context_type', 'status', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'context_type')
+    search_fields = ('user__username',)
+    date_hierarchy = 'created_at'
+
+@admin.register(DailyJudgement)
+class DailyJudgementAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'severity', 'completion_rate', 'delivered')
+    list_filter = ('severity', 'delivered')
+    search_fields = ('user__username',)
+    date_hierarchy = 'date'
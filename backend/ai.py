@@ -0,0 +1,230 @@
+"""
+AI providers for the System chat.
+
+settings.AI_PROVIDERS configures each provider the way CACHES configures
+cache backends, and settings.AI_PROVIDER names the one in use:
+
+    AI_PROVIDERS = {'nvidia': {'BACKEND': 'backend.ai.OpenAICompatibleProvider',
+                               'API_KEY': '...', 'MODEL': '...', 'BASE_URL': '...'}}
+
+get_provider() builds each provider once per process and hands the same
+instance to every caller, so the SDK client (and its keep-alive HTTP
+connection pool) is reused across chat calls instead of being rebuilt, TLS
+handshake included, for every one. The SDK clients are thread-safe.
+
+Optional keys: TIMEOUT (seconds for the whole call), CONNECT_TIMEOUT and
+MAX_RETRIES. Retries are the SDKs' own: connection errors, 408/409/429 and
+5xx responses are retried with exponential backoff and jitter.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.test.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class AIProvider:
+    """A configured model: turns a system and user prompt into the raw reply text."""
+
+    def __init__(self, alias, params):
+        self.alias = alias
+        self.model = params.get('MODEL', '')
+        self.timeout = params.get('TIMEOUT', 30)
+        self.connect_timeout = params.get('CONNECT_TIMEOUT', 5)
+        self.max_retries = params.get('MAX_RETRIES', 2)
+
+    def complete(self, system_prompt, user_prompt):
+        """Return the whole reply"""
+        raise NotImplementedError
+
+    def stream(self, system_prompt, user_prompt):
+        """Yield the reply in chunks as it's generated"""
+        yield self.complete(system_prompt, user_prompt)
+
+
+def _api_key(params):
+    api_key = params.get('API_KEY', '')
+    if not api_key:
+        raise RuntimeError(f"{params.get('API_KEY_ENV', 'API_KEY')} not configured")
+    return api_key
+
+
+class AnthropicProvider(AIProvider):
+    def __init__(self, alias, params):
+        super().__init__(alias, params)
+        try:
+            import anthropic
+        except ImportError:
+            raise RuntimeError('anthropic package not installed')
+        self.client = anthropic.Anthropic(
+            api_key=_api_key(params),
+            timeout=anthropic.Timeout(self.timeout, connect=self.connect_timeout),
+            max_retries=self.max_retries,
+        )
+
+    def _request(self, system_prompt, user_prompt):
+        return {
+            'model': self.model,
+            'max_tokens': 1024,
+            'system': system_prompt,
+            'messages': [{'role': 'user', 'content': user_prompt}],
+        }
+
+    def complete(self, system_prompt, user_prompt):
+        response = self.client.messages.create(**self._request(system_prompt, user_prompt))
+        return response.content[0].text
+
+    def stream(self, system_prompt, user_prompt):
+        with self.client.messages.stream(**self._request(system_prompt, user_prompt)) as stream:
+            yield from stream.text_stream
+
+
+class OpenAICompatibleProvider(AIProvider):
+    """Any chat-completions API the openai SDK can talk to (NVIDIA NIM by default)."""
+
+    def __init__(self, alias, params):
+        super().__init__(alias, params)
+        try:
+            import openai
+        except ImportError:
+            raise RuntimeError('openai package not installed')
+        self.client = openai.OpenAI(
+            api_key=_api_key(params),
+            base_url=params.get('BASE_URL'),
+            timeout=openai.Timeout(self.timeout, connect=self.connect_timeout),
+            max_retries=self.max_retries,
+        )
+
+    def _request(self, system_prompt, user_prompt):
+        return {
+            'model': self.model,
+            'max_tokens': 1024,
+            'messages': [
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': user_prompt},
+            ],
+        }
+
+    def complete(self, system_prompt, user_prompt):
+        response = self.client.chat.completions.create(**self._request(system_prompt, user_prompt))
+        return response.choices[0].message.content
+
+    def stream(self, system_prompt, user_prompt):
+        chunks = self.client.chat.completions.create(**self._request(system_prompt, user_prompt), stream=True)
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class FakeProvider(AIProvider):
+    """Canned reply with no network call, for tests, benchmarks and offline dev.
+
+    REPLY is the text returned, DELAY the seconds each call takes and
+    CHUNK_SIZE how many characters stream() yields at a time.
+    """
+
+    def __init__(self, alias, params):
+        super().__init__(alias, params)
+        self.reply = params['REPLY']
+        self.delay = params.get('DELAY', 0)
+        self.chunk_size = params.get('CHUNK_SIZE', 8)
+        self.calls = 0
+
+    def complete(self, system_prompt, user_prompt):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.reply
+
+    def stream(self, system_prompt, user_prompt):
+        self.calls += 1
+        for i in range(0, len(self.reply), self.chunk_size):
+            time.sleep(self.delay * self.chunk_size / len(self.reply))
+            yield self.reply[i:i + self.chunk_size]
+
+
+class ResponseCache:
+    """In-process LRU of AI results keyed by a prompt fingerprint, each kept for ttl seconds.
+
+    hits and misses count get() outcomes since the process started.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires, value), least recently used first
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*parts):
+        return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+_providers = {}
+_lock = threading.Lock()
+
+
+def get_provider(alias=None):
+    """The provider configured as settings.AI_PROVIDERS[alias] (default: settings.AI_PROVIDER)"""
+    alias = alias or settings.AI_PROVIDER
+    provider = _providers.get(alias)
+    if provider is None:
+        with _lock:
+            provider = _providers.get(alias)
+            if provider is None:
+                try:
+                    params = settings.AI_PROVIDERS[alias]
+                except KeyError:
+                    raise RuntimeError(f"Unknown AI provider '{alias}'")
+                # Not stored if construction raises (e.g. missing key), so a
+                # fixed configuration is picked up on the next call.
+                provider = import_string(params['BACKEND'])(alias, params)
+                _providers[alias] = provider
+    return provider
+
+
+def reset_providers():
+    """Drop the built providers; the next get_provider() rebuilds from settings"""
+    with _lock:
+        _providers.clear()
+
+
+@receiver(setting_changed)
+def _settings_changed(*, setting, **kwargs):
+    if setting in ('AI_PROVIDER', 'AI_PROVIDERS'):
+        reset_providers()
@@ -3,6 +3,11 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is what production serves (see the Procfile). The streaming
+responses, /api/system/chat/stream/ and the completed-history export, are
+async iterators so they're sent as they're generated; under WSGI Django
+has to buffer them whole first.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
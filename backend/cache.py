@@ -0,0 +1,237 @@
+"""
+Cache backends for the throttle counters and other process-wide counters.
+
+Every backend here adds compare_and_set(), which backend.throttles needs to
+update a rate-limit key atomically without a lock held across the request,
+and which increment() builds shared counters on.
+
+SQLiteCache keeps its data in a local file in WAL mode, so every server
+worker on a host shares the same counters (like DatabaseCache) without a
+round trip to Postgres on each throttled request. WAL lets readers proceed
+while one worker writes; writes are serialised by SQLite's own file lock.
+
+    CACHES = {'throttle': {'BACKEND': 'backend.cache.SQLiteCache',
+                           'LOCATION': '/tmp/levelup-throttle.sqlite3'}}
+
+Counters are per host: run several app instances behind a load balancer and
+each enforces its own limits (use THROTTLE_CACHE=redis for that).
+"""
+import base64
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.core.cache.backends import db, locmem, redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import connections, router
+
+# Expired rows are only skipped on read; every this many writes a process
+# also deletes them, which keeps the file from growing with one-off IPs.
+PURGE_EVERY = 1000
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: autocommit, with explicit BEGIN IMMEDIATE
+            # wherever a read and a write must not interleave with another worker.
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def _after_write(self, conn):
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.get_backend_timeout(timeout)),
+        )
+        self._after_write(conn)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', (key, time.time()))
+            added = conn.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.get_backend_timeout(timeout)),
+            ).rowcount == 1
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._after_write(conn)
+        return added
+
+    def compare_and_set(self, key, expected, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set key to value only if it currently holds expected (None = missing or expired)"""
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            swapped = (None if row is None else pickle.loads(row[0])) == expected
+            if swapped:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                    (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.get_backend_timeout(timeout)),
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._after_write(conn)
+        return swapped
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        ).rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Keep the per-thread connection: Django calls close() at the end of
+        # every request, and reopening the file each time would cost more
+        # than the lookup itself.
+        pass
+
+
+class LocMemCache(locmem.LocMemCache):
+    """Per-process memory cache with compare_and_set (tests, single-worker dev)."""
+
+    def compare_and_set(self, key, expected, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            current = None if self._has_expired(key) else pickle.loads(self._cache[key])
+            if current != expected:
+                return False
+            self._set(key, pickle.dumps(value, self.pickle_protocol), timeout)
+            return True
+
+
+# GET and SET in one server-side step; ARGV[3] is the TTL in seconds, or
+# empty for a key that never expires.
+_REDIS_CAS = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    if ARGV[3] == '' then
+        redis.call('SET', KEYS[1], ARGV[2])
+    else
+        redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    end
+    return 1
+end
+return 0
+"""
+
+
+class RedisCache(redis.RedisCache):
+    def compare_and_set(self, key, expected, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if expected is None:
+            return self.add(key, value, timeout, version=version)
+        key = self.make_and_validate_key(key, version=version)
+        serializer = self._cache._serializer
+        client = self._cache.get_client(key, write=True)
+        ttl = self.get_backend_timeout(timeout)
+        # EX must be positive; a timeout of 0 is as good as expired in a second.
+        ttl = '' if ttl is None else max(1, ttl)
+        return bool(client.eval(
+            _REDIS_CAS, 1, key, serializer.dumps(expected), serializer.dumps(value), ttl,
+        ))
+
+
+class DatabaseCache(db.DatabaseCache):
+    def compare_and_set(self, key, expected, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if expected is None:
+            # add() already replaces an expired row atomically.
+            return self.add(key, value, timeout, version=version)
+        key = self.make_and_validate_key(key, version=version)
+        connection = connections[router.db_for_write(self.cache_model_class)]
+        quote_name = connection.ops.quote_name
+
+        def encode(obj):
+            return base64.b64encode(pickle.dumps(obj, self.pickle_protocol)).decode('latin1')
+
+        expires = self.get_backend_timeout(timeout)
+        expires = datetime.max if expires is None else datetime.fromtimestamp(expires, tz=timezone.utc)
+        with connection.cursor() as cursor:
+            # Conditional on the stored value, so two workers racing on the
+            # same key can't both win.
+            cursor.execute(
+                'UPDATE %s SET %s = %%s, %s = %%s WHERE %s = %%s AND %s = %%s AND %s >= %%s' % (
+                    quote_name(self._table), quote_name('value'), quote_name('expires'),
+                    quote_name('cache_key'), quote_name('value'), quote_name('expires'),
+                ),
+                [
+                    encode(value),
+                    connection.ops.adapt_datetimefield_value(expires.replace(microsecond=0)),
+                    key,
+                    encode(expected),
+                    connection.ops.adapt_datetimefield_value(
+                        datetime.now(tz=timezone.utc).replace(microsecond=0)
+                    ),
+                ],
+            )
+            return cursor.rowcount == 1
+
+
+def increment(cache, key, delta=1, max_attempts=10):
+    """Add delta to a never-expiring counter in one of these caches, created at 0.
+
+    A compare_and_set loop rather than cache.incr(), which the database and
+    sqlite backends implement as a separate get and set. Returns the new
+    value, or None if every attempt lost a race (the delta is then dropped).
+    """
+    for _ in range(max_attempts):
+        current = cache.get(key)
+        new = (current or 0) + delta
+        if cache.compare_and_set(key, current, new, None):
+            return new
+    return None
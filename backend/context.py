@@ -0,0 +1,166 @@
+"""
+Everything the System chat and the home screen need to know about a host,
+loaded up front.
+
+The prompt, the title checks and the SystemLog each used to query the same
+attributes, goal, logs and titles for themselves. UserContextSnapshot.load()
+reads it all in two queries:
+
+  * the user row, with the attributes pivoted into columns by conditional
+    aggregation and the goal, last completed titles, earned titles and
+    "has a SystemLog" as scalar subqueries
+  * the 7-day and today's counts from the UserDailyActivity rollup, again
+    with conditional aggregation
+
+The snapshot is read-only; code that changes what it describes (awarding a
+title, writing the first SystemLog) updates the matching field itself.
+
+DashboardSnapshot does the same for the stats and status panels of the home
+screen (see DashboardView): one user row with every count as a scalar
+subquery, the attribute rows, and this week's rollup rows. There the
+attributes are a plain query rather than a pivot: the GROUP BY cost more to
+build and run than the extra round trip.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, Exists, Max, OuterRef, Q, Subquery, Sum
+
+from .models import Goal, SystemLog, Task, User, UserAttribute, UserDailyActivity, UserTaskLog, UserTitle
+
+RECENT_TITLES = 3
+
+
+def _attribute_columns():
+    """Max(value) per attribute name over the user's attribute rows, as attr_<name> annotations"""
+    return {
+        f'attr_{name}': Max('attributes__value', filter=Q(attributes__name=name))
+        for name, _ in UserAttribute.ATTRIBUTE_CHOICES
+    }
+
+
+def _count(queryset):
+    """Scalar subquery counting queryset's rows for OuterRef('pk'); None when there are none"""
+    return Subquery(queryset.order_by().values('user').annotate(n=Count('pk')).values('n')[:1])
+
+
+class UserContextSnapshot:
+    def __init__(self, user, attributes, goal_title, goal_description, recent_titles,
+                 earned_titles, has_system_log, week_assigned, week_completed, today_completed):
+        self.user = user
+        self.attributes = attributes
+        self.goal_title = goal_title
+        self.goal_description = goal_description
+        self.recent_titles = recent_titles
+        self.earned_titles = earned_titles
+        self.has_system_log = has_system_log
+        self.week_assigned = week_assigned
+        self.week_completed = week_completed
+        self.today_completed = today_completed
+
+    @property
+    def completion_rate(self):
+        """7-day completion rate, as a whole percentage"""
+        if not self.week_assigned:
+            return 0
+        return round(self.week_completed / self.week_assigned * 100)
+
+    @classmethod
+    def load(cls, user, today=None):
+        today = today or date.today()
+        recent = (
+            UserTaskLog.objects.filter(user=OuterRef('pk'), status='completed')
+            .order_by('-completed_at')
+            .values('task__title')
+        )
+        goal = Goal.objects.filter(user=OuterRef('pk')).order_by('pk')
+        row = User.objects.filter(pk=user.pk).annotate(
+            **_attribute_columns(),
+            **{f'recent_{i}': Subquery(recent[i:i + 1]) for i in range(RECENT_TITLES)},
+            **{
+                f'title_{key}': Exists(UserTitle.objects.filter(user=OuterRef('pk'), title_key=key))
+                for key, _ in UserTitle.TITLE_CHOICES
+            },
+            goal_title=Subquery(goal.values('title')[:1]),
+            goal_description=Subquery(goal.values('description')[:1]),
+            has_system_log=Exists(SystemLog.objects.filter(user=OuterRef('pk'))),
+        ).values(
+            *(f'attr_{name}' for name, _ in UserAttribute.ATTRIBUTE_CHOICES),
+            *(f'recent_{i}' for i in range(RECENT_TITLES)),
+            *(f'title_{key}' for key, _ in UserTitle.TITLE_CHOICES),
+            'goal_title', 'goal_description', 'has_system_log',
+        ).get()
+
+        activity = UserDailyActivity.objects.filter(
+            user=user, date__gte=today - timedelta(days=7)
+        ).aggregate(
+            week_assigned=Sum('assigned'),
+            week_completed=Sum('completed'),
+            today_completed=Sum('completed', filter=Q(date=today)),
+        )
+
+        return cls(
+            user=user,
+            attributes={
+                name: row[f'attr_{name}'] or 0 for name, _ in UserAttribute.ATTRIBUTE_CHOICES
+            },
+            goal_title=row['goal_title'],
+            goal_description=row['goal_description'] or '',
+            recent_titles=[
+                row[f'recent_{i}'] for i in range(RECENT_TITLES) if row[f'recent_{i}'] is not None
+            ],
+            earned_titles={key for key, _ in UserTitle.TITLE_CHOICES if row[f'title_{key}']},
+            has_system_log=row['has_system_log'],
+            week_assigned=activity['week_assigned'] or 0,
+            week_completed=activity['week_completed'] or 0,
+            today_completed=activity['today_completed'] or 0,
+        )
+
+
+class DashboardSnapshot:
+    def __init__(self, user, attributes, total_completed, task_count, completed_by_day,
+                 has_brief_today, unread_messages, active_title_key):
+        self.user = user
+        self.attributes = attributes
+        self.total_completed = total_completed
+        self.task_count = task_count
+        self.completed_by_day = completed_by_day
+        self.has_brief_today = has_brief_today
+        self.unread_messages = unread_messages
+        self.active_title_key = active_title_key
+
+    @classmethod
+    def load(cls, user, today=None):
+        today = today or date.today()
+        row = User.objects.filter(pk=user.pk).annotate(
+            total_completed=_count(UserTaskLog.objects.filter(user=OuterRef('pk'), status='completed')),
+            task_count=_count(Task.objects.filter(user=OuterRef('pk'))),
+            unread_messages=_count(SystemLog.objects.filter(user=OuterRef('pk'), was_read=False)),
+            has_brief_today=Exists(SystemLog.objects.filter(
+                user=OuterRef('pk'),
+                message_type__in=SystemLog.BRIEF_MESSAGE_TYPES,
+                created_at__date=today,
+            )),
+            active_title_key=Subquery(
+                UserTitle.objects.filter(user=OuterRef('pk'), is_active=True).values('title_key')[:1]
+            ),
+        ).values(
+            'total_completed', 'task_count', 'unread_messages', 'has_brief_today', 'active_title_key',
+        ).get()
+
+        monday = today - timedelta(days=today.weekday())
+        completed_by_day = dict(
+            UserDailyActivity.objects.filter(
+                user=user, date__range=(monday, monday + timedelta(days=6))
+            ).values_list('date', 'completed')
+        )
+
+        return cls(
+            user=user,
+            attributes=dict(UserAttribute.objects.filter(user=user).values_list('name', 'value')),
+            total_completed=row['total_completed'] or 0,
+            task_count=row['task_count'] or 0,
+            completed_by_day=completed_by_day,
+            has_brief_today=row['has_brief_today'],
+            unread_messages=row['unread_messages'] or 0,
+            active_title_key=row['active_title_key'],
+        )
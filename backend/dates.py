@@ -0,0 +1,23 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def day_bounds(start, end=None):
+    """Return the half-open ``[lo, hi)`` datetime range covering whole days.
+
+    ``field__date=day`` wraps the column in a cast/AT TIME ZONE on Postgres,
+    which stops it from using a btree index on the raw timestamp. Filtering
+    on ``field__gte=lo, field__lt=hi`` instead keeps the lookup sargable:
+
+        lo, hi = day_bounds(today)
+        UserTaskLog.objects.filter(completed_at__gte=lo, completed_at__lt=hi)
+
+    ``end`` is inclusive, mirroring ``__date__range`` — pass it to cover a
+    span of days (e.g. Monday to Sunday) with a single range.
+    """
+    end = end or start
+    tz = timezone.get_current_timezone()
+    lo = timezone.make_aware(datetime.combine(start, time.min), tz)
+    hi = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    return lo, hi
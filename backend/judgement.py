@@ -0,0 +1,128 @@
+"""
+The nightly judgement: penalise every user whose completion rate for a day
+fell below PASSING_RATE.
+
+judge_day() works in set-based batches of users: one query selects the
+batch from the UserDailyActivity rollup, then per severity one INSERT and
+one UPDATE apply the attribute penalty, and bulk INSERTs create the
+Redemption Quests, SystemLogs and DailyJudgement rows. Users already judged
+for the day are skipped, and the DailyJudgement unique key rolls back a
+batch that raced another run, so re-running a date never punishes twice.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import (
+    DailyJudgement, DailySelection, SystemLog, Task, User, UserDailyActivity, derived_task_fields,
+)
+from .rewards import apply_attribute_deltas_to_users, parse_reward_string
+
+PASSING_RATE = 0.3
+
+PENALTIES = {
+    'heavy': '-5 Discipline, +8 Stress',
+    'light': '-2 Discipline, +3 Stress',
+}
+
+REDEMPTION_QUEST = {
+    'title': 'Redemption Quest',
+    'description': "Complete this mission to atone for yesterday's inactivity.",
+    'attribute': 'discipline',
+    'difficulty': 2,
+    'reward_point': 8,
+    'is_random': False,
+    'mission_type': 'punishment',
+    'system_flavor': 'System directive: execute immediately. Inactivity will not be tolerated.',
+}
+REDEMPTION_REWARD = '+8 Discipline'
+
+
+def judgement_message(severity, rate):
+    if severity == 'heavy':
+        return f"Host completed zero tasks yesterday. System is disappointed. Penalty applied: {PENALTIES['heavy']}."
+    return (
+        f"Host completion rate was only {round(rate * 100)}% yesterday. "
+        f"Inactivity recorded. Light penalty applied: {PENALTIES['light']}."
+    )
+
+
+def failing_days(day):
+    """UserDailyActivity rows for day below PASSING_RATE whose user hasn't been judged for it"""
+    return UserDailyActivity.objects.filter(
+        date=day,
+        assigned__gt=0,
+        # completed / assigned < PASSING_RATE, without dividing in SQL
+        completed__lt=F('assigned') * PASSING_RATE,
+    ).exclude(
+        Exists(DailyJudgement.objects.filter(user=OuterRef('user'), date=day))
+    )
+
+
+@transaction.atomic
+def _judge_batch(day, rows):
+    """rows: (user_id, assigned, completed) tuples for one batch"""
+    now = timezone.now()
+    verdicts = []
+    for user_id, assigned, completed in rows:
+        rate = completed / assigned
+        verdicts.append((user_id, 'heavy' if completed == 0 else 'light', rate))
+
+    for severity, penalty in PENALTIES.items():
+        user_ids = [user_id for user_id, s, _ in verdicts if s == severity]
+        if user_ids:
+            apply_attribute_deltas_to_users(user_ids, parse_reward_string(penalty))
+
+    deadline = now + timedelta(hours=24)
+    tasks = Task.objects.bulk_create([
+        Task(
+            user_id=user_id,
+            deadline=deadline,
+            # bulk_create skips Task.save()
+            **derived_task_fields(REDEMPTION_QUEST['title'], REDEMPTION_QUEST['description']),
+            **REDEMPTION_QUEST,
+        )
+        for user_id, _, _ in verdicts
+    ])
+    SystemLog.objects.bulk_create([
+        SystemLog(
+            user_id=user_id,
+            message_type='punishment',
+            content=judgement_message(severity, rate),
+            missions_issued=[{
+                'id': task.id,
+                'title': task.title,
+                'mission_type': 'punishment',
+                'attribute': task.attribute,
+                'reward': REDEMPTION_REWARD,
+            }],
+        )
+        for (user_id, severity, rate), task in zip(verdicts, tasks)
+    ])
+    DailyJudgement.objects.bulk_create([
+        DailyJudgement(user_id=user_id, date=day, severity=severity, completion_rate=rate, task=task)
+        for (user_id, severity, rate), task in zip(verdicts, tasks)
+    ])
+    # The new quest belongs on today's board
+    user_ids = [user_id for user_id, _, _ in verdicts]
+    DailySelection.objects.filter(user_id__in=user_ids).delete()
+    User.objects.filter(pk__in=user_ids).update(state_version=F('state_version') + 1)
+    return len(verdicts)
+
+
+def judge_day(day, batch_size=500):
+    """Judge every user's performance on day; returns how many were penalised"""
+    judged = 0
+    last_user_id = 0
+    while True:
+        rows = list(
+            failing_days(day).filter(user_id__gt=last_user_id)
+            .order_by('user_id')
+            .values_list('user_id', 'assigned', 'completed')[:batch_size]
+        )
+        if not rows:
+            return judged
+        judged += _judge_batch(day, rows)
+        last_user_id = rows[-1][0]
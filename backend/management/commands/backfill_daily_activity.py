@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from backend.models import Task, UserTaskLog, UserDailyActivity
+from backend.views import calculate_task_exp
+
+
+class Command(BaseCommand):
+    help = "Rebuild the UserDailyActivity rollup from existing UserTaskLog rows. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild rows for this username')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        logs = UserTaskLog.objects.all()
+        existing = UserDailyActivity.objects.all()
+        if options['user']:
+            logs = logs.filter(user__username=options['user'])
+            existing = existing.filter(user__username=options['user'])
+
+        counters = defaultdict(lambda: {'assigned': 0, 'completed': 0, 'missed': 0, 'exp_gained': 0})
+
+        # Both passes are GROUP BYs in the database, so memory scales with
+        # the number of (user, day) pairs rather than the number of logs.
+        assigned = (
+            logs.annotate(day=TruncDate('assigned_at'))
+            .values('user', 'day', 'status')
+            .annotate(n=Count('id'))
+        )
+        for entry in assigned.iterator():
+            row = counters[(entry['user'], entry['day'])]
+            row['assigned'] += entry['n']
+            if entry['status'] == 'missed':
+                row['missed'] += entry['n']
+
+        completed = (
+            logs.filter(status='completed', completed_at__isnull=False)
+            .annotate(day=TruncDate('completed_at'))
+            .values('user', 'day', 'task__difficulty', 'task__is_random')
+            .annotate(n=Count('id'))
+        )
+        for entry in completed.iterator():
+            row = counters[(entry['user'], entry['day'])]
+            row['completed'] += entry['n']
+            task = Task(difficulty=entry['task__difficulty'], is_random=entry['task__is_random'])
+            row['exp_gained'] += calculate_task_exp(task) * entry['n']
+
+        with transaction.atomic():
+            existing.delete()
+            UserDailyActivity.objects.bulk_create(
+                (
+                    UserDailyActivity(user_id=user_id, date=day, **values)
+                    for (user_id, day), values in counters.items()
+                ),
+                batch_size=options['batch_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(counters)} daily activity rows"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from backend.views import BRIEF_CACHE_COUNTERS, counter_cache
+
+
+class Command(BaseCommand):
+    help = "Brief-cache hits and misses summed over every web and worker process, from the shared 'counters' cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        hits = counter_cache.get(BRIEF_CACHE_COUNTERS[True]) or 0
+        misses = counter_cache.get(BRIEF_CACHE_COUNTERS[False]) or 0
+        lookups = hits + misses
+        rate = f"{hits / lookups:.0%}" if lookups else "n/a"
+        self.stdout.write(f"Brief cache: {hits} hits, {misses} misses, hit rate {rate}")
+        if options['reset']:
+            counter_cache.delete_many(BRIEF_CACHE_COUNTERS.values())
@@ -0,0 +1,56 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from backend.models import SystemChatJob
+from backend.views import SystemChatError, run_system_chat
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run queued System chat jobs: the AI provider calls behind POST /api/system/chat/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait between checks of an empty queue')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Fail jobs left running this many seconds (their worker died)')
+
+    def handle(self, *args, **options):
+        while True:
+            # Same connection housekeeping Django does around each request,
+            # so a long-lived worker survives database restarts.
+            close_old_connections()
+            job = SystemChatJob.claim_next()
+            if job is None:
+                self.fail_stale(options['stale_after'])
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            self.run(job)
+
+    def run(self, job):
+        try:
+            job.result = run_system_chat(job.user, job.context_type, job.message)
+            job.status = 'done'
+        except SystemChatError as e:
+            job.status, job.error = 'failed', str(e)
+        except Exception:
+            logger.exception(f"System chat job {job.id} crashed")
+            job.status, job.error = 'failed', 'Something went wrong. Please try again'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['result', 'status', 'error', 'finished_at'])
+        self.stdout.write(f"Job {job.id}: {job.status}")
+
+    def fail_stale(self, stale_after):
+        now = timezone.now()
+        SystemChatJob.objects.filter(
+            status='running', started_at__lt=now - timedelta(seconds=stale_after)
+        ).update(status='failed', error='Timed out. Please try again', finished_at=now)
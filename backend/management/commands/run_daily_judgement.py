@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.judgement import judge_day
+
+
+class Command(BaseCommand):
+    help = "Penalise every user whose completion rate for a day (default: yesterday) was below 30 %. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to judge, as YYYY-MM-DD')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Invalid --date '{options['date']}', expected YYYY-MM-DD")
+        else:
+            day = date.today() - timedelta(days=1)
+
+        judged = judge_day(day, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Judged {day}: {judged} users penalised"))
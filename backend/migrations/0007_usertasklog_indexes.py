@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_task_mission_type_task_system_flavor_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usertitle',
+            name='title_key',
+            field=models.CharField(choices=[('iron_will', 'Iron Will'), ('early_bird', 'Early Bird'), ('comeback_king', 'Comeback King'), ('consistent_scholar', 'Consistent Scholar'), ('overachiever', 'Overachiever'), ('first_system_contact', 'First Contact')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='usertasklog',
+            index=models.Index(fields=['user', 'status', 'completed_at'], name='usertasklog_user_status_done'),
+        ),
+        migrations.AddIndex(
+            model_name='usertasklog',
+            index=models.Index(fields=['user', 'assigned_at'], name='usertasklog_user_assigned'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:30
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def task_exp(difficulty, is_random):
+    # Frozen copy of views.calculate_task_exp as of this migration
+    base_exp = 10 + (difficulty or 1) * 5
+    return base_exp * 3 // 2 if is_random else base_exp
+
+
+def backfill_daily_activity(apps, schema_editor):
+    """Fill the new rollup from existing logs, like the backfill_daily_activity command"""
+    UserTaskLog = apps.get_model('backend', 'UserTaskLog')
+    UserDailyActivity = apps.get_model('backend', 'UserDailyActivity')
+    counters = defaultdict(lambda: {'assigned': 0, 'completed': 0, 'missed': 0, 'exp_gained': 0})
+
+    assigned = (
+        UserTaskLog.objects.annotate(day=TruncDate('assigned_at'))
+        .values('user', 'day', 'status')
+        .annotate(n=Count('id'))
+    )
+    for entry in assigned.iterator():
+        row = counters[(entry['user'], entry['day'])]
+        row['assigned'] += entry['n']
+        if entry['status'] == 'missed':
+            row['missed'] += entry['n']
+
+    completed = (
+        UserTaskLog.objects.filter(status='completed', completed_at__isnull=False)
+        .annotate(day=TruncDate('completed_at'))
+        .values('user', 'day', 'task__difficulty', 'task__is_random')
+        .annotate(n=Count('id'))
+    )
+    for entry in completed.iterator():
+        row = counters[(entry['user'], entry['day'])]
+        row['completed'] += entry['n']
+        row['exp_gained'] += task_exp(entry['task__difficulty'], entry['task__is_random']) * entry['n']
+
+    UserDailyActivity.objects.bulk_create(
+        (UserDailyActivity(user_id=user_id, date=day, **values) for (user_id, day), values in counters.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_usertasklog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('assigned', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('missed', models.PositiveIntegerField(default=0)),
+                ('exp_gained', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Daily Activity',
+                'verbose_name_plural': 'User Daily Activity',
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:43
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of backend.models.hidden_from_daily as of this migration, so
+# later changes to the live rule don't rewrite what this step did.
+HIDDEN_TITLE_FRAGMENTS = (
+    'Click VS Code Tab',
+    'Press Ctrl+S',
+    'Check Git Status',
+    'Open Terminal',
+    'Create New File',
+    'Code Review Check',
+    'Open Browser Dev Tools',
+    'Navigate to GitHub',
+)
+HIDDEN_DESCRIPTION_FRAGMENT = 'Time-limited task completed'
+NUMERIC_TITLE_RE = re.compile(r'^\s*\d+\s*$')
+TIMESTAMPED_TITLE_RE = re.compile(r' - \d{2}:\d{2}:\d{2}$')
+
+
+def hidden_from_daily(title, description):
+    return (
+        not title
+        or any(fragment in title for fragment in HIDDEN_TITLE_FRAGMENTS)
+        or HIDDEN_DESCRIPTION_FRAGMENT in (description or '')
+        or bool(NUMERIC_TITLE_RE.match(title))
+        or bool(TIMESTAMPED_TITLE_RE.search(title))
+    )
+
+
+def classify_existing_tasks(apps, schema_editor):
+    """Flag existing tasks with the same rule Task.save() applies to new ones."""
+    Task = apps.get_model('backend', 'Task')
+    hidden_ids = [
+        task_id
+        for task_id, title, description in Task.objects.values_list('id', 'title', 'description').iterator()
+        if hidden_from_daily(title, description)
+    ]
+    for start in range(0, len(hidden_ids), 1000):
+        Task.objects.filter(pk__in=hidden_ids[start:start + 1000]).update(is_hidden_from_daily=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_userdailyactivity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='is_hidden_from_daily',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'is_hidden_from_daily'], name='task_user_daily_visibility'),
+        ),
+        migrations.RunPython(classify_existing_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_task_is_hidden_from_daily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySelection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('task_ids', models.JSONField(default=list)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='daily_selection', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Selection',
+                'verbose_name_plural': 'Daily Selections',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_systemchatjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyJudgement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('severity', models.CharField(choices=[('light', 'Light'), ('heavy', 'Heavy')], max_length=10)),
+                ('completion_rate', models.FloatField()),
+                ('delivered', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='backend.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judgements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Judgement',
+                'verbose_name_plural': 'Daily Judgements',
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
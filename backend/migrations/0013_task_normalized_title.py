@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:28
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of backend.models.normalize_title as of this migration, so
+# later changes to the live normalizer don't rewrite what this step did.
+TIMESTAMPED_TITLE_RE = re.compile(r' - \d{2}:\d{2}:\d{2}$')
+TITLE_SYMBOLS_RE = re.compile(r'[^\w\s-]')
+
+
+def normalize_title(title):
+    title = TIMESTAMPED_TITLE_RE.sub('', title or '')
+    return ' '.join(TITLE_SYMBOLS_RE.sub('', title).lower().split())
+
+
+def normalize_existing_titles(apps, schema_editor):
+    """Fill normalized_title the way Task.save() does for new tasks."""
+    Task = apps.get_model('backend', 'Task')
+    batch = []
+    for task in Task.objects.only('id', 'title').iterator():
+        task.normalized_title = normalize_title(task.title)
+        batch.append(task)
+        if len(batch) == 1000:
+            Task.objects.bulk_update(batch, ['normalized_title'])
+            batch = []
+    Task.objects.bulk_update(batch, ['normalized_title'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0012_dailyjudgement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='normalized_title',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'normalized_title'], name='task_user_normalized_title'),
+        ),
+        migrations.RunPython(normalize_existing_titles, migrations.RunPython.noop),
+    ]
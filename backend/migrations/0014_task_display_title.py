@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:32
+
+import re
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Frozen copy of backend.models.display_title as of this migration
+TIMESTAMPED_TITLE_RE = re.compile(r' - \d{2}:\d{2}:\d{2}$')
+
+
+def fill_display_titles(apps, schema_editor):
+    """display_title is the title itself except on timestamped time-limited tasks."""
+    Task = apps.get_model('backend', 'Task')
+    Task.objects.update(display_title=F('title'))
+    timestamped = Task.objects.filter(title__regex=r' - [0-9]{2}:[0-9]{2}:[0-9]{2}$').only('id', 'title')
+    batch = []
+    for task in timestamped.iterator():
+        task.display_title = TIMESTAMPED_TITLE_RE.sub('', task.title)
+        batch.append(task)
+        if len(batch) == 1000:
+            Task.objects.bulk_update(batch, ['display_title'])
+            batch = []
+    Task.objects.bulk_update(batch, ['display_title'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_task_normalized_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='display_title',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_display_titles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_task_display_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='state_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,57 @@
+"""
+Validation for the missions the System chat model returns.
+
+The model's output is not trusted to fit the schema in the prompt, so every
+field is validated or clamped before it becomes a Task. The allowed values
+are built once at import (frozensets) rather than per mission.
+"""
+from .models import Task
+
+ATTRIBUTES = frozenset(name for name, _ in Task.ATTRIBUTE_CHOICES)
+MISSION_TYPES = frozenset(name for name, _ in Task.MISSION_TYPE_CHOICES)
+
+
+class MissionSchema:
+    """Rules for one model-supplied mission; clean() turns it into Task field values."""
+
+    def __init__(self, attributes=ATTRIBUTES, mission_types=MISSION_TYPES,
+                 default_attribute='discipline', default_mission_type='system_generated',
+                 max_title_length=150, max_text_length=500, difficulty_range=(1, 3)):
+        self.attributes = frozenset(attributes)
+        self.mission_types = frozenset(mission_types)
+        self.default_attribute = default_attribute
+        self.default_mission_type = default_mission_type
+        self.max_title_length = max_title_length
+        self.max_text_length = max_text_length
+        self.min_difficulty, self.max_difficulty = difficulty_range
+
+    @staticmethod
+    def choice(value, allowed, default):
+        """value if it's one of the allowed strings, else default (lists and dicts aren't hashable)"""
+        return value if isinstance(value, str) and value in allowed else default
+
+    def clean(self, mission):
+        """Task field values for a raw mission dict, or None if it isn't a dict at all"""
+        if not isinstance(mission, dict):
+            return None
+        attribute = self.choice(mission.get('attribute'), self.attributes, self.default_attribute)
+        mission_type = self.choice(mission.get('mission_type'), self.mission_types, self.default_mission_type)
+        try:
+            difficulty = int(mission.get('difficulty', self.min_difficulty))
+        except (TypeError, ValueError):
+            difficulty = self.min_difficulty
+        difficulty = max(self.min_difficulty, min(self.max_difficulty, difficulty))
+        return {
+            'title': str(mission.get('title') or 'System Mission')[:self.max_title_length],
+            # Capped like title — an open model is more likely than Claude
+            # to ignore the "one sentence" instruction in the prompt.
+            'description': str(mission.get('description') or '')[:self.max_text_length],
+            'attribute': attribute,
+            'difficulty': difficulty,
+            'reward_point': max(3, min(15, difficulty * 4 + 2)),
+            'mission_type': mission_type,
+            'system_flavor': str(mission.get('flavor_text') or '')[:self.max_text_length],
+        }
+
+
+MISSION_SCHEMA = MissionSchema()
@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from datetime import date, timedelta
+import re
 
 PERSONALITY_CHOICES = [
     ('logical', 'Logical'),
@@ -18,6 +22,9 @@ class User(AbstractUser):
     system_personality = models.CharField(
         max_length=20, choices=PERSONALITY_CHOICES, default='logical'
     )
+    # Bumped by every write the read endpoints could reflect; their ETags
+    # are built from it (see bump_state_version).
+    state_version = models.PositiveBigIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name = "User"
@@ -26,18 +33,27 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def bump_state_version(cls, user):
+        """Mark what the read endpoints show for user (a User or its pk) as changed.
+
+        Call inside the write's transaction, so a reader never sees the new
+        version alongside the old data.
+        """
+        cls.objects.filter(pk=getattr(user, 'pk', user)).update(state_version=F('state_version') + 1)
+        if isinstance(user, cls):
+            user.state_version += 1
+
     def update_streak(self):
         """Update user's streak based on daily activity (completing at least one task)"""
         today = date.today()
 
-        # Check if any task was completed today
-        completed_today = UserTaskLog.objects.filter(
+        # Check if any task was completed today (one-row rollup lookup)
+        has_activity_today = UserDailyActivity.objects.filter(
             user=self,
-            status='completed',
-            completed_at__date=today
-        ).count()
-
-        has_activity_today = completed_today > 0
+            date=today,
+            completed__gt=0
+        ).exists()
 
         # Update streak logic based on daily activity
         if has_activity_today:
@@ -54,7 +70,9 @@ class User(AbstractUser):
                 self.max_streak = self.current_streak
 
             self.last_activity_date = today
-            self.save()
+            # Only the streak fields: EXP/level are written by the reward
+            # ledger with F() expressions and must not be overwritten here.
+            self.save(update_fields=['current_streak', 'max_streak', 'last_activity_date'])
 
         # Note: We don't decrement streak here because missing a day will naturally break the streak
         # when the user next completes a task (if it's not consecutive)
@@ -102,9 +120,78 @@ class Goal(models.Model):
         verbose_name = "Goal"
         verbose_name_plural = "Goals"
 
+    # The daily board is weighted toward the goal's attributes, so a goal
+    # change must redraw it. No API view edits goals (only signup and the
+    # admin do), hence the model-level hook.
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        DailySelection.invalidate(self.user_id)
+        User.bump_state_version(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        DailySelection.invalidate(self.user_id)
+        User.bump_state_version(self.user_id)
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
+# Tasks matching any of these never appear on the daily board: the
+# ultra-micro engineering tasks belong to the time-limited popup, and their
+# per-completion copies are stored with a "Time-limited task completed"
+# description.
+DAILY_HIDDEN_TITLE_FRAGMENTS = (
+    'Click VS Code Tab',
+    'Press Ctrl+S',
+    'Check Git Status',
+    'Open Terminal',
+    'Create New File',
+    'Code Review Check',
+    'Open Browser Dev Tools',
+    'Navigate to GitHub',
+)
+DAILY_HIDDEN_DESCRIPTION_FRAGMENT = 'Time-limited task completed'
+# Corrupted titles: purely numeric (e.g. "1", "42"), or carrying the
+# timestamp suffix from accidental time-limited task storage
+# (e.g. "Navigate to GitHub - 16:13:13")
+NUMERIC_TITLE_RE = re.compile(r'^\s*\d+\s*$')
+TIMESTAMPED_TITLE_RE = re.compile(r' - \d{2}:\d{2}:\d{2}$')
+TITLE_SYMBOLS_RE = re.compile(r'[^\w\s-]')
+
+
+def hidden_from_daily(title, description):
+    """Whether a task with this title/description should be kept off the daily board"""
+    return (
+        not title
+        or any(fragment in title for fragment in DAILY_HIDDEN_TITLE_FRAGMENTS)
+        or DAILY_HIDDEN_DESCRIPTION_FRAGMENT in (description or '')
+        or bool(NUMERIC_TITLE_RE.match(title))
+        or bool(TIMESTAMPED_TITLE_RE.search(title))
+    )
+
+
+def display_title(title):
+    """Title without the time-limited timestamp suffix ("Meditation - 07:15:02" -> "Meditation")"""
+    return TIMESTAMPED_TITLE_RE.sub('', title or '')
+
+
+def normalize_title(title):
+    """Lookup key for a title as the frontend may send it back: without the
+    time-limited timestamp suffix, emoji and punctuation, lowercased, with
+    whitespace collapsed ("🧘‍♀️ Meditation - 07:15:02" -> "meditation")"""
+    return ' '.join(TITLE_SYMBOLS_RE.sub('', display_title(title)).lower().split())
+
+
+def derived_task_fields(title, description):
+    """The columns Task.save() derives from title/description; bulk_create
+    callers, which skip save(), pass these in themselves."""
+    return {
+        'is_hidden_from_daily': hidden_from_daily(title, description),
+        'normalized_title': normalize_title(title),
+        'display_title': display_title(title),
+    }
+
+
 class Task(models.Model):
     ATTRIBUTE_CHOICES = [
         ('intelligence', 'Intelligence'),
@@ -135,11 +222,32 @@ class Task(models.Model):
         max_length=20, choices=MISSION_TYPE_CHOICES, default='daily'
     )
     system_flavor = models.TextField(blank=True, default='')
+    # Derived from title/description in save() so the daily board can use
+    # an indexed equality filter instead of a stack of NOT LIKE clauses.
+    is_hidden_from_daily = models.BooleanField(default=False, editable=False)
+    # normalize_title(title), so a title sent back by the frontend resolves
+    # with one indexed lookup.
+    normalized_title = models.CharField(max_length=150, blank=True, default='', editable=False)
+    # display_title(title), as shown in the completion history
+    display_title = models.CharField(max_length=150, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
+        indexes = [
+            models.Index(fields=['user', 'is_hidden_from_daily'], name='task_user_daily_visibility'),
+            models.Index(fields=['user', 'normalized_title'], name='task_user_normalized_title'),
+        ]
+
+    def save(self, *args, **kwargs):
+        derived = derived_task_fields(self.title, self.description)
+        for name, value in derived.items():
+            setattr(self, name, value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'description'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -162,11 +270,92 @@ class UserTaskLog(models.Model):
         verbose_name_plural = "User Task Logs"
         unique_together = ('user', 'task', 'assigned_at')
         # A task can only be assigned once to a user at a specific time
+        indexes = [
+            # "What did this user complete today/this week" — the filter
+            # behind the task board, completion toggles, streaks and stats.
+            models.Index(fields=['user', 'status', 'completed_at'], name='usertasklog_user_status_done'),
+            # Completion-rate queries (progress stats, punishment check,
+            # AI prompt) bucket by assignment date instead.
+            models.Index(fields=['user', 'assigned_at'], name='usertasklog_user_assigned'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.task.title} - {self.get_status_display()}"
 
 
+class UserDailyActivity(models.Model):
+    """Per-user, per-day rollup of UserTaskLog activity.
+
+    Stats endpoints read a handful of these rows instead of rescanning the
+    log history. The completion views keep it in step with the logs via
+    record(); `manage.py backfill_daily_activity` rebuilds it from scratch.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    date = models.DateField()
+    # Logs assigned that day (bucketed by assigned_at)
+    assigned = models.PositiveIntegerField(default=0)
+    # Logs completed that day (bucketed by completed_at)
+    completed = models.PositiveIntegerField(default=0)
+    # Logs assigned that day that ended up missed
+    missed = models.PositiveIntegerField(default=0)
+    exp_gained = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "User Daily Activity"
+        verbose_name_plural = "User Daily Activity"
+        unique_together = ('user', 'date')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}: {self.completed}/{self.assigned}"
+
+    @classmethod
+    def record(cls, user, day, **deltas):
+        """Add counter deltas (e.g. completed=1, exp_gained=15) to user's row for day.
+
+        Applied as a single UPDATE with F() expressions so concurrent
+        requests can't overwrite each other's increments; counters are
+        clamped at zero rather than going negative.
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updates = {field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()}
+        if cls.objects.filter(user=user, date=day).update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    user=user, date=day,
+                    **{field: max(0, delta) for field, delta in deltas.items()}
+                )
+        except IntegrityError:
+            # Another request created today's row between our UPDATE and INSERT
+            cls.objects.filter(user=user, date=day).update(**updates)
+
+
+class DailySelection(models.Model):
+    """The daily task board TaskListView drew for a user, kept for the rest of that day.
+
+    One row per user: a new day's draw overwrites it. Views that create,
+    edit or delete tasks (and goal changes) call invalidate() so the next
+    fetch redraws.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='daily_selection')
+    date = models.DateField()
+    task_ids = models.JSONField(default=list)
+
+    class Meta:
+        verbose_name = "Daily Selection"
+        verbose_name_plural = "Daily Selections"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}: {self.task_ids}"
+
+    @classmethod
+    def invalidate(cls, user):
+        cls.objects.filter(user=user).delete()
+
+
 class SystemLog(models.Model):
     MESSAGE_TYPE_CHOICES = [
         ('daily_brief', 'Daily Brief'),
@@ -175,6 +364,8 @@ class SystemLog(models.Model):
         ('chat_response', 'Chat Response'),
         ('alert', 'Alert'),
     ]
+    # A log of these types today means the host has seen the morning brief
+    BRIEF_MESSAGE_TYPES = ('daily_brief', 'chat_response')
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='system_logs')
     message_type = models.CharField(max_length=20, choices=MESSAGE_TYPE_CHOICES)
@@ -192,6 +383,36 @@ class SystemLog(models.Model):
         return f"{self.user.username} - {self.message_type} - {self.created_at.date()}"
 
 
+class DailyJudgement(models.Model):
+    """The penalty `manage.py run_daily_judgement` handed a user for a poor day.
+
+    One row per punished user per judged day; the unique key is what makes
+    re-running the command for a date a no-op. PunishmentCheckView reports
+    each row to the app once, then marks it delivered.
+    """
+    SEVERITY_CHOICES = [
+        ('light', 'Light'),
+        ('heavy', 'Heavy'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='judgements')
+    # The day that was judged (the command runs after it ends)
+    date = models.DateField()
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES)
+    completion_rate = models.FloatField()
+    task = models.ForeignKey(Task, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    delivered = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Daily Judgement"
+        verbose_name_plural = "Daily Judgements"
+        unique_together = ('user', 'date')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date} - {self.severity}"
+
+
 class UserTitle(models.Model):
     TITLE_CHOICES = [
         ('iron_will', 'Iron Will'),
@@ -214,3 +435,55 @@ class UserTitle(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.get_title_key_display()}"
+
+
+class SystemChatJob(models.Model):
+    """A queued System chat request, run by `manage.py run_chat_worker`.
+
+    SystemChatView only validates and enqueues; the worker makes the AI
+    provider call, persists the missions and SystemLog, and stores the
+    response payload in result for the client to poll.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_jobs')
+    context_type = models.CharField(max_length=20)
+    message = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    error = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "System Chat Job"
+        verbose_name_plural = "System Chat Jobs"
+        indexes = [
+            # The worker's "oldest queued job" lookup
+            models.Index(fields=['status', 'created_at'], name='chatjob_status_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.context_type} - {self.status}"
+
+    @classmethod
+    def claim_next(cls):
+        """Mark the oldest queued job running and return it, or None if none are queued.
+
+        The claim is a conditional UPDATE, so with several workers only one
+        of them can move a given job out of 'queued'.
+        """
+        while True:
+            job = cls.objects.filter(status='queued').order_by('created_at').first()
+            if job is None:
+                return None
+            now = timezone.now()
+            if cls.objects.filter(pk=job.pk, status='queued').update(status='running', started_at=now):
+                job.status, job.started_at = 'running', now
+                return job
@@ -0,0 +1,171 @@
+"""
+Reward ledger: the one place that changes a user's EXP, level and attributes.
+
+Every change is applied as UPDATE statements built from F() expressions and
+clamped in SQL, so two completions landing at the same time (e.g. from two
+open tabs) both count instead of the last read-modify-save winning.
+"""
+import bisect
+import logging
+import math
+import re
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Least
+from django.db.models.lookups import GreaterThanOrEqual
+
+from .models import User, UserAttribute
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL = 100
+
+# Upper bound for each attribute; every attribute floors at 0.
+ATTRIBUTE_CAPS = {name: 1000 for name, _ in UserAttribute.ATTRIBUTE_CHOICES}
+ATTRIBUTE_CAPS['stress'] = 100
+
+REWARD_CHANGE_RE = re.compile(r'([+-]\d+)\s+(\w+)')
+
+
+def _exp_formula(level):
+    return 0 if level <= 1 else math.floor(100 * math.pow(1.3, level - 1))
+
+
+# Total EXP needed to reach each level: LEVEL_THRESHOLDS[level - 1].
+LEVEL_THRESHOLDS = tuple(_exp_formula(level) for level in range(1, MAX_LEVEL + 1))
+
+
+def get_exp_for_level(level):
+    """Calculate EXP required for a specific level"""
+    if level <= 1:
+        return 0
+    if level <= MAX_LEVEL:
+        return LEVEL_THRESHOLDS[level - 1]
+    # Only reached for the "next level" of a max-level user
+    return _exp_formula(level)
+
+
+def calculate_level_from_exp(total_exp):
+    """Calculate current level from total EXP"""
+    # Thresholds are strictly increasing from 0, so the number of them at or
+    # below total_exp is the level (capped at MAX_LEVEL by the tuple length).
+    return max(1, bisect.bisect_right(LEVEL_THRESHOLDS, total_exp))
+
+
+def level_progress(user):
+    """EXP thresholds around the user's level and how far through it they are"""
+    current_level_exp = get_exp_for_level(user.level)
+    next_level_exp = get_exp_for_level(user.level + 1)
+    exp_progress = user.exp - current_level_exp
+    exp_needed = next_level_exp - current_level_exp
+    return {
+        "current_level_exp": current_level_exp,
+        "next_level_exp": next_level_exp,
+        "exp_progress": exp_progress,
+        "exp_needed": exp_needed,
+        "progress_percentage": int(exp_progress / exp_needed * 100),
+    }
+
+
+def user_stats(user, old_level):
+    """The user_stats block returned by the task completion endpoints"""
+    return {
+        "level": user.level,
+        "exp": user.exp,
+        "level_up": user.level > old_level,
+        "old_level": old_level,
+        **level_progress(user),
+    }
+
+
+def parse_reward_string(reward_string):
+    """Parse "+3 Intelligence, +2 Discipline, -1 Stress" into {'intelligence': 3, ...}.
+
+    Unknown attribute names are skipped; repeated ones are summed.
+    """
+    deltas = {}
+    for change in (reward_string or '').split(','):
+        match = REWARD_CHANGE_RE.match(change.strip())
+        if not match:
+            continue
+        value_str, attr_name = match.groups()
+        attr_name = attr_name.lower()
+        if attr_name not in ATTRIBUTE_CAPS:
+            logger.warning(f"Ignoring reward for unknown attribute '{attr_name}'")
+            continue
+        deltas[attr_name] = deltas.get(attr_name, 0) + int(value_str)
+    return deltas
+
+
+def _level_for(exp_expression):
+    """SQL CASE mapping an EXP expression to its level (mirrors calculate_level_from_exp)"""
+    return Case(
+        *[
+            When(GreaterThanOrEqual(exp_expression, LEVEL_THRESHOLDS[level - 1]), then=Value(level))
+            for level in range(MAX_LEVEL, 1, -1)
+        ],
+        default=Value(1),
+    )
+
+
+def _clamped_deltas(deltas, names):
+    """value + delta per attribute name, clamped to [0, cap], as one CASE"""
+    return Case(
+        *[
+            When(name=name, then=Greatest(Least(F('value') + deltas[name], Value(ATTRIBUTE_CAPS[name])), Value(0)))
+            for name in names
+        ],
+        default=F('value'),
+    )
+
+
+def _apply_attribute_deltas(user, deltas):
+    def update(names):
+        return UserAttribute.objects.filter(user=user, name__in=names).update(
+            value=_clamped_deltas(deltas, names)
+        )
+
+    if update(list(deltas)) == len(deltas):
+        return
+    # Some attribute rows don't exist yet (accounts predating an attribute):
+    # create them at 0, then apply the deltas to just those.
+    existing = set(UserAttribute.objects.filter(user=user, name__in=deltas).values_list('name', flat=True))
+    missing = [name for name in deltas if name not in existing]
+    UserAttribute.objects.bulk_create(
+        [UserAttribute(user=user, name=name, value=0) for name in missing],
+        ignore_conflicts=True,
+    )
+    update(missing)
+
+
+def apply_reward(user, exp=0, attribute_deltas=None):
+    """Add exp (may be negative) and attribute deltas to user in one transaction.
+
+    EXP is floored at 0 and the level recomputed from it in the same UPDATE;
+    all attributes are updated with a single UPDATE ... CASE. user.exp and
+    user.level are refreshed from the database afterwards.
+    """
+    with transaction.atomic():
+        if exp:
+            new_exp = Greatest(F('exp') + exp, Value(0))
+            User.objects.filter(pk=user.pk).update(exp=new_exp, level=_level_for(new_exp))
+        if attribute_deltas:
+            _apply_attribute_deltas(user, attribute_deltas)
+    if exp:
+        user.refresh_from_db(fields=['exp', 'level'])
+
+
+def apply_attribute_deltas_to_users(user_ids, deltas):
+    """Add the same attribute deltas to every user in user_ids (batch jobs).
+
+    One INSERT creates any missing attribute rows at 0, then one UPDATE
+    applies the deltas to all users at once.
+    """
+    UserAttribute.objects.bulk_create(
+        [UserAttribute(user_id=user_id, name=name, value=0) for user_id in user_ids for name in deltas],
+        ignore_conflicts=True,
+    )
+    UserAttribute.objects.filter(user_id__in=user_ids, name__in=deltas).update(
+        value=_clamped_deltas(deltas, list(deltas))
+    )
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -95,10 +96,25 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
 
+# Connection reuse. Opening a connection to Neon costs a TCP + TLS handshake
+# that dwarfs most of our queries, so on Postgres requests borrow connections
+# from a psycopg 3 pool per server process (DB_POOL, on by default; Django
+# requires CONN_MAX_AGE=0 with it). The app is served over ASGI
+# (backend/asgi.py), where each request's sync code runs on a thread that
+# comes and goes: a persistent per-thread connection would never be reused,
+# and they would pile up until Postgres refused more. So without the pool
+# (DB_POOL=0, or sqlite) connections close after every request unless
+# DB_CONN_MAX_AGE opts into keeping them for that many seconds (empty =
+# forever; only safe under a WSGI server), with Django pinging them before
+# reuse.
+_conn_max_age = os.environ.get("DB_CONN_MAX_AGE", "0").strip()
+DB_POOL = os.environ.get("DB_POOL", "1") == "1"
+
 DATABASES = {
     "default": dj_database_url.parse(
         DATABASE_URL,
-        conn_max_age=0,
+        conn_max_age=0 if DB_POOL else (int(_conn_max_age) if _conn_max_age else None),
+        conn_health_checks=os.environ.get("DB_CONN_HEALTH_CHECKS", "1") == "1",
         # Only enforce SSL in production — local/CI runs (DEBUG=1) commonly
         # point at plain sqlite or an unencrypted test database. This is a
         # fallback only: if DATABASE_URL itself has ?sslmode=require (as the
@@ -109,6 +125,25 @@ DATABASES = {
     )
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Requests run concurrently under ASGI. Taking the write lock at BEGIN,
+    # and waiting up to `timeout` seconds for it, queues concurrent writers
+    # instead of failing them with "database is locked".
+    DATABASES["default"].setdefault("OPTIONS", {}).update({"transaction_mode": "IMMEDIATE", "timeout": 20})
+    # Tests get a file rather than the default shared-cache in-memory
+    # database, whose table locks fail concurrent writers outright, so the
+    # threaded tests (ConcurrentCompletionTests) run here too.
+    DATABASES["default"]["TEST"] = {"NAME": os.path.join(tempfile.gettempdir(), "levelup-test.sqlite3")}
+
+if DB_POOL and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Needs the psycopg_pool package. Each server worker gets its own pool,
+    # so keep DB_POOL_MAX_SIZE x workers under the database's connection limit.
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "4")),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -189,7 +224,7 @@ REST_FRAMEWORK = {
     # ScopedRateThrottle only affects views that declare a throttle_scope,
     # so regular task/stat endpoints stay unthrottled.
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.ScopedRateThrottle',
+        'backend.throttles.ScopedThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         # The System chat endpoint calls the Claude API, which costs money
@@ -208,11 +243,106 @@ REST_FRAMEWORK = {
 }
 
 # Throttle counters must be shared across workers and survive restarts, so
-# they live in the database rather than the default per-process memory cache.
-# Requires the cache table: python manage.py createcachetable
+# they don't go in the default per-process memory cache. THROTTLE_CACHE picks
+# the store for the 'throttle' alias (see backend/throttles.py and backend/cache.py):
+#   sqlite    a WAL-mode file shared by the workers on this host (default)
+#   redis     REDIS_URL; needed once more than one instance serves traffic
+#   database  the main database's django_cache table (python manage.py createcachetable)
+THROTTLE_CACHES = {
+    'sqlite': {
+        'BACKEND': 'backend.cache.SQLiteCache',
+        'LOCATION': os.environ.get(
+            'THROTTLE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'levelup-throttle.sqlite3')
+        ),
+    },
+    'redis': {
+        'BACKEND': 'backend.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    },
+    'database': {
+        'BACKEND': 'backend.cache.DatabaseCache',
+        'LOCATION': 'django_cache',
+    },
+}
+THROTTLE_CACHE = os.environ.get('THROTTLE_CACHE', 'sqlite')
+if THROTTLE_CACHE not in THROTTLE_CACHES:
+    raise RuntimeError(f"THROTTLE_CACHE must be one of {', '.join(THROTTLE_CACHES)}")
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'django_cache',
-    }
+    },
+    'throttle': THROTTLE_CACHES[THROTTLE_CACHE],
+    # Counters every process adds to (brief-cache hits and misses), in the
+    # same shared store as the throttle but under their own key prefix.
+    'counters': {**THROTTLE_CACHES[THROTTLE_CACHE], 'KEY_PREFIX': 'counters'},
+}
+
+# AI providers for the System chat, built once per process by
+# backend.ai.get_provider(); AI_PROVIDER picks the one in use.
+# NVIDIA's hosted NIM API (sign up at build.nvidia.com, calls served from
+# integrate.api.nvidia.com) is free and rate-limited rather than billed per
+# token, which is why it's the default for a guest-accessible endpoint —
+# 'anthropic' stays available as an opt-in for higher-quality output once
+# that cost is worth paying for. 'fake' answers with a canned reply and no
+# network call (offline development, benchmarks).
+AI_TIMEOUT = float(os.environ.get('AI_TIMEOUT', '30'))
+AI_MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', '2'))
+AI_PROVIDERS = {
+    'nvidia': {
+        'BACKEND': 'backend.ai.OpenAICompatibleProvider',
+        'BASE_URL': 'https://integrate.api.nvidia.com/v1',
+        'API_KEY': os.environ.get('NVIDIA_API_KEY', ''),
+        'API_KEY_ENV': 'NVIDIA_API_KEY',
+        'MODEL': os.environ.get('NVIDIA_MODEL', 'meta/llama-3.1-70b-instruct'),
+        'TIMEOUT': AI_TIMEOUT,
+        'MAX_RETRIES': AI_MAX_RETRIES,
+    },
+    'anthropic': {
+        'BACKEND': 'backend.ai.AnthropicProvider',
+        'API_KEY': os.environ.get('ANTHROPIC_API_KEY', ''),
+        'API_KEY_ENV': 'ANTHROPIC_API_KEY',
+        'MODEL': 'claude-haiku-4-5-20251001',
+        'TIMEOUT': AI_TIMEOUT,
+        'MAX_RETRIES': AI_MAX_RETRIES,
+    },
+    'fake': {
+        'BACKEND': 'backend.ai.FakeProvider',
+        'MODEL': 'fake',
+        'REPLY': (
+            '{"system_message": "Offline mode, Host. Train anyway.", "missions": [{'
+            '"title": "Read 20 pages", "description": "Feed the mind.", '
+            '"mission_type": "daily", "attribute": "intelligence", "reward": "+2 Intelligence", '
+            '"difficulty": 1, "flavor_text": "Even offline, I am watching."}], "evaluation": ""}'
+        ),
+    },
+}
+AI_PROVIDER = os.environ.get('AI_PROVIDER', 'nvidia').lower()
+if AI_PROVIDER not in AI_PROVIDERS:
+    raise RuntimeError(f"AI_PROVIDER must be one of {', '.join(AI_PROVIDERS)}")
+
+# morning_brief / evening_eval replies depend only on the prompt, so each
+# process keeps recent ones (backend.ai.ResponseCache) and answers a repeat
+# brief without another model call. Hits and misses across all processes
+# are counted in the 'counters' cache: python manage.py brief_cache_stats.
+AI_RESPONSE_CACHE_TTL = int(os.environ.get('AI_RESPONSE_CACHE_TTL', '3600'))
+AI_RESPONSE_CACHE_SIZE = int(os.environ.get('AI_RESPONSE_CACHE_SIZE', '1024'))
+
+# The app's own loggers (backend.*) go to the console at LOG_LEVEL, which on
+# Render ends up in the service logs; Django's default config would drop
+# anything below WARNING. Each process logs its brief-cache hits and misses
+# there.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'INFO').upper(),
+        },
+    },
 }
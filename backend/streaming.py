@@ -0,0 +1,70 @@
+"""
+Helpers for streaming the System chat as server-sent events.
+
+The model answers with one JSON object (see _build_system_prompt), so the
+only part worth showing while it is still being generated is the
+"system_message" string. SystemMessageStream pulls that string's text out
+of the raw chunks as they arrive; everything else waits for the complete
+JSON.
+"""
+import json
+import re
+
+SYSTEM_MESSAGE_START_RE = re.compile(r'"system_message"\s*:\s*"')
+HIGH_SURROGATE_RE = re.compile(r'[dD][89abAB][0-9a-fA-F]{2}')
+
+
+class SystemMessageStream:
+    """Feed raw model output in; get back newly available system_message text."""
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = None  # start of the not-yet-returned part of the string
+        self.done = False
+
+    def _escape_length(self, i):
+        """Length of the complete escape sequence at buffer[i], or None if it's cut off"""
+        buffer = self._buffer
+        if i + 1 >= len(buffer):
+            return None
+        if buffer[i + 1] != 'u':
+            return 2
+        if i + 6 > len(buffer):
+            return None
+        if HIGH_SURROGATE_RE.fullmatch(buffer, i + 2, i + 6):
+            # Only decodable together with the low surrogate that follows it
+            return 12 if i + 12 <= len(buffer) else None
+        return 6
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        if self.done:
+            return ''
+        if self._pos is None:
+            match = SYSTEM_MESSAGE_START_RE.search(self._buffer)
+            if not match:
+                return ''
+            self._pos = match.end()
+
+        end = self._pos
+        while end < len(self._buffer):
+            char = self._buffer[end]
+            if char == '"':
+                self.done = True
+                break
+            if char == '\\':
+                length = self._escape_length(end)
+                if length is None:
+                    break
+                end += length
+            else:
+                end += 1
+
+        segment = self._buffer[self._pos:end]
+        self._pos = end + 1 if self.done else end
+        return json.loads(f'"{segment}"') if segment else ''
+
+
+def sse_event(event, data):
+    """One server-sent event with a JSON payload"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
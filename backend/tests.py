@@ -8,27 +8,108 @@ Requires SECRET_KEY and DATABASE_URL to be set (see .env.example) — the
 suite doesn't touch those tables directly, Django's test runner creates and
 tears down an isolated test database around them.
 """
+import json
+import math
 import os
-from unittest import mock
+import random
+import tempfile
+import time
+from unittest import mock, skipUnless
 
-from django.test import TestCase, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework.authtoken.models import Token
-
-from .models import User, UserAttribute, Task, Goal
-from .views import calculate_level_from_exp, get_exp_for_level, calculate_task_exp, _call_ai_provider
+from rest_framework.throttling import ScopedRateThrottle
+
+from .models import (
+    User, UserAttribute, Task, Goal, UserTaskLog, UserDailyActivity, UserTitle, SystemChatJob, SystemLog,
+    DailyJudgement, normalize_title,
+)
+from .views import (
+    brief_cache, calculate_task_exp, counter_cache, run_system_chat, weighted_sample,
+    _call_ai_provider, _persist_chat_result, _stream_ai_provider,
+)
+from .rewards import (
+    MAX_LEVEL, calculate_level_from_exp, get_exp_for_level, apply_reward, level_progress,
+    parse_reward_string, user_stats,
+)
+from .dates import day_bounds
+from .cache import DatabaseCache, LocMemCache, RedisCache, SQLiteCache, increment
+from .throttles import ScopedThrottle, SystemChatIPThrottle
+from .accounts import REGISTERED_STARTER_TASKS, STARTER_TASKS, provision_user
+from .ai import ResponseCache, get_provider, reset_providers
+from .context import UserContextSnapshot
+from .missions import MISSION_SCHEMA
+from .titles import TitleEngine, award_titles, completion_event, engine as title_engine
+from .streaming import SystemMessageStream
 
 # Throttled views (RegisterView, GuestLoginView, SystemChatView) read/write
-# the throttle cache. Tests use an in-memory cache instead of the production
-# DatabaseCache so they don't depend on `createcachetable` having been run
-# against the test database.
-TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+# the throttle cache. Tests use in-memory caches instead of the production
+# stores so they don't depend on `createcachetable`, a writable temp dir or a
+# Redis server.
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "throttle": {"BACKEND": "backend.cache.LocMemCache", "LOCATION": "throttle"},
+    "counters": {"BACKEND": "backend.cache.LocMemCache", "LOCATION": "counters"},
+}
+
+
+def _reference_exp_for_level(level):
+    """The original formula, evaluated per call."""
+    if level <= 1:
+        return 0
+    return math.floor(100 * math.pow(1.3, level - 1))
+
+
+def _reference_level_from_exp(total_exp):
+    """The original linear scan over levels."""
+    level = 1
+    while level < MAX_LEVEL and total_exp >= _reference_exp_for_level(level + 1):
+        level += 1
+    return level
 
 
 class LevelMathTests(TestCase):
     """Pure functions — no DB, no auth, fastest tests in the suite."""
 
+    def test_threshold_table_matches_formula(self):
+        for level in range(-1, MAX_LEVEL + 3):
+            self.assertEqual(get_exp_for_level(level), _reference_exp_for_level(level), level)
+
+    def test_level_lookup_matches_linear_scan_at_every_threshold(self):
+        for level in range(1, MAX_LEVEL + 2):
+            threshold = _reference_exp_for_level(level)
+            for exp in (threshold - 1, threshold, threshold + 1):
+                self.assertEqual(calculate_level_from_exp(exp), _reference_level_from_exp(exp), exp)
+
+    def test_level_lookup_matches_linear_scan_for_random_exp(self):
+        rng = random.Random(8)
+        top = _reference_exp_for_level(MAX_LEVEL + 1)
+        for _ in range(2000):
+            exp = rng.randint(-1000, top)
+            self.assertEqual(calculate_level_from_exp(exp), _reference_level_from_exp(exp), exp)
+
+    def test_level_progress_block(self):
+        user = User(level=3, exp=get_exp_for_level(3) + 10)
+        progress = level_progress(user)
+        self.assertEqual(progress["current_level_exp"], get_exp_for_level(3))
+        self.assertEqual(progress["next_level_exp"], get_exp_for_level(4))
+        self.assertEqual(progress["exp_progress"], 10)
+        self.assertEqual(progress["exp_needed"], get_exp_for_level(4) - get_exp_for_level(3))
+        self.assertEqual(progress["progress_percentage"], int(10 / progress["exp_needed"] * 100))
+
+    def test_user_stats_block_at_max_level(self):
+        user = User(level=MAX_LEVEL, exp=get_exp_for_level(MAX_LEVEL))
+        stats = user_stats(user, old_level=MAX_LEVEL - 1)
+        self.assertTrue(stats["level_up"])
+        self.assertEqual(stats["old_level"], MAX_LEVEL - 1)
+        self.assertEqual(stats["next_level_exp"], _reference_exp_for_level(MAX_LEVEL + 1))
+        self.assertEqual(stats["progress_percentage"], 0)
+
     def test_level_1_requires_zero_exp(self):
         self.assertEqual(get_exp_for_level(1), 0)
 
@@ -53,6 +134,349 @@ class LevelMathTests(TestCase):
         self.assertGreater(calculate_task_exp(time_limited), calculate_task_exp(normal))
 
 
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "throttle.sqlite3")
+        self.cache = SQLiteCache(self.path, {})
+
+    def test_set_get_delete_round_trip(self):
+        self.cache.set("history", [3.0, 2.0, 1.0], 60)
+        self.assertEqual(self.cache.get("history"), [3.0, 2.0, 1.0])
+        self.assertTrue(self.cache.delete("history"))
+        self.assertIsNone(self.cache.get("history"))
+
+    def test_expired_keys_are_invisible(self):
+        self.cache.set("gone", 1, 0)
+        self.assertIsNone(self.cache.get("gone"))
+        self.assertFalse(self.cache.has_key("gone"))
+        self.assertTrue(self.cache.add("gone", 2, 60))
+        self.assertEqual(self.cache.get("gone"), 2)
+
+    def test_add_does_not_overwrite_live_key(self):
+        self.assertTrue(self.cache.add("key", "first", 60))
+        self.assertFalse(self.cache.add("key", "second", 60))
+        self.assertEqual(self.cache.get("key"), "first")
+
+    def test_compare_and_set_only_swaps_expected_value(self):
+        self.assertTrue(self.cache.compare_and_set("tat", None, 1.5, 60))
+        self.assertFalse(self.cache.compare_and_set("tat", None, 2.5, 60))
+        self.assertFalse(self.cache.compare_and_set("tat", 9.0, 2.5, 60))
+        self.assertTrue(self.cache.compare_and_set("tat", 1.5, 2.5, 60))
+        self.assertEqual(self.cache.get("tat"), 2.5)
+
+    def test_increment_adds_up_across_instances(self):
+        self.assertEqual(increment(self.cache, "hits"), 1)
+        self.assertEqual(increment(SQLiteCache(self.path, {}), "hits", 2), 3)
+        self.assertEqual(self.cache.get("hits"), 3)
+
+    def test_separate_instances_share_the_file(self):
+        # Two instances stand in for two gunicorn workers on one host.
+        self.cache.set("shared", "value", 60)
+        self.assertEqual(SQLiteCache(self.path, {}).get("shared"), "value")
+
+
+class CompareAndSetTests(TestCase):
+    """The other throttle stores implement the same compare_and_set contract."""
+
+    def check(self, cache):
+        self.assertTrue(cache.compare_and_set("tat", None, 1.5, 60))
+        self.assertFalse(cache.compare_and_set("tat", None, 2.5, 60))
+        self.assertFalse(cache.compare_and_set("tat", 9.0, 2.5, 60))
+        self.assertTrue(cache.compare_and_set("tat", 1.5, 2.5, 60))
+        self.assertEqual(cache.get("tat"), 2.5)
+
+    def test_locmem(self):
+        self.check(LocMemCache("cas-test", {}))
+
+    def test_database(self):
+        from django.core.management import call_command
+
+        call_command("createcachetable", "cas_test_cache", verbosity=0)
+        self.check(DatabaseCache("cas_test_cache", {}))
+
+    @skipUnless(os.environ.get("REDIS_URL"), "needs a Redis server at REDIS_URL")
+    def test_redis(self):
+        cache = RedisCache(os.environ["REDIS_URL"], {"KEY_PREFIX": f"cas-test-{time.time_ns()}"})
+        self.addCleanup(cache.clear)
+        self.check(cache)
+
+        # A missing key only matches expected=None
+        self.assertFalse(cache.compare_and_set("missing", 1.5, 2.5, 60))
+        self.assertIsNone(cache.get("missing"))
+
+        client = cache._cache.get_client()
+        self.assertTrue(cache.compare_and_set("tat", 2.5, 3.5, 60))
+        self.assertTrue(50 < client.ttl(cache.make_key("tat")) <= 60)
+        self.assertTrue(cache.compare_and_set("tat", 3.5, 4.5, None))
+        self.assertEqual(client.ttl(cache.make_key("tat")), -1)
+        self.assertTrue(cache.compare_and_set("tat", 4.5, 5.5, 0))
+        self.assertEqual(client.ttl(cache.make_key("tat")), 1)
+
+
+class _ThrottleView:
+    def __init__(self, scope):
+        self.throttle_scope = scope
+
+
+class GCRAThrottleTests(TestCase):
+    """Property checks for the GCRA throttles, on a fake clock."""
+
+    def setUp(self):
+        self.cache = LocMemCache(f"gcra-{self.id()}", {})
+        self.addCleanup(self.cache.clear)
+        self.factory = APIRequestFactory()
+        self.now = 1_000_000.0
+
+    def request(self, ip="10.0.0.1", user=None):
+        from django.contrib.auth.models import AnonymousUser
+
+        request = self.factory.get("/", REMOTE_ADDR=ip)
+        request.user = user or AnonymousUser()
+        return request
+
+    def throttle(self, rate, base=ScopedThrottle):
+        throttle = type("Throttle", (base,), {"cache": self.cache, "THROTTLE_RATES": {"s": rate}})()
+        throttle.timer = lambda: self.now
+        return throttle
+
+    def allowed(self, rate, request=None, base=ScopedThrottle):
+        return self.throttle(rate, base).allow_request(request or self.request(), _ThrottleView("s"))
+
+    def test_burst_from_idle_matches_drf(self):
+        rng = random.Random(12)
+        for _ in range(25):
+            rate = f"{rng.randint(1, 40)}/{rng.choice('smhd')}"
+            self.cache.clear()
+            gcra = sum(self.allowed(rate) for _ in range(50))
+            self.cache.clear()
+            drf = sum(self.allowed(rate, base=ScopedRateThrottle) for _ in range(50))
+            self.assertEqual(gcra, drf, rate)
+
+    def test_never_exceeds_burst_plus_refill(self):
+        rng = random.Random(3)
+        for _ in range(10):
+            num, duration = rng.randint(1, 20), rng.choice((1, 60, 3600))
+            rate = f"{num}/{dict([(1, 's'), (60, 'm'), (3600, 'h')])[duration]}"
+            interval = duration / num
+            self.cache.clear()
+            start = self.now
+            admitted = []
+            for _ in range(300):
+                self.now += rng.expovariate(1 / interval) / 3
+                if self.allowed(rate):
+                    admitted.append(self.now)
+            for i, t in enumerate(admitted):
+                # Requests admitted in [t, t + span] never outnumber one burst
+                # plus what refills during the span.
+                for j in range(i, len(admitted)):
+                    span = admitted[j] - t
+                    self.assertLessEqual(j - i + 1, num + span / interval + 1e-9, (rate, start))
+
+    def test_requests_at_the_sustained_rate_are_never_throttled(self):
+        for _ in range(3):
+            self.assertTrue(self.allowed("3/m"))
+        for _ in range(20):
+            self.now += 20
+            self.assertTrue(self.allowed("3/m"))
+
+    def test_wait_is_exact(self):
+        for _ in range(4):
+            self.assertTrue(self.allowed("4/m"))
+        throttle = self.throttle("4/m")
+        self.assertFalse(throttle.allow_request(self.request(), _ThrottleView("s")))
+        self.assertAlmostEqual(throttle.wait(), 15)
+        self.now += throttle.wait() - 0.001
+        self.assertFalse(self.allowed("4/m"))
+        self.now += 0.001
+        self.assertTrue(self.allowed("4/m"))
+
+    def test_keys_are_independent_per_ip_and_user(self):
+        self.assertTrue(self.allowed("1/h", self.request(ip="10.0.0.1")))
+        self.assertFalse(self.allowed("1/h", self.request(ip="10.0.0.1")))
+        self.assertTrue(self.allowed("1/h", self.request(ip="10.0.0.2")))
+        user = User.objects.create_user(username="throttled", password="pw12345")
+        self.assertTrue(self.allowed("1/h", self.request(ip="10.0.0.1", user=user)))
+
+    def test_lost_compare_and_set_is_retried_not_double_counted(self):
+        self.assertTrue(self.allowed("2/h"))
+        real_cas = self.cache.compare_and_set
+
+        def racing_cas(key, expected, value, timeout):
+            # Another worker admits a request between our read and our write.
+            self.cache.compare_and_set = real_cas
+            self.assertTrue(self.allowed("2/h"))
+            return real_cas(key, expected, value, timeout)
+
+        self.cache.compare_and_set = racing_cas
+        self.assertFalse(self.allowed("2/h"))
+
+    def test_ported_throttles_enforce_configured_rates(self):
+        from rest_framework.settings import api_settings
+
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        for base, scope in ((ScopedThrottle, "system_chat"), (ScopedThrottle, "account_create"),
+                            (SystemChatIPThrottle, None)):
+            num = int(rates[scope or SystemChatIPThrottle.scope].split("/")[0])
+            throttle_class = type("Throttle", (base,), {"cache": self.cache})
+            self.cache.clear()
+            results = []
+            for _ in range(num + 1):
+                throttle = throttle_class()
+                throttle.timer = lambda: self.now
+                results.append(throttle.allow_request(self.request(), _ThrottleView(scope)))
+            self.assertEqual(results, [True] * num + [False], scope)
+
+
+class WeightedSampleTests(TestCase):
+    """weighted_sample() picks the daily task board — pure, seedable."""
+
+    def test_same_seed_gives_same_selection(self):
+        pool = list(range(50))
+        weights = [1 + i % 3 for i in pool]
+        first = weighted_sample(pool, weights, 5, rng=random.Random(42))
+        second = weighted_sample(pool, weights, 5, rng=random.Random(42))
+        self.assertEqual(first, second)
+
+    def test_picks_are_distinct_and_capped_at_pool_size(self):
+        picked = weighted_sample(["a", "b", "c"], [1, 1, 1], 10, rng=random.Random(0))
+        self.assertEqual(sorted(picked), ["a", "b", "c"])
+        self.assertEqual(weighted_sample(["a"], [1], 0), [])
+
+    def test_zero_weight_items_are_never_picked(self):
+        picked = weighted_sample(["a", "b", "c"], [0, 1, 1], 3, rng=random.Random(0))
+        self.assertNotIn("a", picked)
+
+    def test_heavier_items_are_picked_proportionally_more_often(self):
+        rng = random.Random(7)
+        hits = sum(weighted_sample(["heavy", "light"], [3, 1], 1, rng=rng) == ["heavy"] for _ in range(4000))
+        # Expected 3/4 of draws.
+        self.assertAlmostEqual(hits / 4000, 0.75, delta=0.03)
+
+
+class DayBoundsTests(TestCase):
+    """day_bounds() replaces `__date` lookups so Postgres can use the
+    UserTaskLog timestamp indexes — it must cover exactly the same rows."""
+
+    def test_single_day_is_half_open(self):
+        from datetime import date, datetime, timezone as dt_timezone
+
+        lo, hi = day_bounds(date(2026, 3, 1))
+        self.assertEqual(lo, datetime(2026, 3, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(hi, datetime(2026, 3, 2, tzinfo=dt_timezone.utc))
+
+    def test_end_day_is_inclusive(self):
+        from datetime import date, timedelta
+
+        lo, hi = day_bounds(date(2026, 3, 2), date(2026, 3, 8))
+        self.assertEqual(hi - lo, timedelta(days=7))
+
+
+class RewardLedgerTests(TestCase):
+    """apply_reward() is the only writer of EXP, level and attributes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ledger", password="pw12345")
+        UserAttribute.objects.create(user=self.user, name="stress", value=95)
+        UserAttribute.objects.create(user=self.user, name="discipline", value=2)
+
+    def test_parse_reward_string(self):
+        self.assertEqual(
+            parse_reward_string("+3 Intelligence, +2 Discipline, -1 Stress, +1 Discipline, +4 Charisma"),
+            {"intelligence": 3, "discipline": 3, "stress": -1},
+        )
+        self.assertEqual(parse_reward_string(""), {})
+
+    def test_exp_and_level_are_updated_together(self):
+        apply_reward(self.user, exp=get_exp_for_level(4) + 1)
+        self.assertEqual(self.user.level, 4)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.exp, get_exp_for_level(4) + 1)
+        self.assertEqual(self.user.level, calculate_level_from_exp(self.user.exp))
+
+    def test_exp_is_floored_at_zero(self):
+        apply_reward(self.user, exp=-50)
+        self.assertEqual((self.user.exp, self.user.level), (0, 1))
+
+    def test_attributes_are_clamped_and_missing_rows_created(self):
+        apply_reward(self.user, attribute_deltas={"stress": 10, "discipline": -5, "social": 4})
+        values = dict(UserAttribute.objects.filter(user=self.user).values_list("name", "value"))
+        self.assertEqual(values, {"stress": 100, "discipline": 0, "social": 4})
+
+    def test_attribute_deltas_are_a_single_update_once_rows_exist(self):
+        with CaptureQueriesContext(connection) as ctx:
+            apply_reward(self.user, attribute_deltas={"stress": -5, "discipline": 1})
+        statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("UPDATE"))
+
+
+class ConcurrentCompletionTests(TransactionTestCase):
+    """Parallel completions (e.g. two open tabs) must not lose EXP updates."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.user = User.objects.create_user(username="racer", password="pw12345")
+        UserAttribute.objects.create(user=self.user, name="energy", value=0)
+        self.tasks = [
+            Task.objects.create(
+                user=self.user, title=f"Sprint {i}", description="", attribute="energy",
+                difficulty=1, reward_point=2, deadline=timezone.now() + timedelta(days=1),
+            )
+            for i in range(8)
+        ]
+
+    def _assert_all_counted(self):
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.exp, 15 * len(self.tasks))
+        self.assertEqual(UserAttribute.objects.get(user=self.user, name="energy").value, len(self.tasks))
+
+    def test_completions_from_stale_sessions_all_count(self):
+        # Every "tab" loaded the user row before any completion landed — the
+        # interleaving that made read-modify-save lose all but one update.
+        clients = []
+        for _ in self.tasks:
+            client = APIClient()
+            client.force_authenticate(User.objects.get(pk=self.user.pk))
+            clients.append(client)
+        for client, task in zip(clients, self.tasks):
+            response = client.post(reverse("task-complete"), {"task_id": task.id}, format="json")
+            self.assertEqual(response.status_code, 200)
+        self._assert_all_counted()
+
+    # On sqlite the settings give tests a file database whose writers wait
+    # for each other, so this runs there as well as on Postgres.
+    def test_parallel_completions_all_count(self):
+        import threading
+
+        user, tasks = self.user, self.tasks
+        barrier = threading.Barrier(len(tasks))
+        statuses = []
+
+        def complete(task):
+            try:
+                client = APIClient()
+                # Each "tab" holds its own stale copy of the user row.
+                client.force_authenticate(User.objects.get(pk=user.pk))
+                barrier.wait()
+                response = client.post(reverse("task-complete"), {"task_id": task.id}, format="json")
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=complete, args=(t,)) for t in tasks]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(statuses, [200] * len(tasks))
+        self._assert_all_counted()
+
+
 class UserAttributeClampingTests(TestCase):
     """UserAttribute.save() clamps values into a valid range — see models.py."""
 
@@ -71,6 +495,37 @@ class UserAttributeClampingTests(TestCase):
         self.assertEqual(over.value, 1000)
 
 
+class ProvisionUserTests(TestCase):
+    def test_creates_attributes_goal_and_starter_tasks(self):
+        user = provision_user("fresh")
+        self.assertEqual(
+            sorted(UserAttribute.objects.filter(user=user).values_list("name", flat=True)),
+            sorted(name for name, _ in UserAttribute.ATTRIBUTE_CHOICES),
+        )
+        self.assertEqual(Goal.objects.get(user=user).title, "Getting Started")
+        self.assertEqual(
+            set(Task.objects.filter(user=user, is_hidden_from_daily=False).values_list("title", flat=True)),
+            {task["title"] for task in STARTER_TASKS},
+        )
+        self.assertFalse(user.has_usable_password())
+
+    def test_insert_count_does_not_depend_on_template_size(self):
+        for i, tasks in enumerate((STARTER_TASKS[:1], REGISTERED_STARTER_TASKS)):
+            with CaptureQueriesContext(connection) as ctx:
+                provision_user(f"sized{i}", password="pw12345", tasks=tasks)
+            statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+            # user, attributes, goal, tasks
+            self.assertEqual(len(statements), 4, statements)
+
+    def test_duplicate_username_leaves_nothing_behind(self):
+        from django.db import IntegrityError
+
+        provision_user("taken")
+        with self.assertRaises(IntegrityError):
+            provision_user("taken")
+        self.assertEqual(Task.objects.filter(user__username="taken").count(), len(STARTER_TASKS))
+
+
 @override_settings(CACHES=TEST_CACHES)
 class RegisterViewTests(TestCase):
     def setUp(self):
@@ -87,6 +542,8 @@ class RegisterViewTests(TestCase):
         self.assertIn("token", response.data)
         self.assertTrue(User.objects.filter(username="newplayer").exists())
         self.assertTrue(Goal.objects.filter(user__username="newplayer", title="Get fit").exists())
+        self.assertEqual(Task.objects.filter(user__username="newplayer").count(), len(REGISTERED_STARTER_TASKS))
+        self.assertTrue(User.objects.get(username="newplayer").check_password("strongpass123"))
 
     def test_register_requires_goal_title(self):
         response = self.client.post(self.url, {
@@ -154,6 +611,18 @@ class GuestLoginViewTests(TestCase):
         response = self.client.post(self.url, {"guest_id": "not-a-valid-id!"}, format="json")
         self.assertEqual(response.status_code, 400)
 
+    def test_account_creation_is_throttled_through_the_throttle_cache(self):
+        from django.core.cache import caches
+
+        self.addCleanup(caches["throttle"].clear)
+        for i in range(10):
+            response = self.client.post(self.url, {"guest_id": f"guest_t{i}"}, format="json")
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post(self.url, {"guest_id": "guest_t10"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIsNotNone(caches["throttle"].get("throttle_gcra_account_create_127.0.0.1"))
+        self.assertIsNone(caches["default"].get("throttle_gcra_account_create_127.0.0.1"))
+
     def test_repeat_login_reuses_same_account(self):
         first = self.client.post(self.url, {"guest_id": "guest_repeat1"}, format="json")
         second = self.client.post(self.url, {"guest_id": "guest_repeat1"}, format="json")
@@ -308,6 +777,86 @@ class TaskListViewTests(TestCase):
         self.assertEqual(task_data["reward_point"], 5)
         self.assertEqual(task_data["reward"], "+2 Discipline")
 
+    def test_time_limited_and_corrupted_tasks_are_flagged_and_hidden(self):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        deadline = timezone.now() + timedelta(days=1)
+        hidden = [
+            Task.objects.create(user=self.user, title="Press Ctrl+S", description="", attribute="discipline", deadline=deadline),
+            Task.objects.create(user=self.user, title="42", description="", attribute="discipline", deadline=deadline),
+            Task.objects.create(user=self.user, title="Stretch - 16:13:13", description="", attribute="energy", deadline=deadline),
+            Task.objects.create(
+                user=self.user, title="Quick win", description="Time-limited task completed at 09:00",
+                attribute="energy", deadline=deadline,
+            ),
+        ]
+        visible = Task.objects.create(user=self.user, title="Stretch", description="", attribute="energy", deadline=deadline)
+
+        self.assertTrue(all(t.is_hidden_from_daily for t in hidden))
+        self.assertFalse(visible.is_hidden_from_daily)
+        response = self.client.get(self.url)
+        self.assertEqual([t["title"] for t in response.data], ["Stretch"])
+
+    def _make_tasks(self, n):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        return [
+            Task.objects.create(
+                user=self.user, title=f"Task {i}", description="", attribute="discipline",
+                deadline=timezone.now() + timedelta(days=1),
+            )
+            for i in range(n)
+        ]
+
+    def test_board_is_stable_for_the_day(self):
+        self._make_tasks(20)
+        first = [t["id"] for t in self.client.get(self.url).data]
+        for _ in range(5):
+            self.assertEqual([t["id"] for t in self.client.get(self.url).data], first)
+
+    def test_repeat_fetch_is_two_queries(self):
+        self._make_tasks(20)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.get(self.url)
+        # Selection row + the selected tasks with their completed-today flag.
+        with self.assertNumQueries(2):
+            client.get(self.url)
+
+    def test_cached_board_reflects_completions(self):
+        tasks = self._make_tasks(3)
+        self.client.get(self.url)
+        self.client.post(reverse("task-complete"), {"task_id": tasks[0].id}, format="json")
+        board = {t["id"]: t["completed"] for t in self.client.get(self.url).data}
+        self.assertTrue(board[tasks[0].id])
+
+    def test_task_writes_invalidate_the_board(self):
+        from .models import DailySelection
+
+        tasks = self._make_tasks(3)
+        self.client.get(self.url)
+        self.client.post(self.url, {"title": "Brand new"}, format="json")
+        self.assertFalse(DailySelection.objects.filter(user=self.user).exists())
+
+        self.client.get(self.url)
+        self.client.delete(reverse("task-detail", args=[tasks[0].id]))
+        self.assertNotIn(tasks[0].id, [t["id"] for t in self.client.get(self.url).data])
+
+    def test_renaming_a_task_reclassifies_it(self):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        task = Task.objects.create(
+            user=self.user, title="7", description="", attribute="discipline",
+            deadline=timezone.now() + timedelta(days=1),
+        )
+        self.assertTrue(task.is_hidden_from_daily)
+        self.client.put(reverse("task-detail", args=[task.id]), {"title": "Seven push-ups"}, format="json")
+        task.refresh_from_db()
+        self.assertFalse(task.is_hidden_from_daily)
+
 
 class TaskCreateValidationTests(TestCase):
     def setUp(self):
@@ -427,6 +976,37 @@ class TaskDeleteTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertFalse(Task.objects.filter(id=self.task.id).exists())
 
+    def test_deleting_a_completed_task_takes_it_out_of_the_rollup(self):
+        from datetime import date
+
+        self.client.post(reverse("task-complete"), {"task_id": self.task.id}, format="json")
+        self.assertEqual(self.client.get(reverse("weekly-stats")).data["total_completed_this_week"], 1)
+
+        self.client.delete(self.url)
+        activity = UserDailyActivity.objects.get(user=self.user, date=date.today())
+        self.assertEqual((activity.assigned, activity.completed, activity.exp_gained), (0, 0, 0))
+        self.assertEqual(self.client.get(reverse("user-stats")).data["total_completed_tasks"], 0)
+        self.assertEqual(self.client.get(reverse("weekly-stats")).data["total_completed_this_week"], 0)
+        self.assertEqual(self.client.get(reverse("user-progress")).data["completed"], 0)
+
+    def test_delete_after_a_difficulty_change_leaves_other_completions(self):
+        from datetime import date
+
+        other = Task.objects.create(
+            user=self.user, title="Survivor", description="", attribute="energy",
+            difficulty=2, deadline=self.task.deadline,
+        )
+        self.client.post(reverse("task-complete"), {"task_id": self.task.id}, format="json")
+        self.client.post(reverse("task-complete"), {"task_id": other.id}, format="json")
+        # Worth more now than when it was completed
+        Task.objects.filter(pk=self.task.pk).update(difficulty=3)
+
+        self.client.delete(self.url)
+        activity = UserDailyActivity.objects.get(user=self.user, date=date.today())
+        self.assertEqual(
+            (activity.assigned, activity.completed, activity.exp_gained), (1, 1, calculate_task_exp(other))
+        )
+
     def test_cannot_delete_another_users_task(self):
         other = User.objects.create_user(username="victim", password="pw12345")
         other_task = Task.objects.create(
@@ -456,6 +1036,69 @@ class TaskDeleteTests(TestCase):
         self.assertFalse(UserTaskLog.objects.filter(pk=log.pk).exists())
 
 
+class CompletedTasksHistoryViewTests(TestCase):
+    def setUp(self):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        self.user = User.objects.create_user(username="historian", password="pw12345")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        task = Task.objects.create(
+            user=self.user, title="Stretch - 07:15:02", description="", attribute="energy",
+            difficulty=1, reward_point=3, deadline=now + timedelta(days=1),
+        )
+        # Pairs of logs share a completed_at, so pages must split ties by id
+        UserTaskLog.objects.bulk_create(
+            UserTaskLog(user=self.user, task=task, status="completed", completed_at=now - timedelta(minutes=i // 2))
+            for i in range(7)
+        )
+        self.url = reverse("completed-tasks-history")
+
+    def test_cursor_pages_cover_history_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            with self.assertNumQueries(1):
+                data = self.client.get(self.url, params).data
+            seen.extend(data["completed_tasks"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 7)
+        self.assertEqual({entry["title"] for entry in seen}, {"Stretch"})
+
+    def test_limit_is_capped(self):
+        from .views import CompletedTasksHistoryView
+
+        with mock.patch.object(CompletedTasksHistoryView, "MAX_PAGE_SIZE", 2):
+            data = self.client.get(self.url, {"limit": 10000}).data
+        self.assertEqual(data["total_count"], 2)
+        self.assertIsNotNone(data["next_cursor"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "nope"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"limit": "many"}).status_code, 400)
+
+    def test_export_must_be_truthy(self):
+        for value in ("0", "false", ""):
+            response = self.client.get(self.url, {"export": value})
+            self.assertFalse(response.streaming, value)
+            self.assertEqual(len(response.data["completed_tasks"]), 7)
+
+    async def test_export_streams_every_entry(self):
+        token = await Token.objects.acreate(user=self.user)
+        response = await AsyncClient().get(
+            self.url, {"export": 1}, headers={"Authorization": f"Token {token.key}"}
+        )
+        # Async, so ASGI sends it as it's generated rather than buffering it
+        self.assertTrue(response.is_async)
+        entries = json.loads(b"".join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(len(entries), 7)
+        self.assertEqual(entries[0]["title"], "Stretch")
+
+
 class TaskEditTests(TestCase):
     def setUp(self):
         from django.utils import timezone
@@ -646,22 +1289,477 @@ class TaskCompleteViewTests(TestCase):
         response = self.client.post(self.url, {"task_id": 999999}, format="json")
         self.assertEqual(response.status_code, 404)
 
+    def test_completion_after_days_away_awards_comeback_title(self):
+        from datetime import date, timedelta
+
+        User.objects.filter(pk=self.user.pk).update(last_activity_date=date.today() - timedelta(days=5))
+        response = self.client.post(self.url, {"task_id": self.task.id}, format="json")
+        self.assertIn("comeback_king", response.data["titles_awarded"])
+        title = UserTitle.objects.get(user=self.user, title_key="comeback_king")
+        self.assertTrue(title.is_active)
+
+    def test_attribute_change_awards_threshold_title(self):
+        UserAttribute.objects.filter(user=self.user, name="wellness").update(value=0)
+        UserAttribute.objects.filter(user=self.user, name="intelligence").update(value=195)
+        self.task.attribute = "intelligence"
+        self.task.save()
+        response = self.client.post(self.url, {"task_id": self.task.id}, format="json")
+        self.assertIn("consistent_scholar", response.data["titles_awarded"])
+
+        # Already earned: not awarded again
+        self.client.post(self.url, {"task_id": self.task.id}, format="json")
+        response = self.client.post(self.url, {"task_id": self.task.id}, format="json")
+        self.assertEqual(response.data["titles_awarded"], [])
+        self.assertEqual(UserTitle.objects.filter(user=self.user, title_key="consistent_scholar").count(), 1)
+
+
+class DynamicTaskUncompleteViewTests(TestCase):
+    def setUp(self):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        self.user = provision_user("uncompleter")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.deadline = timezone.now() + timedelta(days=1)
+        self.task = Task.objects.create(
+            user=self.user, title="🎸 Guitar practice", description="", attribute="wellness",
+            difficulty=1, reward_point=10, deadline=self.deadline,
+        )
+        self.url = reverse("dynamic-task-uncomplete")
+
+    def complete(self, title="🎸 Guitar practice"):
+        self.client.post(reverse("dynamic-task-complete"), {
+            "task_title": title, "task_type": "daily", "reward_string": "+10 Wellness",
+        }, format="json")
+
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title("🧘‍♀️ Meditation - 07:15:02"), "meditation")
+        self.assertEqual(normalize_title("  Read   20 pages! "), "read 20 pages")
+        self.assertEqual(normalize_title("🔥"), "")
+
+    def test_title_edits_keep_normalized_title_in_step(self):
+        self.task.title = "Evening Walk"
+        self.task.save(update_fields=["title"])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.normalized_title, "evening walk")
+
+    def test_uncomplete_by_task_id(self):
+        self.complete()
+        response = self.client.post(self.url, {
+            "task_id": self.task.id, "reward_string": "+10 Wellness",
+        }, format="json")
+        self.assertTrue(response.data["success"])
+        self.assertFalse(UserTaskLog.objects.filter(task=self.task).exists())
+        self.assertEqual(UserAttribute.objects.get(user=self.user, name="wellness").value, 0)
+
+    def test_title_fallback_resolves_in_one_query(self):
+        from .views import resolve_task_by_title
+
+        Task.objects.create(
+            user=self.user, title="Guitar practice", description="", attribute="wellness",
+            difficulty=1, reward_point=10, deadline=self.deadline,
+        )
+        with self.assertNumQueries(1):
+            task = resolve_task_by_title(self.user, "🎸 Guitar practice - 07:15:02")
+        self.assertEqual(task.normalized_title, "guitar practice")
+        # An exact title match wins over other tasks that normalize the same
+        self.assertEqual(resolve_task_by_title(self.user, "🎸 Guitar practice"), self.task)
+
+    def test_uncomplete_by_title_strips_emoji(self):
+        self.complete()
+        response = self.client.post(self.url, {"task_title": "Guitar Practice"}, format="json")
+        self.assertTrue(response.data["success"])
+
+    def test_other_users_task_id_is_not_found(self):
+        other = provision_user("bystander")
+        task = Task.objects.filter(user=other).first()
+        response = self.client.post(self.url, {"task_id": task.id}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_task_id(self):
+        response = self.client.post(self.url, {"task_id": "abc"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class TitleEngineTests(TestCase):
+    def test_only_rules_for_the_emitted_events_apply(self):
+        events = [("completion", {"completed_today": 5, "local_hour": 12})]
+        self.assertEqual(title_engine.evaluate(events, earned=set()), ["overachiever"])
+        self.assertEqual(title_engine.evaluate(events, earned={"overachiever"}), [])
+
+    def test_missing_facts_are_not_matched(self):
+        # A chat restates today's count but has no completion time
+        events = [("completion", {"completed_today": 0})]
+        self.assertEqual(title_engine.evaluate(events, earned=set()), [])
+
+    def test_early_completion_event(self):
+        from datetime import datetime
+        from django.utils import timezone
+
+        completed_at = timezone.make_aware(datetime(2026, 3, 1, 6, 30))
+        events = [completion_event(completed_at, completed_today=1)]
+        self.assertEqual(title_engine.evaluate(events, earned=set()), ["early_bird"])
+
+    def test_custom_rules_are_data(self):
+        engine = TitleEngine(rules=[("iron_will", "streak", "current_streak", ">=", 3)])
+        self.assertEqual(engine.evaluate([("streak", {"current_streak": 3})], earned=set()), ["iron_will"])
+        self.assertEqual(engine.watched_facts("streak"), {"current_streak"})
+
+    def test_award_titles_inserts_batch_and_activates_last(self):
+        user = User.objects.create_user(username="titled", password="pw12345")
+        UserTitle.objects.create(user=user, title_key="iron_will", is_active=True)
+        with self.assertNumQueries(3):
+            awarded = award_titles(user, [
+                ("system_chat", {"first_contact": True}),
+                ("completion", {"completed_today": 6, "local_hour": 5}),
+                None,
+            ])
+        self.assertEqual(awarded, ["first_system_contact", "overachiever", "early_bird"])
+        active = UserTitle.objects.filter(user=user, is_active=True).values_list("title_key", flat=True)
+        self.assertEqual(list(active), ["early_bird"])
+
+class UserDailyActivityTests(TestCase):
+    """The rollup must stay in step with UserTaskLog through the completion
+    views, and the backfill command must rebuild it from the logs alone."""
+
+    def setUp(self):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        self.user = User.objects.create_user(username="rollup", password="pw12345")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(
+            user=self.user, title="Read", description="", attribute="intelligence",
+            difficulty=2, reward_point=4, deadline=timezone.now() + timedelta(days=1),
+        )
+
+    def _today(self):
+        from datetime import date
+        return UserDailyActivity.objects.get(user=self.user, date=date.today())
+
+    def test_task_complete_toggle_updates_rollup(self):
+        url = reverse("task-complete")
+        self.client.post(url, {"task_id": self.task.id}, format="json")
+        row = self._today()
+        self.assertEqual((row.assigned, row.completed, row.exp_gained), (1, 1, 20))
+
+        self.client.post(url, {"task_id": self.task.id}, format="json")
+        row = self._today()
+        self.assertEqual((row.assigned, row.completed, row.exp_gained), (0, 0, 0))
+
+    def test_task_can_be_completed_again_on_a_later_day(self):
+        from datetime import timedelta
+
+        url = reverse("task-complete")
+        self.client.post(url, {"task_id": self.task.id}, format="json")
+        UserTaskLog.objects.filter(user=self.user).update(
+            assigned_at=self.task.created_at - timedelta(days=1),
+            completed_at=self.task.created_at - timedelta(days=1),
+        )
+        response = self.client.post(url, {"task_id": self.task.id}, format="json")
+        self.assertTrue(response.data["task_completed"])
+        self.assertEqual(UserTaskLog.objects.filter(user=self.user).count(), 2)
+
+    def test_dynamic_complete_and_uncomplete_update_rollup(self):
+        self.client.post(reverse("dynamic-task-complete"), {
+            "task_title": "Read", "task_type": "daily",
+        }, format="json")
+        self.assertEqual(self._today().completed, 1)
+
+        self.client.post(reverse("dynamic-task-uncomplete"), {"task_title": "Read"}, format="json")
+        self.assertEqual(self._today().completed, 0)
+
+    def test_backfill_rebuilds_rollup_from_logs(self):
+        from django.core.management import call_command
+
+        self.client.post(reverse("task-complete"), {"task_id": self.task.id}, format="json")
+        expected = self._today()
+        UserDailyActivity.objects.all().delete()
+
+        call_command("backfill_daily_activity", stdout=open(os.devnull, "w"))
+        row = self._today()
+        self.assertEqual(
+            (row.assigned, row.completed, row.missed, row.exp_gained),
+            (expected.assigned, expected.completed, expected.missed, expected.exp_gained),
+        )
+
+
+class WeeklyStatsViewTests(TestCase):
+    def setUp(self):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        self.user = User.objects.create_user(username="weekly", password="pw12345")
+        self.client = APIClient()
+        # force_authenticate skips the token lookup, so the query count
+        # below measures only the view itself.
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(
+            user=self.user, title="Stretch", description="", attribute="wellness",
+            deadline=timezone.now() + timedelta(days=1),
+        )
+        self.url = reverse("weekly-stats")
+
+    def _complete_on(self, day):
+        # The view reads the daily rollup, which the completion views
+        # maintain alongside each UserTaskLog.
+        UserDailyActivity.record(self.user, day, assigned=1, completed=1, exp_gained=15)
+
+    def test_daily_breakdown_and_total_come_from_the_same_counts(self):
+        from datetime import date, timedelta
+
+        monday = date.today() - timedelta(days=date.today().weekday())
+        self._complete_on(monday)
+        self._complete_on(monday)
+        self._complete_on(monday + timedelta(days=6))
+        # Previous Sunday — outside the week.
+        self._complete_on(monday - timedelta(days=1))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        counts = [d["completed_tasks"] for d in response.data["daily_breakdown"]]
+        self.assertEqual(counts, [2, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(response.data["total_completed_this_week"], 3)
+
+    def test_endpoint_runs_at_most_two_queries(self):
+        from datetime import date
+
+        self._complete_on(date.today())
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+
+class ProgressStatsViewTests(TestCase):
+    def setUp(self):
+        from datetime import date
+
+        self.user = User.objects.create_user(username="progress", password="pw12345")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("user-progress")
+        # Monday 2026-01-05 .. Sunday 2026-01-18, plus 2026-02-02
+        for day, assigned, completed, missed in [
+            (date(2026, 1, 5), 4, 2, 1),
+            (date(2026, 1, 7), 2, 2, 0),
+            (date(2026, 1, 18), 3, 0, 3),
+            (date(2026, 2, 2), 5, 5, 0),
+        ]:
+            UserDailyActivity.objects.create(
+                user=self.user, date=day, assigned=assigned, completed=completed, missed=missed,
+            )
+
+    def test_custom_period_totals(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, {"start": "2026-01-05", "end": "2026-01-31"}).data
+        self.assertEqual(data["range"], "custom")
+        self.assertEqual((data["assigned"], data["completed"]), (9, 4))
+        self.assertEqual(data["details"], {"pending": 1, "missed": 4})
+        self.assertEqual(data["completion_rate"], 0.44)
+        self.assertNotIn("series", data)
+
+    def test_weekly_series_includes_empty_weeks(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, {
+                "start": "2026-01-07", "end": "2026-02-03", "granularity": "week",
+            }).data
+        series = [(b["start"], b["assigned"], b["completed"]) for b in data["series"]]
+        self.assertEqual(series, [
+            ("2026-01-05", 2, 2),
+            ("2026-01-12", 3, 0),
+            ("2026-01-19", 0, 0),
+            ("2026-01-26", 0, 0),
+            ("2026-02-02", 5, 5),
+        ])
+        # The 2026-01-05 row is outside the period
+        self.assertEqual((data["assigned"], data["completed"]), (10, 7))
+
+    def test_daily_and_monthly_series(self):
+        data = self.client.get(self.url, {
+            "start": "2026-01-05", "end": "2026-01-07", "granularity": "day",
+        }).data
+        self.assertEqual([b["completed"] for b in data["series"]], [2, 0, 2])
+
+        data = self.client.get(self.url, {
+            "start": "2026-01-01", "end": "2026-02-28", "granularity": "month",
+        }).data
+        self.assertEqual(
+            [(b["start"], b["assigned"], b["completion_rate"]) for b in data["series"]],
+            [("2026-01-01", 9, 0.44), ("2026-02-01", 5, 1.0)],
+        )
+
+    def test_invalid_parameters(self):
+        for params in [
+            {"start": "2026-02-01", "end": "2026-01-01"},
+            {"start": "soon"},
+            {"end": "2026-01-01"},
+            {"start": "2020-01-01", "end": "2026-01-01"},
+            {"granularity": "hour"},
+        ]:
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+    def test_named_ranges_still_work(self):
+        data = self.client.get(self.url, {"range": "week"}).data
+        self.assertEqual(data["range"], "week")
+        self.assertIn("streak", data)
+
+
+class ConditionalGetTests(TestCase):
+    """The polled read endpoints answer If-None-Match from User.state_version,
+    which every write they reflect bumps."""
+
+    READ_URLS = ("user-stats", "weekly-stats", "system-daily-status", "task-list")
+
+    def setUp(self):
+        self.user = provision_user("poller")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.task = Task.objects.filter(user=self.user).first()
+
+    def etag(self, name="user-stats"):
+        response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        return response["ETag"]
+
+    def test_matching_etag_is_answered_without_running_the_view(self):
+        for name in self.READ_URLS:
+            etag = self.etag(name)
+            # Only the token lookup
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, name)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_completion_changes_the_etag(self):
+        etag = self.etag()
+        self.client.post(reverse("task-complete"), {"task_id": self.task.id}, format="json")
+        response = self.client.get(reverse("user-stats"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["total_completed_tasks"], 1)
+
+    def test_task_writes_change_the_etag(self):
+        etag = self.etag("task-list")
+        self.client.delete(reverse("task-detail", args=[self.task.id]))
+        self.assertNotEqual(self.etag("task-list"), etag)
+
+        etag = self.etag("task-list")
+        self.client.post(reverse("task-list"), {
+            "title": "Stretch", "description": "", "difficulty": 1, "attribute": "energy", "reward_point": 4,
+        }, format="json")
+        self.assertNotEqual(self.etag("task-list"), etag)
+
+    def test_reading_messages_changes_the_etag_only_when_unread(self):
+        SystemLog.objects.create(user=self.user, message_type="chat_response", content="Hello.")
+        etag = self.etag("system-daily-status")
+        self.client.get(reverse("system-messages"))
+        etag_after_read = self.etag("system-daily-status")
+        self.assertNotEqual(etag_after_read, etag)
+        self.client.get(reverse("system-messages"))
+        self.assertEqual(self.etag("system-daily-status"), etag_after_read)
 
+    def test_nightly_judgement_changes_the_etag(self):
+        from datetime import date, timedelta
+        from .judgement import judge_day
+
+        yesterday = date.today() - timedelta(days=1)
+        UserDailyActivity.objects.create(user=self.user, date=yesterday, assigned=3, completed=0)
+        etag = self.etag()
+        judge_day(yesterday)
+        self.assertNotEqual(self.etag(), etag)
+
+
+class DashboardViewTests(TestCase):
+    def setUp(self):
+        self.user = provision_user("dashboard")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("dashboard")
+
+    def seed(self, n_completions):
+        tasks = list(Task.objects.filter(user=self.user)[:n_completions])
+        for task in tasks:
+            self.client.post(reverse("task-complete"), {"task_id": task.id}, format="json")
+        SystemLog.objects.create(user=self.user, message_type="chat_response", content="Hello.")
+        UserTitle.objects.get_or_create(user=self.user, title_key="iron_will", defaults={"is_active": True})
+
+    def test_matches_the_individual_endpoints(self):
+        self.seed(2)
+        data = self.client.get(self.url).data
+        for key, name in [
+            ("tasks", "task-list"),
+            ("user_stats", "user-stats"),
+            ("weekly_stats", "weekly-stats"),
+            ("daily_status", "system-daily-status"),
+        ]:
+            expected = self.client.get(reverse(name)).data
+            self.assertEqual(json.loads(json.dumps(data[key])), json.loads(json.dumps(expected)), key)
+        self.assertEqual(data["daily_status"]["unread_messages"], 1)
+        self.assertEqual(data["user_stats"]["total_completed_tasks"], 2)
+
+    def test_query_count_does_not_grow_with_history(self):
+        # The first request of the day draws the board; measure the ones after
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        self.seed(3)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(self.url)
+        self.assertEqual(len(few), len(many))
+        # state version, board, user row, attributes, week rollup; a token
+        # lookup makes it 6 for a real client (benchmarks/dashboard.py)
+        self.assertEqual(len(many), 5)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+NVIDIA_TEST_PROVIDER = {
+    "BACKEND": "backend.ai.OpenAICompatibleProvider",
+    "BASE_URL": "https://integrate.api.nvidia.com/v1",
+    "API_KEY": "test-key",
+    "MODEL": "test-model",
+    "TIMEOUT": 12,
+    "MAX_RETRIES": 4,
+}
+ANTHROPIC_TEST_PROVIDER = {
+    "BACKEND": "backend.ai.AnthropicProvider",
+    "API_KEY": "test-key",
+    "MODEL": "test-model",
+}
+
+
+@override_settings(
+    AI_PROVIDER="nvidia",
+    AI_PROVIDERS={"nvidia": NVIDIA_TEST_PROVIDER, "anthropic": ANTHROPIC_TEST_PROVIDER},
+)
 class AIProviderTests(TestCase):
-    """_call_ai_provider() branches on AI_PROVIDER; each branch needs its
-    own client mocked out so these run without a real API key or network call."""
+    """_call_ai_provider() uses the provider settings.AI_PROVIDER names; the
+    SDK clients are mocked out so these run without a network call."""
+
+    def setUp(self):
+        # Providers are kept per process; rebuild them around each test's mocks.
+        reset_providers()
+        self.addCleanup(reset_providers)
 
-    @mock.patch.dict(os.environ, {}, clear=True)
-    def test_defaults_to_nvidia_and_requires_its_key(self):
+    @override_settings(AI_PROVIDERS={"nvidia": {**NVIDIA_TEST_PROVIDER, "API_KEY": ""}})
+    def test_provider_requires_its_key(self):
         with self.assertRaises(RuntimeError):
             _call_ai_provider("sys", "user")
 
-    @mock.patch.dict(os.environ, {"AI_PROVIDER": "anthropic"}, clear=True)
-    def test_anthropic_provider_requires_its_key(self):
+    @override_settings(AI_PROVIDER="missing")
+    def test_unknown_provider_is_an_error(self):
         with self.assertRaises(RuntimeError):
             _call_ai_provider("sys", "user")
 
-    @mock.patch.dict(os.environ, {"NVIDIA_API_KEY": "test-key"}, clear=True)
     @mock.patch("openai.OpenAI")
     def test_nvidia_provider_calls_openai_compatible_client(self, mock_openai_cls):
         mock_client = mock_openai_cls.return_value
@@ -673,10 +1771,13 @@ class AIProviderTests(TestCase):
         result = _call_ai_provider("sys prompt", "user prompt")
 
         self.assertEqual(result, '{"system_message": "hi"}')
-        mock_openai_cls.assert_called_once_with(
-            api_key="test-key", base_url="https://integrate.api.nvidia.com/v1"
-        )
+        _, kwargs = mock_openai_cls.call_args
+        self.assertEqual(kwargs["api_key"], "test-key")
+        self.assertEqual(kwargs["base_url"], "https://integrate.api.nvidia.com/v1")
+        self.assertEqual(kwargs["max_retries"], 4)
+        self.assertEqual(kwargs["timeout"].read, 12)
         _, kwargs = mock_client.chat.completions.create.call_args
+        self.assertEqual(kwargs["model"], "test-model")
         self.assertEqual(
             kwargs["messages"],
             [
@@ -685,9 +1786,7 @@ class AIProviderTests(TestCase):
             ],
         )
 
-    @mock.patch.dict(
-        os.environ, {"AI_PROVIDER": "anthropic", "ANTHROPIC_API_KEY": "test-key"}, clear=True
-    )
+    @override_settings(AI_PROVIDER="anthropic")
     @mock.patch("anthropic.Anthropic")
     def test_anthropic_provider_calls_claude_client(self, mock_anthropic_cls):
         mock_client = mock_anthropic_cls.return_value
@@ -696,11 +1795,71 @@ class AIProviderTests(TestCase):
         result = _call_ai_provider("sys prompt", "user prompt")
 
         self.assertEqual(result, "hi")
-        mock_anthropic_cls.assert_called_once_with(api_key="test-key")
+        self.assertEqual(mock_anthropic_cls.call_args.kwargs["api_key"], "test-key")
         _, kwargs = mock_client.messages.create.call_args
         self.assertEqual(kwargs["system"], "sys prompt")
         self.assertEqual(kwargs["messages"], [{"role": "user", "content": "user prompt"}])
 
+    @mock.patch("openai.OpenAI")
+    def test_client_is_built_once_per_process(self, mock_openai_cls):
+        for _ in range(3):
+            _call_ai_provider("sys prompt", "user prompt")
+        self.assertIs(get_provider(), get_provider())
+        mock_openai_cls.assert_called_once()
+
+    @mock.patch("openai.OpenAI")
+    def test_nvidia_stream_yields_delta_content(self, mock_openai_cls):
+        mock_client = mock_openai_cls.return_value
+        # Shape of OpenAI-compatible stream chunks: .choices[0].delta.content,
+        # with None on the final chunk.
+        mock_client.chat.completions.create.return_value = [
+            mock.Mock(choices=[mock.Mock(delta=mock.Mock(content=text))])
+            for text in ('{"system_', 'message": "hi"}', None)
+        ]
+
+        result = list(_stream_ai_provider("sys prompt", "user prompt"))
+
+        self.assertEqual(result, ['{"system_', 'message": "hi"}'])
+        _, kwargs = mock_client.chat.completions.create.call_args
+        self.assertTrue(kwargs["stream"])
+
+    @override_settings(AI_PROVIDER="anthropic")
+    @mock.patch("anthropic.Anthropic")
+    def test_anthropic_stream_yields_text_stream(self, mock_anthropic_cls):
+        stream = mock_anthropic_cls.return_value.messages.stream.return_value.__enter__.return_value
+        stream.text_stream = iter(["h", "i"])
+
+        self.assertEqual(list(_stream_ai_provider("sys prompt", "user prompt")), ["h", "i"])
+
+    @override_settings(AI_PROVIDER="fake", AI_PROVIDERS={
+        "fake": {"BACKEND": "backend.ai.FakeProvider", "REPLY": "abcdefghij", "CHUNK_SIZE": 4},
+    })
+    def test_fake_provider_plugs_in_from_settings(self):
+        self.assertEqual(_call_ai_provider("sys", "user"), "abcdefghij")
+        self.assertEqual(list(_stream_ai_provider("sys", "user")), ["abcd", "efgh", "ij"])
+        self.assertEqual(get_provider().calls, 2)
+
+FAKE_PROVIDER_DELAY = 0.3
+FAKE_AI_REPLY = json.dumps({
+    "system_message": "Rise, Host.",
+    "missions": [{
+        "title": "Read 20 pages",
+        "description": "Feed the mind.",
+        "mission_type": "daily",
+        "attribute": "intelligence",
+        "reward": "+2 Intelligence",
+        "difficulty": 1,
+        "flavor_text": "Do not disappoint me.",
+    }],
+    "evaluation": "",
+})
+
+
+def _sleepy_provider(system_prompt, user_prompt):
+    """Stands in for a slow AI provider round trip."""
+    time.sleep(FAKE_PROVIDER_DELAY)
+    return FAKE_AI_REPLY
+
 
 @override_settings(CACHES=TEST_CACHES)
 class SystemChatViewTests(TestCase):
@@ -710,6 +1869,9 @@ class SystemChatViewTests(TestCase):
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
         self.url = reverse("system-chat")
+        brief_cache.clear()
+        self.addCleanup(brief_cache.clear)
+        counter_cache.clear()
 
     def test_requires_authentication(self):
         anon_client = APIClient()
@@ -737,6 +1899,433 @@ class SystemChatViewTests(TestCase):
         }, format="json")
         self.assertEqual(response.status_code, 400)
 
+    def run_worker(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        # The worker's connection housekeeping would close the connection
+        # this test's transaction is open on.
+        with mock.patch("backend.management.commands.run_chat_worker.close_old_connections"):
+            call_command("run_chat_worker", "--once", stdout=StringIO())
+
+    def test_post_queues_job_without_waiting_for_provider(self):
+        with mock.patch("backend.views._call_ai_provider", side_effect=_sleepy_provider) as provider:
+            started = time.monotonic()
+            response = self.client.post(self.url, {"message": "hi", "context_type": "user_input"}, format="json")
+            elapsed = time.monotonic() - started
+        self.assertEqual(response.status_code, 202)
+        self.assertLess(elapsed, FAKE_PROVIDER_DELAY)
+        provider.assert_not_called()
+        job = SystemChatJob.objects.get(pk=response.data["job_id"])
+        self.assertEqual(job.status, "queued")
+        self.assertEqual(response["Location"], reverse("system-chat-job", args=[job.id]))
+        status_response = self.client.get(response["Location"])
+        self.assertEqual(status_response.data, {"job_id": job.id, "status": "queued"})
+
+    def test_worker_runs_job_and_status_returns_result(self):
+        response = self.client.post(self.url, {"message": "", "context_type": "morning_brief"}, format="json")
+        with mock.patch("backend.views._call_ai_provider", side_effect=_sleepy_provider):
+            self.run_worker()
+
+        result = self.client.get(response["Location"]).data
+        self.assertEqual(result["status"], "done")
+        self.assertEqual(result["system_message"], "Rise, Host.")
+        self.assertEqual([m["title"] for m in result["missions"]], ["Read 20 pages"])
+        self.assertTrue(Task.objects.filter(user=self.user, title="Read 20 pages").exists())
+        self.assertTrue(SystemLog.objects.filter(user=self.user, message_type="daily_brief").exists())
+        self.assertIn("first_system_contact", result["titles_awarded"])
+
+    def test_provider_failure_marks_job_failed_without_leaking_detail(self):
+        response = self.client.post(self.url, {"message": "hi", "context_type": "user_input"}, format="json")
+        with mock.patch("backend.views._call_ai_provider", side_effect=RuntimeError("upstream req_123 body")):
+            self.run_worker()
+
+        result = self.client.get(response["Location"]).data
+        self.assertEqual(result["status"], "failed")
+        self.assertNotIn("req_123", result["error"])
+        self.assertFalse(SystemLog.objects.filter(user=self.user).exists())
+
+    def test_repeat_brief_is_served_from_cache_without_duplicate_tasks(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        first = self.client.post(self.url, {"message": "", "context_type": "morning_brief"}, format="json")
+        with mock.patch("backend.views._call_ai_provider", return_value=FAKE_AI_REPLY) as provider, \
+                self.assertLogs("backend.views", "INFO") as logs:
+            self.run_worker()
+            second = self.client.post(self.url, {"message": "", "context_type": "morning_brief"}, format="json")
+            self.run_worker()
+
+        provider.assert_called_once()
+        self.assertIn("Brief cache hit (1 hits, 1 misses, 1 entries in this process)", logs.output[-1])
+        out = StringIO()
+        call_command("brief_cache_stats", "--reset", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Brief cache: 1 hits, 1 misses, hit rate 50%")
+        self.assertIsNone(counter_cache.get("brief_cache_hits"))
+        first_result = self.client.get(first["Location"]).data
+        second_result = self.client.get(second["Location"]).data
+        self.assertEqual(second_result["missions"], first_result["missions"])
+        self.assertEqual(second_result["titles_awarded"], [])
+        self.assertEqual(Task.objects.filter(user=self.user, title="Read 20 pages").count(), 1)
+        self.assertEqual(SystemLog.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(brief_cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_brief_cache_is_per_user_and_skips_user_input(self):
+        other = User.objects.create_user(username="otherbrief", password="pw12345")
+        SystemChatJob.objects.create(user=self.user, context_type="morning_brief", message="")
+        SystemChatJob.objects.create(user=other, context_type="morning_brief", message="")
+        SystemChatJob.objects.create(user=self.user, context_type="user_input", message="hi")
+        SystemChatJob.objects.create(user=self.user, context_type="user_input", message="hi")
+        with mock.patch("backend.views._call_ai_provider", return_value=FAKE_AI_REPLY) as provider:
+            self.run_worker()
+
+        self.assertEqual(provider.call_count, 4)
+        self.assertEqual(Task.objects.filter(user=other).count(), 1)
+
+    def test_other_users_job_is_not_visible(self):
+        other = User.objects.create_user(username="otherchat", password="pw12345")
+        job = SystemChatJob.objects.create(user=other, context_type="user_input", message="secret")
+        response = self.client.get(reverse("system-chat-job", args=[job.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_each_job_is_claimed_once(self):
+        first = SystemChatJob.objects.create(user=self.user, context_type="user_input", message="a")
+        second = SystemChatJob.objects.create(user=self.user, context_type="user_input", message="b")
+        self.assertEqual(SystemChatJob.claim_next(), first)
+        self.assertEqual(SystemChatJob.claim_next(), second)
+        self.assertIsNone(SystemChatJob.claim_next())
+
+
+
+class SystemMessageStreamTests(TestCase):
+    MESSAGE = 'Rise, "Host". C:\\path\n\tnow — 😀 go'
+
+    def assertStreams(self, raw):
+        # Every split point, so escapes and surrogate pairs get cut in half.
+        for split in range(len(raw) + 1):
+            stream = SystemMessageStream()
+            text = stream.feed(raw[:split]) + stream.feed(raw[split:])
+            self.assertEqual(text, self.MESSAGE, f"split at {split}")
+            self.assertTrue(stream.done)
+
+    def test_decodes_escaped_message_split_anywhere(self):
+        self.assertStreams(json.dumps({"system_message": self.MESSAGE, "missions": []}))
+
+    def test_decodes_raw_unicode_message_split_anywhere(self):
+        self.assertStreams(json.dumps({"missions": [], "system_message": self.MESSAGE}, ensure_ascii=False))
+
+    def test_ignores_text_after_the_message(self):
+        stream = SystemMessageStream()
+        stream.feed('```json\n{"system_message": "Hi"')
+        self.assertEqual(stream.feed(', "evaluation": "not this"}'), "")
+
+
+class UserContextSnapshotTests(TestCase):
+    def setUp(self):
+        from datetime import date, timedelta
+        from django.utils import timezone
+
+        self.user = provision_user("snapshotuser")
+        UserAttribute.objects.filter(user=self.user, name="intelligence").update(value=250)
+        today = date.today()
+        UserDailyActivity.objects.create(user=self.user, date=today, assigned=6, completed=5)
+        UserDailyActivity.objects.create(user=self.user, date=today - timedelta(days=3), assigned=4, completed=1)
+        UserDailyActivity.objects.create(user=self.user, date=today - timedelta(days=30), assigned=9, completed=9)
+        now = timezone.now()
+        for i, task in enumerate(Task.objects.filter(user=self.user).order_by("id")[:4]):
+            log = UserTaskLog.objects.create(user=self.user, task=task, status="completed")
+            UserTaskLog.objects.filter(pk=log.pk).update(completed_at=now - timedelta(minutes=i))
+        UserTitle.objects.create(user=self.user, title_key="iron_will")
+
+    def test_loads_chat_context_in_two_queries(self):
+        with self.assertNumQueries(2):
+            snapshot = UserContextSnapshot.load(self.user)
+
+        self.assertEqual(snapshot.attributes["intelligence"], 250)
+        self.assertEqual(snapshot.attributes["stress"], 0)
+        self.assertEqual(snapshot.goal_title, "Getting Started")
+        expected_recent = list(Task.objects.filter(user=self.user).order_by("id").values_list("title", flat=True)[:3])
+        self.assertEqual(snapshot.recent_titles, expected_recent)
+        self.assertEqual(snapshot.earned_titles, {"iron_will"})
+        self.assertFalse(snapshot.has_system_log)
+        self.assertEqual((snapshot.week_assigned, snapshot.week_completed), (10, 6))
+        self.assertEqual(snapshot.completion_rate, 60)
+        self.assertEqual(snapshot.today_completed, 5)
+
+    def test_new_user_has_empty_context(self):
+        user = User.objects.create_user(username="blank", password="pw12345")
+        snapshot = UserContextSnapshot.load(user)
+        self.assertIsNone(snapshot.goal_title)
+        self.assertEqual(snapshot.recent_titles, [])
+        self.assertEqual(snapshot.completion_rate, 0)
+        self.assertEqual(snapshot.earned_titles, set())
+
+    def test_chat_awards_titles_from_the_snapshot(self):
+        with mock.patch("backend.views._call_ai_provider", return_value=FAKE_AI_REPLY):
+            payload = run_system_chat(self.user, "user_input", "hi")
+
+        self.assertEqual(
+            sorted(payload["titles_awarded"]), ["consistent_scholar", "first_system_contact", "overachiever"]
+        )
+        self.assertEqual(UserTitle.objects.filter(user=self.user).count(), 4)
+
+class MissionSchemaTests(TestCase):
+    def test_clamps_and_defaults_untrusted_fields(self):
+        fields = MISSION_SCHEMA.clean({
+            "title": "x" * 200,
+            "attribute": "charisma",
+            "mission_type": "legendary",
+            "difficulty": "99",
+            "flavor_text": None,
+        })
+        self.assertEqual(len(fields["title"]), 150)
+        self.assertEqual(fields["attribute"], "discipline")
+        self.assertEqual(fields["mission_type"], "system_generated")
+        self.assertEqual(fields["difficulty"], 3)
+        self.assertEqual(fields["reward_point"], 14)
+        self.assertEqual(fields["system_flavor"], "")
+
+    def test_unparseable_difficulty_and_non_dict_missions(self):
+        self.assertEqual(MISSION_SCHEMA.clean({"difficulty": "hard"})["difficulty"], 1)
+        self.assertEqual(MISSION_SCHEMA.clean({})["title"], "System Mission")
+        self.assertIsNone(MISSION_SCHEMA.clean("Read a book"))
+
+    def test_unhashable_choices_fall_back_to_defaults(self):
+        fields = MISSION_SCHEMA.clean({"attribute": ["strength"], "mission_type": {"kind": "daily"}})
+        self.assertEqual(fields["attribute"], "discipline")
+        self.assertEqual(fields["mission_type"], "system_generated")
+
+
+class MissionPersistenceTests(TestCase):
+    MISSION = json.loads(FAKE_AI_REPLY)["missions"][0]
+
+    def persist(self, n_missions):
+        user = provision_user(f"missions{n_missions}")
+        snapshot = UserContextSnapshot.load(user)
+        parsed = {"system_message": "Go.", "missions": [dict(self.MISSION)] * n_missions + ["junk"]}
+        with CaptureQueriesContext(connection) as queries:
+            payload = _persist_chat_result(snapshot, "user_input", parsed)
+        return user, payload, len(queries)
+
+    def test_query_count_does_not_grow_with_missions(self):
+        _, _, one = self.persist(1)
+        _, _, many = self.persist(10)
+        self.assertEqual(one, many)
+
+    def test_missions_saved_with_their_ids(self):
+        user, payload, _ = self.persist(3)
+        ids = [m["id"] for m in payload["missions"]]
+        self.assertEqual(len(ids), 3)
+        tasks = Task.objects.filter(user=user, pk__in=ids)
+        self.assertEqual({t.title for t in tasks}, {"Read 20 pages"})
+        self.assertFalse(any(t.is_hidden_from_daily for t in tasks))
+        self.assertEqual(SystemLog.objects.get(user=user).missions_issued, payload["missions"])
+
+
+class ResponseCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats(), {"hits": 3, "misses": 1, "entries": 2})
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache(max_entries=10, ttl=60)
+        with mock.patch("backend.ai.time.monotonic", return_value=1000):
+            cache.set("a", 1)
+        with mock.patch("backend.ai.time.monotonic", return_value=1059):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch("backend.ai.time.monotonic", return_value=1060):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_fingerprint_depends_on_every_part(self):
+        base = ("sys", "user", "nvidia", "model")
+        keys = {ResponseCache.fingerprint(*base)}
+        for i in range(len(base)):
+            keys.add(ResponseCache.fingerprint(*base[:i], base[i] + "x", *base[i + 1:]))
+        self.assertEqual(len(keys), len(base) + 1)
+
+
+def _fake_stream_provider(system_prompt, user_prompt):
+    """Stands in for a streaming AI provider: the reply in small chunks."""
+    for i in range(0, len(FAKE_AI_REPLY), 7):
+        yield FAKE_AI_REPLY[i:i + 7]
+
+
+def _failing_stream_provider(system_prompt, user_prompt):
+    yield '{"system_message": "Ri'
+    raise RuntimeError("upstream req_123 body")
+
+
+def _parse_events(body):
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SystemChatStreamViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="streamuser", password="pw12345")
+        token = Token.objects.create(user=self.user)
+        self.client = AsyncClient()
+        self.headers = {"Authorization": f"Token {token.key}"}
+        self.url = reverse("system-chat-stream")
+        brief_cache.clear()
+        self.addCleanup(brief_cache.clear)
+
+    def post(self, body):
+        return self.client.post(self.url, body, content_type="application/json", headers=self.headers)
+
+    async def stream(self, body):
+        response = await self.post(body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return _parse_events(b"".join([chunk async for chunk in response.streaming_content]))
+
+    async def test_streams_message_tokens_then_persists_missions(self):
+        with mock.patch("backend.views._stream_ai_provider", _fake_stream_provider):
+            events = await self.stream({"message": "", "context_type": "morning_brief"})
+
+        tokens = [data["text"] for name, data in events if name == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), "Rise, Host.")
+        name, done = events[-1]
+        self.assertEqual(name, "done")
+        self.assertEqual([m["title"] for m in done["missions"]], ["Read 20 pages"])
+        self.assertTrue(await Task.objects.filter(user=self.user, title="Read 20 pages").aexists())
+        self.assertTrue(await SystemLog.objects.filter(user=self.user, message_type="daily_brief").aexists())
+
+    async def test_provider_failure_ends_with_error_event(self):
+        with mock.patch("backend.views._stream_ai_provider", _failing_stream_provider):
+            events = await self.stream({"message": "hi", "context_type": "user_input"})
+
+        name, data = events[-1]
+        self.assertEqual(name, "error")
+        self.assertNotIn("req_123", data["error"])
+        self.assertFalse(await SystemLog.objects.filter(user=self.user).aexists())
+
+    async def test_persistence_failure_ends_with_error_event(self):
+        with mock.patch("backend.views._stream_ai_provider", _fake_stream_provider), \
+                mock.patch("backend.views._persist_chat_result", side_effect=RuntimeError("db gone")):
+            events = await self.stream({"message": "hi", "context_type": "user_input"})
+
+        name, data = events[-1]
+        self.assertEqual(name, "error")
+        self.assertNotIn("db gone", data["error"])
+
+    async def test_validates_like_the_queued_endpoint(self):
+        response = await self.post({"message": "x" * 1001, "context_type": "user_input"})
+        self.assertEqual(response.status_code, 400)
+
+
+class DailyJudgementTests(TestCase):
+    """run_daily_judgement penalises yesterday's poor performers in batches,
+    once per date, and the punishment-check endpoint only reads the result."""
+
+    def setUp(self):
+        from datetime import date, timedelta
+
+        self.yesterday = date.today() - timedelta(days=1)
+
+    def host(self, username, assigned, completed):
+        user = provision_user(username)
+        UserAttribute.objects.filter(user=user, name="discipline").update(value=10)
+        UserDailyActivity.objects.create(user=user, date=self.yesterday, assigned=assigned, completed=completed)
+        return user
+
+    def judge(self, **options):
+        from django.core.management import call_command
+
+        call_command("run_daily_judgement", stdout=open(os.devnull, "w"), **options)
+
+    def attributes(self, user):
+        return dict(UserAttribute.objects.filter(user=user, name__in=["discipline", "stress"]).values_list("name", "value"))
+
+    def test_penalises_by_severity(self):
+        idle = self.host("idle", assigned=5, completed=0)
+        slow = self.host("slow", assigned=5, completed=1)
+        fine = self.host("fine", assigned=5, completed=2)
+        self.judge()
+
+        self.assertEqual(self.attributes(idle), {"discipline": 5, "stress": 8})
+        self.assertEqual(self.attributes(slow), {"discipline": 8, "stress": 3})
+        self.assertEqual(self.attributes(fine), {"discipline": 10, "stress": 0})
+        judgement = DailyJudgement.objects.get(user=slow)
+        self.assertEqual((judgement.severity, judgement.completion_rate), ("light", 0.2))
+        self.assertEqual(judgement.task.mission_type, "punishment")
+        self.assertEqual(
+            SystemLog.objects.get(user=slow, message_type="punishment").missions_issued[0]["id"],
+            judgement.task.id,
+        )
+        self.assertFalse(DailyJudgement.objects.filter(user=fine).exists())
+
+    def test_rerunning_a_date_does_not_punish_twice(self):
+        user = self.host("twice", assigned=3, completed=0)
+        self.judge()
+        self.judge(date=self.yesterday.isoformat())
+
+        self.assertEqual(self.attributes(user), {"discipline": 5, "stress": 8})
+        self.assertEqual(Task.objects.filter(user=user, mission_type="punishment").count(), 1)
+        self.assertEqual(SystemLog.objects.filter(user=user).count(), 1)
+
+    def test_query_count_does_not_grow_with_users(self):
+        from datetime import timedelta
+        from .judgement import judge_day
+
+        for i in range(2):
+            self.host(f"few{i}", assigned=4, completed=i)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(judge_day(self.yesterday), 2)
+
+        self.yesterday -= timedelta(days=1)
+        for i in range(8):
+            self.host(f"many{i}", assigned=4, completed=i % 2)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(judge_day(self.yesterday), 8)
+        self.assertEqual(len(few), len(many))
+
+    def test_batches_cover_every_user(self):
+        from .judgement import judge_day
+
+        for i in range(5):
+            self.host(f"batch{i}", assigned=2, completed=0)
+        self.assertEqual(judge_day(self.yesterday, batch_size=2), 5)
+        self.assertEqual(DailyJudgement.objects.count(), 5)
+
+    def test_endpoint_delivers_the_judgement_once(self):
+        user = self.host("reader", assigned=4, completed=1)
+        self.judge()
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse("system-punishment-check")
+
+        data = client.post(url).data
+        self.assertTrue(data["punishment_applied"])
+        self.assertEqual(data["severity"], "light")
+        self.assertEqual(data["penalty"], "-2 Discipline, +3 Stress")
+        self.assertIn("25%", data["system_message"])
+        self.assertEqual(data["punishment_task"]["id"], DailyJudgement.objects.get(user=user).task_id)
+
+        data = client.post(url).data
+        self.assertEqual(data, {"punishment_applied": False, "reason": "already_checked_today"})
+        # Reading never penalises again
+        self.assertEqual(self.attributes(user), {"discipline": 8, "stress": 3})
+
+    def test_endpoint_without_judgement(self):
+        client = APIClient()
+        client.force_authenticate(provision_user("spared"))
+        data = client.post(reverse("system-punishment-check")).data
+        self.assertEqual(data, {"punishment_applied": False, "reason": "no_penalty"})
+
 
 class HealthViewTests(TestCase):
     def test_health_check_is_public_and_ok(self):
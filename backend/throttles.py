@@ -1,10 +1,70 @@
-from rest_framework.throttling import SimpleRateThrottle
+import math
 
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework.throttling import ScopedRateThrottle, SimpleRateThrottle
 
-class SystemChatIPThrottle(SimpleRateThrottle):
+# Throttle state lives in its own cache alias (settings.CACHES['throttle'])
+# so the store can be swapped without touching anything else that caches.
+# It must be one of the backend.cache backends: they provide compare_and_set.
+throttle_cache = ConnectionProxy(caches, 'throttle')
+
+
+class GCRAThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle enforced with GCRA instead of a timestamp history.
+
+    A rate of N/period allows a burst of N requests from idle, then refills
+    one request every period/N. The only state per key is one float, the
+    "theoretical arrival time" (TAT): the moment the key would be back to a
+    full burst. Each request reads it, pushes it one interval later and
+    writes it back with compare_and_set, retrying if another worker updated
+    the key in between. DRF's history list instead costs O(N) to load,
+    trim and re-pickle on every request.
+    """
+    cache = throttle_cache
+    # Distinct from SimpleRateThrottle's keys, which hold history lists.
+    cache_format = 'throttle_gcra_%(scope)s_%(ident)s'
+    # Attempts at the read/compare_and_set loop before giving up and
+    # throttling; only reached when many requests race on one key.
+    max_attempts = 5
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = self.duration / self.num_requests
+        for _ in range(self.max_attempts):
+            self.now = self.timer()
+            tat = self.cache.get(self.key)
+            new_tat = max(tat or self.now, self.now) + interval
+            # Admitting this request must leave the key no more than one full
+            # burst (= duration) ahead of now.
+            # (The epsilon absorbs float drift from summing N intervals.)
+            allowed_at = new_tat - self.duration
+            if allowed_at - self.now > 1e-6:
+                self.wait_seconds = allowed_at - self.now
+                return False
+            if self.cache.compare_and_set(self.key, tat, new_tat, math.ceil(new_tat - self.now)):
+                return True
+        self.wait_seconds = interval
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ScopedThrottle(ScopedRateThrottle, GCRAThrottle):
+    """DRF's ScopedRateThrottle (per-user, else per-IP, keyed by view.throttle_scope) on GCRA."""
+
+
+class SystemChatIPThrottle(GCRAThrottle):
     """Second throttle layer for the System chat endpoint, keyed by client IP.
 
-    The per-account ScopedRateThrottle alone can be dodged by minting fresh
+    The per-account ScopedThrottle alone can be dodged by minting fresh
     guest accounts, so this also caps total chat requests per IP address
     across all accounts.
     """
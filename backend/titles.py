@@ -0,0 +1,127 @@
+"""
+Title awards, driven by events instead of re-checking every rule on chat.
+
+The completion views and the System chat emit events: (name, facts)
+pairs describing what just happened, e.g. ('completion',
+{'completed_today': 5, 'local_hour': 6}). Each rule in TITLE_RULES
+watches one event and compares one fact against a value, so only the rules
+for the events at hand are evaluated, against facts the caller already
+has, and titles the user holds are skipped via an in-memory set.
+
+    award_titles(user, [completion_event(log.completed_at, 5)])
+
+Newly earned titles are written with one bulk INSERT, and the last one
+becomes the active title.
+"""
+import operator
+from datetime import date
+
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .models import UserAttribute, UserTitle
+
+OPERATORS = {'>=': operator.ge, '<': operator.lt, '==': operator.eq}
+
+# (title_key, event, fact, operator, value)
+TITLE_RULES = (
+    ('first_system_contact', 'system_chat', 'first_contact', '==', True),
+    ('overachiever', 'completion', 'completed_today', '>=', 5),
+    ('early_bird', 'completion', 'local_hour', '<', 7),
+    ('iron_will', 'streak', 'current_streak', '>=', 7),
+    # Back on track after three or more days without completing anything
+    ('comeback_king', 'streak', 'days_missed', '>=', 3),
+    ('consistent_scholar', 'attributes', 'intelligence', '>=', 200),
+)
+
+
+class TitleEngine:
+    def __init__(self, rules=TITLE_RULES):
+        self.rules = {}
+        for title_key, event, fact, op, value in rules:
+            self.rules.setdefault(event, []).append((title_key, fact, OPERATORS[op], value))
+
+    def watched_facts(self, event):
+        """The facts any rule reads from this event"""
+        return {fact for _, fact, _, _ in self.rules.get(event, ())}
+
+    def evaluate(self, events, earned):
+        """Title keys the events earn that aren't in the earned set, in rule order"""
+        new = []
+        for event, facts in events:
+            for title_key, fact, compare, value in self.rules.get(event, ()):
+                if title_key in earned or title_key in new or fact not in facts:
+                    continue
+                if compare(facts[fact], value):
+                    new.append(title_key)
+        return new
+
+
+engine = TitleEngine()
+
+
+def completion_event(completed_at, completed_today):
+    return 'completion', {
+        'completed_today': completed_today,
+        'local_hour': timezone.localtime(completed_at).hour,
+    }
+
+
+def streak_event(user, previous_activity_date, today=None):
+    """After user.update_streak(); previous_activity_date is last_activity_date from before it"""
+    today = today or date.today()
+    if previous_activity_date is None or previous_activity_date == today:
+        days_missed = 0
+    else:
+        days_missed = (today - previous_activity_date).days - 1
+    return 'streak', {'current_streak': user.current_streak, 'days_missed': days_missed}
+
+
+def attribute_event(user, attribute_deltas):
+    """Current values of the changed attributes some rule watches, or None if there are none"""
+    watched = engine.watched_facts('attributes') & {
+        name for name, delta in (attribute_deltas or {}).items() if delta > 0
+    }
+    if not watched:
+        return None
+    return 'attributes', dict(
+        UserAttribute.objects.filter(user=user, name__in=watched).values_list('name', 'value')
+    )
+
+
+def snapshot_events(snapshot):
+    """Events restating a UserContextSnapshot, so the chat catches up on rules met before it"""
+    return [
+        ('system_chat', {'first_contact': not snapshot.has_system_log}),
+        ('completion', {'completed_today': snapshot.today_completed}),
+        ('streak', {'current_streak': snapshot.user.current_streak}),
+        ('attributes', snapshot.attributes),
+    ]
+
+
+def award_titles(user, events, earned=None):
+    """Award the titles these events earn; returns the newly earned keys.
+
+    earned is the set of title keys the user already holds (loaded if not
+    given) and is updated in place. Events may include None (nothing to
+    report), which is skipped.
+    """
+    events = [event for event in events if event is not None]
+    if not events:
+        return []
+    if earned is None:
+        earned = set(UserTitle.objects.filter(user=user).values_list('title_key', flat=True))
+    new = engine.evaluate(events, earned)
+    if not new:
+        return []
+    # A concurrent request may have just inserted one of these; ignoring the
+    # conflict keeps the rest of the batch.
+    UserTitle.objects.bulk_create(
+        [UserTitle(user=user, title_key=title_key) for title_key in new],
+        ignore_conflicts=True,
+    )
+    UserTitle.objects.filter(user=user).update(
+        is_active=Case(When(title_key=new[-1], then=Value(True)), default=Value(False))
+    )
+    earned.update(new)
+    return new
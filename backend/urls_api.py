@@ -16,8 +16,11 @@ urlpatterns = [
     path('goal/', views.GoalView.as_view(), name='user-goal'),
     path('user/stats/', views.UserStatsView.as_view(), name='user-stats'),
     path('user/progress/', views.ProgressStatsView.as_view(), name='user-progress'),
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
     # System / AI endpoints
     path('system/chat/', views.SystemChatView.as_view(), name='system-chat'),
+    path('system/chat/stream/', views.SystemChatStreamView.as_view(), name='system-chat-stream'),
+    path('system/chat/jobs/<int:pk>/', views.SystemChatJobView.as_view(), name='system-chat-job'),
     path('system/messages/', views.SystemMessagesView.as_view(), name='system-messages'),
     path('system/daily-status/', views.SystemDailyStatusView.as_view(), name='system-daily-status'),
     path('system/punishment-check/', views.PunishmentCheckView.as_view(), name='system-punishment-check'),
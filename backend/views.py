@@ -2,160 +2,86 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.authtoken.models import Token
-from .throttles import SystemChatIPThrottle
+from asgiref.sync import sync_to_async
+from .throttles import ScopedThrottle, SystemChatIPThrottle
+from django.conf import settings
+from django.core.cache import caches
 from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import make_password
-from django.db import IntegrityError
-from django.http import HttpResponse
-from .models import Task, User, Goal, UserTaskLog, UserAttribute, SystemLog, UserTitle
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.connection import ConnectionProxy
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from .models import (
+    Task, User, Goal, UserTaskLog, SystemLog, UserTitle, UserDailyActivity, DailySelection,
+    SystemChatJob, DailyJudgement, derived_task_fields, normalize_title,
+)
+from .dates import day_bounds
+from .accounts import REGISTERED_STARTER_TASKS, provision_user
+from .ai import ResponseCache, get_provider
+from .cache import increment
+from .context import DashboardSnapshot, UserContextSnapshot
+from .missions import MISSION_SCHEMA
+from .judgement import PENALTIES, REDEMPTION_REWARD, judgement_message
+from .titles import attribute_event, award_titles, completion_event, snapshot_events, streak_event
+from .streaming import SystemMessageStream, sse_event
+from .rewards import apply_reward, level_progress, parse_reward_string, user_stats
 from django.utils import timezone
 from datetime import date, timedelta, datetime
+from functools import wraps
+import base64
 import random
 import math
+import heapq
+import json
 import logging
 import re
-import secrets
 
 logger = logging.getLogger(__name__)
 
-def get_or_create_user(username):
-    """Helper function to get or create a user with default attributes"""
-    try:
-        user = User.objects.get(username=username)
-        return user
-    except User.DoesNotExist:
-        # Create new user with default settings
-        # Generate a random password for auto-created users
-        random_password = secrets.token_urlsafe(12)
-        user = User.objects.create(
-            username=username,
-            password=make_password(random_password),  # Random secure password
-            level=1,
-            exp=0,
-            current_streak=0,
-            max_streak=0
-        )
-
-        # Create default user attributes
-        default_attributes = [
-            ('intelligence', 0),
-            ('discipline', 0),
-            ('energy', 0),
-            ('social', 0),
-            ('wellness', 0),
-            ('stress', 0)
-        ]
-
-        for attr_name, attr_value in default_attributes:
-            UserAttribute.objects.create(
-                user=user,
-                name=attr_name,
-                value=attr_value
-            )
-
-        # Create default goal
-        Goal.objects.create(
-            user=user,
-            title="Getting Started",
-            description="Learn how to use the gamified productivity system"
-        )
-
-        # Seed default daily tasks so the user always has tasks to start with
-        default_deadline = timezone.now() + timedelta(days=3650)
-        default_tasks_data = [
-            {'title': '🧹 Organise workspace',   'description': 'Clean and organise your desk',              'reward_point': 6, 'difficulty': 1, 'attribute': 'discipline'},
-            {'title': '📝 Write journal entry',  'description': "Reflect on today's experiences",           'reward_point': 5, 'difficulty': 1, 'attribute': 'discipline'},
-            {'title': '🏃\u200d♂️ 30-minute workout',   'description': 'Include cardio and strength training',     'reward_point': 9, 'difficulty': 2, 'attribute': 'energy'},
-            {'title': '💻 Practice coding',      'description': 'Solve a Leetcode problem',                  'reward_point': 8, 'difficulty': 2, 'attribute': 'intelligence'},
-            {'title': '🧘\u200d♀️ Meditation',         'description': '10 minutes of mindfulness',                 'reward_point': 4, 'difficulty': 1, 'attribute': 'energy'},
-            {'title': '📚 Learn something new',  'description': 'Read an educational article',               'reward_point': 7, 'difficulty': 1, 'attribute': 'intelligence'},
-        ]
-        for td in default_tasks_data:
-            Task.objects.create(user=user, deadline=default_deadline, **td)
-
-        logger.info(f"Auto-created new user: {username}")
-        return user
-
-def apply_attribute_changes(user, reward_string):
-    """Helper function to parse reward string and apply attribute changes"""
-    if not reward_string:
-        return
-
-    try:
-        # Parse change strings like "+3 Intelligence, +2 Discipline, -1 Stress"
-        changes = reward_string.split(',')
-
-        for change in changes:
-            change = change.strip()
-            # Match pattern like "+3 Intelligence" or "-1 Stress"
-            match = re.match(r'([+-]\d+)\s+(\w+)', change)
-            if match:
-                value_str, attr_name = match.groups()
-                value = int(value_str)
-                attr_name_lower = attr_name.lower()
-
-                # Get or create user attribute
-                user_attr, created = UserAttribute.objects.get_or_create(
-                    user=user,
-                    name=attr_name_lower,
-                    defaults={'value': 0}
-                )
-
-                # Apply change with limits
-                if attr_name_lower == 'stress':
-                    # Stress has max limit of 100
-                    user_attr.value = max(0, min(100, user_attr.value + value))
-                else:
-                    # Other attributes have max limit of 1000
-                    user_attr.value = max(0, min(1000, user_attr.value + value))
+def state_version_etag(request, *args, **kwargs):
+    """ETag for a response that depends only on the user's state and today's date"""
+    return f'W/"{request.user.pk}.{request.user.state_version}.{date.today().isoformat()}"'
 
-                user_attr.save()
-                logger.info(f"Applied attribute change: {attr_name_lower} {value:+d} (new value: {user_attr.value})")
+def conditional_on_state_version(get):
+    """Serve a read view's GET with an ETag from User.state_version, answering
+    a matching If-None-Match with 304 before the view runs.
 
-    except Exception as e:
-        logger.error(f"Error applying attribute changes: {e}")
+    The version comes from request.user, which authentication has already
+    loaded, so a 304 costs no queries beyond the token lookup. Only for views
+    whose response changes with nothing but the user's state and the date.
+    """
+    get = method_decorator(condition(etag_func=state_version_etag))(get)
 
-def reverse_attribute_changes(user, reward_string):
-    """Helper function to reverse attribute changes by parsing reward string and applying opposite changes"""
-    if not reward_string:
-        return
+    @wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        response = get(self, request, *args, **kwargs)
+        # Revalidate on every poll instead of reusing a copy the browser kept
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
 
+def get_or_create_user(username):
+    """Helper function to get or create a user with default attributes"""
+    user = User.objects.filter(username=username).first()
+    if user is not None:
+        return user
     try:
-        # Parse change strings like "+3 Intelligence, +2 Discipline, -1 Stress"
-        # and reverse them: "-3 Intelligence, -2 Discipline, +1 Stress"
-        changes = reward_string.split(',')
-
-        for change in changes:
-            change = change.strip()
-            # Match pattern like "+3 Intelligence" or "-1 Stress"
-            match = re.match(r'([+-]\d+)\s+(\w+)', change)
-            if match:
-                value_str, attr_name = match.groups()
-                value = -int(value_str)  # Reverse the sign
-                attr_name_lower = attr_name.lower()
-
-                # Get or create user attribute
-                user_attr, created = UserAttribute.objects.get_or_create(
-                    user=user,
-                    name=attr_name_lower,
-                    defaults={'value': 0}
-                )
+        user = provision_user(username)
+    except IntegrityError:
+        # Created by a concurrent request between the lookup and the insert
+        return User.objects.get(username=username)
+    logger.info(f"Auto-created new user: {username}")
+    return user
 
-                # Apply reverse change with limits
-                if attr_name_lower == 'stress':
-                    # Stress has max limit of 100
-                    user_attr.value = max(0, min(100, user_attr.value + value))
-                else:
-                    # Other attributes have max limit of 1000
-                    user_attr.value = max(0, min(1000, user_attr.value + value))
-
-                user_attr.save()
-                logger.info(f"Reversed attribute change: {attr_name_lower} {value:+d} (new value: {user_attr.value})")
-
-    except Exception as e:
-        logger.error(f"Error reversing attribute changes: {e}")
+def reversed_reward(reward_string):
+    """Attribute deltas that undo a reward string ("+3 Intelligence" -> {'intelligence': -3})"""
+    return {name: -delta for name, delta in parse_reward_string(reward_string).items()}
 
 # Map common goal keywords to attributes the user should grow.
 # Used to bias daily task selection toward goal-relevant attributes,
@@ -199,53 +125,90 @@ def preferred_attributes_for_goal(goal_title: str, goal_desc: str = '') -> list:
     return preferred
 
 
+def weighted_sample(population, weights, k, rng=random):
+    """Pick up to k distinct items, each drawn with probability proportional to its weight.
+
+    Equivalent to repeatedly drawing one item and removing it, but done in a
+    single O(n log k) pass (Efraimidis-Spirakis): every item gets the key
+    -ln(U)/w and the k smallest keys win. Items with weight <= 0 are never
+    picked. Pass a seeded random.Random as rng for reproducible selections.
+    """
+    if k <= 0:
+        return []
+    keyed = (
+        (-math.log(1.0 - rng.random()) / w, i)
+        for i, w in enumerate(weights)
+        if w > 0
+    )
+    return [population[i] for _, i in heapq.nsmallest(k, keyed)]
+
+
 class TaskListView(APIView):
     """API view that returns task data from database"""
 
+    @conditional_on_state_version
     def get(self, request):
-        user = request.user
-        today = date.today()
+        return Response([self.entry(task) for task in self.board(request.user, date.today())])
+
+    @classmethod
+    def board(cls, user, today):
+        """Today's board tasks, each annotated with completed_today"""
+        today_start, today_end = day_bounds(today)
 
-        completed_task_ids = UserTaskLog.objects.filter(
+        completed_today = UserTaskLog.objects.filter(
             user=user,
             status='completed',
-            completed_at__date=today
-        ).values_list('task_id', flat=True)
+            completed_at__gte=today_start,
+            completed_at__lt=today_end
+        )
+
+        # The board is drawn once per day and replayed from DailySelection
+        # afterwards, so refreshing doesn't reshuffle it. Task and goal
+        # writes invalidate it (see DailySelection.invalidate).
+        selection = DailySelection.objects.filter(user=user, date=today).first()
+        if selection is None:
+            completed_task_ids = set(completed_today.values_list('task_id', flat=True))
+            selected_ids = [task.id for task in cls._draw_board(user, completed_task_ids)]
+            DailySelection.objects.update_or_create(
+                user=user, defaults={'date': today, 'task_ids': selected_ids}
+            )
+        else:
+            selected_ids = selection.task_ids
+
+        tasks_by_id = Task.objects.filter(user=user, id__in=selected_ids).annotate(
+            completed_today=Exists(completed_today.filter(task=OuterRef('pk')))
+        ).in_bulk()
+        return [tasks_by_id[task_id] for task_id in selected_ids if task_id in tasks_by_id]
 
-        # Exclude time-limited ultra-micro engineering tasks from daily task selection
+    @staticmethod
+    def entry(task):
+        # Calculate reward string
+        reward_attr = task.attribute.title()
+        reward_str = f"+{task.reward_point//2} {reward_attr}"
+        if task.difficulty > 1:
+            reward_str += f", +{task.difficulty-1} Discipline"
+
+        return {
+            "id": task.id,
+            "title": task.title,
+            "tip": task.description,
+            "reward": reward_str,
+            "reward_point": task.reward_point,
+            "completed": task.completed_today,
+            "difficulty": task.difficulty,
+            "attribute": task.attribute
+        }
+
+    @staticmethod
+    def _draw_board(user, completed_task_ids):
+        """Pick today's 3-6 board tasks, favouring uncompleted, goal-relevant ones"""
+        # Time-limited ultra-micro tasks and corrupted titles are flagged at
+        # write time (see Task.save / hidden_from_daily)
         all_tasks = list(Task.objects.filter(
-            user=user
-        ).exclude(
-            title__contains='Click VS Code Tab'
-        ).exclude(
-            title__contains='Press Ctrl+S'
-        ).exclude(
-            title__contains='Check Git Status'
-        ).exclude(
-            title__contains='Open Terminal'
-        ).exclude(
-            title__contains='Create New File'
-        ).exclude(
-            title__contains='Code Review Check'
-        ).exclude(
-            title__contains='Open Browser Dev Tools'
-        ).exclude(
-            title__contains='Navigate to GitHub'
-        ).exclude(
-            description__contains='Time-limited task completed'
+            user=user,
+            is_hidden_from_daily=False
         ))
 
-        # Drop tasks with corrupted titles:
-        #   - purely numeric (e.g. "1", "42")
-        #   - timestamp suffix from accidental time-limited task storage
-        #     (e.g. "Navigate to GitHub - 16:13:13")
-        all_tasks = [
-            t for t in all_tasks
-            if t.title
-            and not re.match(r'^\s*\d+\s*$', t.title)
-            and not re.search(r' - \d{2}:\d{2}:\d{2}$', t.title)
-        ]
-
         uncompleted_tasks = [task for task in all_tasks if task.id not in completed_task_ids]
         completed_tasks = [task for task in all_tasks if task.id in completed_task_ids]
 
@@ -259,62 +222,22 @@ class TaskListView(APIView):
             goal.description if goal else '',
         )
 
-        def weighted_sample(pool, n):
-            if not pool:
-                return []
+        def goal_weighted_sample(pool, n):
             weights = [3 if t.attribute in preferred_attrs else 1 for t in pool]
-            picked = []
-            remaining = list(zip(pool, weights))
-            for _ in range(min(n, len(pool))):
-                total = sum(w for _, w in remaining)
-                if total <= 0:
-                    break
-                r = random.uniform(0, total)
-                acc = 0
-                for i, (task, w) in enumerate(remaining):
-                    acc += w
-                    if r <= acc:
-                        picked.append(task)
-                        remaining.pop(i)
-                        break
-            return picked
+            return weighted_sample(pool, weights, n)
 
         # Prioritize uncompleted tasks
         num_tasks = min(random.randint(3, 6), len(all_tasks))
 
         if len(uncompleted_tasks) >= num_tasks:
-            selected_tasks = weighted_sample(uncompleted_tasks, num_tasks)
+            return goal_weighted_sample(uncompleted_tasks, num_tasks)
         elif len(uncompleted_tasks) > 0:
             remaining_slots = num_tasks - len(uncompleted_tasks)
-            selected_completed = weighted_sample(completed_tasks, remaining_slots)
-            selected_tasks = uncompleted_tasks + selected_completed
+            selected_completed = goal_weighted_sample(completed_tasks, remaining_slots)
+            return uncompleted_tasks + selected_completed
         else:
             # All tasks are completed, show some completed ones
-            selected_tasks = weighted_sample(all_tasks, num_tasks)
-
-        tasks = []
-        for task in selected_tasks:
-            # Calculate reward string
-            reward_attr = task.attribute.title()
-            reward_str = f"+{task.reward_point//2} {reward_attr}"
-            if task.difficulty > 1:
-                reward_str += f", +{task.difficulty-1} Discipline"
-
-            # Check if this task is completed today
-            is_completed = task.id in completed_task_ids
-
-            tasks.append({
-                "id": task.id,
-                "title": task.title,
-                "tip": task.description,
-                "reward": reward_str,
-                "reward_point": task.reward_point,
-                "completed": is_completed,
-                "difficulty": task.difficulty,
-                "attribute": task.attribute
-            })
-
-        return Response(tasks)
+            return goal_weighted_sample(all_tasks, num_tasks)
 
     def post(self, request):
         """Create a new task"""
@@ -372,6 +295,8 @@ class TaskListView(APIView):
                 deadline=deadline,
                 user=user
             )
+            DailySelection.invalidate(user)
+            User.bump_state_version(user)
 
             # Return the created task in the same format as GET
             reward_attr = task.attribute.title()
@@ -436,9 +361,10 @@ class TaskDetailView(APIView):
             # whenever it's uncompleted, not snapshotted at completion time —
             # changing them while today's completion is still in effect would
             # desync the XP/attribute reversal from what was actually granted.
+            today_start, today_end = day_bounds(date.today())
             completed_today = UserTaskLog.objects.filter(
                 task=task, user=request.user, status='completed',
-                completed_at__date=date.today()
+                completed_at__gte=today_start, completed_at__lt=today_end
             ).exists()
             if completed_today:
                 return Response(
@@ -485,6 +411,8 @@ class TaskDetailView(APIView):
             task.attribute = attribute
 
         task.save()
+        DailySelection.invalidate(request.user)
+        User.bump_state_version(request.user)
 
         reward_attr = task.attribute.title()
         reward_str = f"+{task.reward_point//2} {reward_attr}"
@@ -509,9 +437,14 @@ class TaskDetailView(APIView):
         except Task.DoesNotExist:
             return Response({"error": "Task not found"}, status=404)
 
-        # Cascades to this task's UserTaskLog entries, so completion history
-        # and weekly stats stop counting a deleted task.
-        task.delete()
+        # Cascades to this task's UserTaskLog entries; recount the days they
+        # were on so weekly stats, progress and the streak agree.
+        with transaction.atomic():
+            days = task_activity_days(request.user, task)
+            task.delete()
+            recount_daily_activity(request.user, days)
+        DailySelection.invalidate(request.user)
+        User.bump_state_version(request.user)
         return Response({"success": True})
 
 class GoalView(APIView):
@@ -557,21 +490,82 @@ def calculate_task_exp(task):
 
     return base_exp
 
-def calculate_level_from_exp(total_exp):
-    """Calculate current level from total EXP"""
-    level = 1
-    while level < 100 and total_exp >= get_exp_for_level(level + 1):
-        level += 1
-    return level
+def record_completion_activity(user, log, exp, undo=False):
+    """Mirror a completed log (or its deletion, with undo=True) into UserDailyActivity.
 
-def get_exp_for_level(level):
-    """Calculate EXP required for a specific level"""
-    if level <= 1:
-        return 0
-    return math.floor(100 * math.pow(1.3, level - 1))
+    Every completion and undo goes through here, so it also bumps the
+    user's state version.
+    """
+    sign = -1 if undo else 1
+    assigned_day = timezone.localdate(log.assigned_at)
+    completed_day = timezone.localdate(log.completed_at)
+    if assigned_day == completed_day:
+        UserDailyActivity.record(user, completed_day, assigned=sign, completed=sign, exp_gained=sign * exp)
+    else:
+        UserDailyActivity.record(user, assigned_day, assigned=sign)
+        UserDailyActivity.record(user, completed_day, completed=sign, exp_gained=sign * exp)
+    User.bump_state_version(user)
+
+def task_activity_days(user, task):
+    """The days whose UserDailyActivity row counts one of task's logs"""
+    days = set()
+    logs = UserTaskLog.objects.filter(user=user, task=task).values_list('assigned_at', 'completed_at')
+    for assigned_at, completed_at in logs:
+        days.add(timezone.localdate(assigned_at))
+        if completed_at:
+            days.add(timezone.localdate(completed_at))
+    return days
+
+def recount_daily_activity(user, days):
+    """Rebuild user's UserDailyActivity rows for days from the logs that exist now.
+
+    Counted the way the backfill_daily_activity command counts them, with
+    one query for the logs and one upsert for the rows, so a long history
+    costs the same as a short one.
+    """
+    if not days:
+        return
+    counters = {day: {'assigned': 0, 'completed': 0, 'missed': 0, 'exp_gained': 0} for day in days}
+    logs = UserTaskLog.objects.filter(
+        Q(assigned_at__date__in=days) | Q(completed_at__date__in=days), user=user,
+    ).select_related('task').only('status', 'assigned_at', 'completed_at', 'task__difficulty', 'task__is_random')
+    for log in logs:
+        assigned = counters.get(timezone.localdate(log.assigned_at))
+        if assigned is not None:
+            assigned['assigned'] += 1
+            if log.status == 'missed':
+                assigned['missed'] += 1
+        if log.status == 'completed' and log.completed_at:
+            completed = counters.get(timezone.localdate(log.completed_at))
+            if completed is not None:
+                completed['completed'] += 1
+                completed['exp_gained'] += calculate_task_exp(log.task)
+    UserDailyActivity.objects.bulk_create(
+        [UserDailyActivity(user=user, date=day, **values) for day, values in counters.items()],
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=['assigned', 'completed', 'missed', 'exp_gained'],
+    )
+
+def award_completion_titles(user, log, previous_activity_date, attribute_deltas=None, completed_today=None):
+    """Emit the completion, streak and attribute-change title events for a new completed log.
+
+    Call after user.update_streak(), passing the last_activity_date from
+    before it. Returns the newly earned title keys.
+    """
+    if completed_today is None:
+        completed_today = UserDailyActivity.objects.filter(
+            user=user, date=timezone.localdate(log.completed_at)
+        ).values_list('completed', flat=True).first() or 0
+    return award_titles(user, [
+        completion_event(log.completed_at, completed_today),
+        streak_event(user, previous_activity_date),
+        attribute_event(user, attribute_deltas),
+    ])
 
 class TaskCompleteView(APIView):
     """API view for marking tasks as complete or uncomplete"""
+    @transaction.atomic
     def post(self, request):
         user = request.user
         try:
@@ -579,18 +573,18 @@ class TaskCompleteView(APIView):
             task = Task.objects.get(id=task_id, user=user)
 
             # Check if task is already completed today
-            today = date.today()
+            today_start, today_end = day_bounds(date.today())
             existing_log = UserTaskLog.objects.filter(
                 user=user,
                 task=task,
                 status='completed',
-                completed_at__date=today
+                completed_at__gte=today_start,
+                completed_at__lt=today_end
             ).first()
 
-            # Store old level and exp for level-up detection
-            # Store old level and exp for level-up detection
+            # Store old level for level-up detection
             old_level = user.level
-            old_exp = user.exp
+            previous_activity_date = user.last_activity_date
 
             # Build reward string for attribute side-effects
             reward_attr = task.attribute.title()
@@ -602,54 +596,47 @@ class TaskCompleteView(APIView):
                 # Task already completed today - TOGGLE to uncomplete
                 # Subtract EXP when uncompleting
                 exp_lost = calculate_task_exp(task)
-                user.exp = max(0, user.exp - exp_lost)
                 existing_log.delete()
-                # Reverse attribute changes so they persist to DB
-                reverse_attribute_changes(user, reward_str)
+                record_completion_activity(user, existing_log, exp_lost, undo=True)
+                # Reverse attribute changes along with the EXP
+                apply_reward(user, exp=-exp_lost, attribute_deltas=reversed_reward(reward_str))
                 message = "Task marked as incomplete"
             else:
-                # Mark task as completed and add EXP
-                task_log, created = UserTaskLog.objects.get_or_create(
+                # Mark task as completed and add EXP. Always a fresh log:
+                # reusing an earlier day's log would leave today with no
+                # completion record (and break the daily rollup).
+                task_log = UserTaskLog.objects.create(
                     user=user,
                     task=task,
-                    defaults={
-                        'status': 'completed',
-                        'completed_at': timezone.now()
-                    }
+                    status='completed',
+                    completed_at=timezone.now()
                 )
 
-                if not created and task_log.status != 'completed':
-                    task_log.status = 'completed'
-                    task_log.completed_at = timezone.now()
-                    task_log.save()
-
-                # Add EXP when completing
+                # Add EXP and attribute changes when completing
                 exp_gained = calculate_task_exp(task)
-                user.exp += exp_gained
-                # Apply attribute changes so they persist to DB
-                apply_attribute_changes(user, reward_str)
+                record_completion_activity(user, task_log, exp_gained)
+                attribute_deltas = parse_reward_string(reward_str)
+                apply_reward(user, exp=exp_gained, attribute_deltas=attribute_deltas)
                 message = "Task completed successfully"
 
-            # Update level based on new EXP
-            new_level = calculate_level_from_exp(user.exp)
-            user.level = new_level
-
-            # Check for level up
-            leveled_up = new_level > old_level
-
             # Update streak after task completion/uncompletion
             user.update_streak()
 
-            user.save()
-
             completed_today_count = UserTaskLog.objects.filter(
                 user=user,
                 status='completed',
-                completed_at__date=today
+                completed_at__gte=today_start,
+                completed_at__lt=today_end
             ).count()
 
             total_tasks = Task.objects.filter(user=user).count()
 
+            titles_awarded = []
+            if not existing_log:
+                titles_awarded = award_completion_titles(
+                    user, task_log, previous_activity_date, attribute_deltas, completed_today_count
+                )
+
             return Response({
                 "success": True,
                 "message": message,
@@ -657,56 +644,47 @@ class TaskCompleteView(APIView):
                 "completed_tasks": completed_today_count,
                 "total_tasks": total_tasks,
                 "task_completed": not existing_log,  # Toggle status
-                "user_stats": {
-                    "level": user.level,
-                    "exp": user.exp,
-                    "level_up": leveled_up,
-                    "old_level": old_level,
-                    "next_level_exp": get_exp_for_level(user.level + 1),
-                    "current_level_exp": get_exp_for_level(user.level),
-                    "exp_progress": user.exp - get_exp_for_level(user.level),
-                    "exp_needed": get_exp_for_level(user.level + 1) - get_exp_for_level(user.level)
-                }
+                "user_stats": user_stats(user, old_level),
+                "titles_awarded": titles_awarded,
             })
 
         except (Task.DoesNotExist, User.DoesNotExist):
             return Response({"error": "Task or user not found"}, status=404)
         except Exception as e:
+            # Don't commit a half-applied completion (log without EXP, etc.)
+            transaction.set_rollback(True)
             return Response({"error": str(e)}, status=500)
 
 
 class UserStatsView(APIView):
     """API view for user statistics including streak"""
 
+    @conditional_on_state_version
     def get(self, request):
         user = request.user
         try:
             # Build attribute values from database
             attr_data = {attr.name: attr.value for attr in user.attributes.all()}
-
-            stats = {
-                "level": user.level,
-                "exp": user.exp,
-                "current_streak": user.current_streak,
-                "max_streak": user.max_streak,
-                "last_activity_date": user.last_activity_date.strftime("%Y-%m-%d") if user.last_activity_date else None,
-                "date_joined": user.date_joined.strftime("%Y-%m-%d") if user.date_joined else None,
-                "total_completed_tasks": UserTaskLog.objects.filter(user=user, status='completed').count(),
-                "attributes": attr_data,
-                "level_progress": {
-                    "current_level_exp": get_exp_for_level(user.level),
-                    "next_level_exp": get_exp_for_level(user.level + 1),
-                    "exp_progress": user.exp - get_exp_for_level(user.level),
-                    "exp_needed": get_exp_for_level(user.level + 1) - get_exp_for_level(user.level),
-                    "progress_percentage": int(((user.exp - get_exp_for_level(user.level)) / (get_exp_for_level(user.level + 1) - get_exp_for_level(user.level))) * 100)
-                }
-            }
-
-            return Response(stats)
+            total_completed = UserTaskLog.objects.filter(user=user, status='completed').count()
+            return Response(self.stats(user, attr_data, total_completed))
 
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @staticmethod
+    def stats(user, attributes, total_completed):
+        return {
+            "level": user.level,
+            "exp": user.exp,
+            "current_streak": user.current_streak,
+            "max_streak": user.max_streak,
+            "last_activity_date": user.last_activity_date.strftime("%Y-%m-%d") if user.last_activity_date else None,
+            "date_joined": user.date_joined.strftime("%Y-%m-%d") if user.date_joined else None,
+            "total_completed_tasks": total_completed,
+            "attributes": attributes,
+            "level_progress": level_progress(user)
+        }
+
 class RegisterView(APIView):
     """API view for user registration"""
     permission_classes = [AllowAny]
@@ -742,93 +720,20 @@ class RegisterView(APIView):
                     "error": "Username already exists"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Create user
-            user = User.objects.create(
-                username=username,
-                email=email,
-                password=make_password(password),
-                level=1,
-                current_streak=0,
-                max_streak=0
-            )
-
-            # Create user's main goal
-            Goal.objects.create(
-                user=user,
-                title=goal_title,
-                description=goal_description
-            )
-
-            # Create default tasks for the user
-            default_tasks = [
-                {
-                    'title': '🧠 Practice Algorithm Problem',
-                    'description': 'Complete a coding problem on LeetCode, HackerRank, or CodeWars',
-                    'attribute': 'intelligence',
-                    'difficulty': 2,
-                    'reward_point': 14
-                },
-                {
-                    'title': '📚 Study Tech Documentation',
-                    'description': 'Read 30 pages of technical documentation or programming book',
-                    'attribute': 'intelligence',
-                    'difficulty': 1,
-                    'reward_point': 10
-                },
-                {
-                    'title': '💻 Code Review Session',
-                    'description': 'Review and refactor existing code for better performance',
-                    'attribute': 'discipline',
-                    'difficulty': 2,
-                    'reward_point': 12
-                },
-                {
-                    'title': '🧘‍♀️ Debug Mindfully',
-                    'description': 'Practice focused debugging techniques for 10 minutes',
-                    'attribute': 'discipline',
-                    'difficulty': 1,
-                    'reward_point': 8
-                },
-                {
-                    'title': '🗣️ Tech Presentation',
-                    'description': 'Practice explaining a technical concept or present to team',
-                    'attribute': 'social',
-                    'difficulty': 3,
-                    'reward_point': 20
-                },
-                {
-                    'title': '🧹 Organize Dev Environment',
-                    'description': 'Clean up workspace, organize project files, update IDE settings',
-                    'attribute': 'discipline',
-                    'difficulty': 1,
-                    'reward_point': 8
-                },
-                {
-                    'title': '📝 Technical Journaling',
-                    'description': 'Write about what you learned or challenges you solved today',
-                    'attribute': 'discipline',
-                    'difficulty': 1,
-                    'reward_point': 6
-                },
-                {
-                    'title': '💡 Learn New Technology',
-                    'description': 'Watch a tutorial or read about a new programming tool/framework',
-                    'attribute': 'intelligence',
-                    'difficulty': 2,
-                    'reward_point': 12
-                }
-            ]
-
-            for task_data in default_tasks:
-                Task.objects.create(
-                    user=user,
-                    title=task_data['title'],
-                    description=task_data['description'],
-                    attribute=task_data['attribute'],
-                    difficulty=task_data['difficulty'],
-                    reward_point=task_data['reward_point'],
-                    deadline=timezone.now() + timedelta(days=365)  # 1 year deadline
+            try:
+                user = provision_user(
+                    username,
+                    password=password,
+                    email=email,
+                    goal={'title': goal_title, 'description': goal_description},
+                    tasks=REGISTERED_STARTER_TASKS,
+                    task_lifetime=timedelta(days=365),
                 )
+            except IntegrityError:
+                # Taken by a concurrent registration since the check above
+                return Response({
+                    "error": "Username already exists"
+                }, status=status.HTTP_400_BAD_REQUEST)
 
             token, _ = Token.objects.get_or_create(user=user)
             return Response({
@@ -905,7 +810,8 @@ class UpgradeGuestView(APIView):
             user.username = username
             user.email = email
             user.set_password(password)
-            user.save()
+            # Only these: EXP, level and state_version are written with F()
+            user.save(update_fields=['username', 'email', 'password'])
         except IntegrityError:
             # Another request claimed this username between the check above
             # and this save (two guests racing for the same name).
@@ -969,31 +875,7 @@ class GuestLoginView(APIView):
         if not re.match(r'^guest_[a-z0-9]{1,12}$', guest_id):
             return Response({'error': 'Invalid guest ID'}, status=status.HTTP_400_BAD_REQUEST)
 
-        user, created = User.objects.get_or_create(
-            username=guest_id,
-            defaults={
-                'password': make_password(secrets.token_urlsafe(16)),
-                'level': 1, 'exp': 0, 'current_streak': 0, 'max_streak': 0,
-            }
-        )
-        if created:
-            for attr_name in ['intelligence', 'discipline', 'energy', 'social', 'wellness', 'stress']:
-                UserAttribute.objects.create(user=user, name=attr_name, value=0)
-            Goal.objects.create(
-                user=user,
-                title='Getting Started',
-                description='Learn how to use the gamified productivity system',
-            )
-            default_deadline = timezone.now() + timedelta(days=3650)
-            for td in [
-                {'title': '🧹 Organise workspace',  'description': 'Clean and organise your desk',         'reward_point': 6, 'difficulty': 1, 'attribute': 'discipline'},
-                {'title': '📝 Write journal entry', 'description': "Reflect on today's experiences",      'reward_point': 5, 'difficulty': 1, 'attribute': 'discipline'},
-                {'title': '🏃 30-minute workout',   'description': 'Include cardio and strength training', 'reward_point': 9, 'difficulty': 2, 'attribute': 'energy'},
-                {'title': '💻 Practice coding',     'description': 'Solve a Leetcode problem',             'reward_point': 8, 'difficulty': 2, 'attribute': 'intelligence'},
-                {'title': '🧘 Meditation',          'description': '10 minutes of mindfulness',            'reward_point': 4, 'difficulty': 1, 'attribute': 'energy'},
-                {'title': '📚 Learn something new', 'description': 'Read an educational article',          'reward_point': 7, 'difficulty': 1, 'attribute': 'intelligence'},
-            ]:
-                Task.objects.create(user=user, deadline=default_deadline, **td)
+        user = get_or_create_user(guest_id)
 
         token, _ = Token.objects.get_or_create(user=user)
         return Response({'username': guest_id, 'token': token.key})
@@ -1001,63 +883,73 @@ class GuestLoginView(APIView):
 
 class WeeklyStatsView(APIView):
     """API view for weekly task completion statistics"""
+    @conditional_on_state_version
     def get(self, request):
         user = request.user
         try:
 
             # Calculate date range for current week (Monday to Sunday)
             today = date.today()
-            monday = today - timedelta(days=today.weekday())
-            sunday = monday + timedelta(days=6)
-
-            # Get completed tasks for this week
-            completed_this_week = UserTaskLog.objects.filter(
-                user=user,
-                status='completed',
-                completed_at__date__gte=monday,
-                completed_at__date__lte=sunday
-            ).count()
+            monday, sunday = self.week(today)
 
-            # Get daily breakdown for the week
-            daily_stats = []
-            for i in range(7):
-                day = monday + timedelta(days=i)
-                day_name = day.strftime('%A')[:3]  # Mon, Tue, Wed, etc.
-                completed_count = UserTaskLog.objects.filter(
+            # At most seven rollup rows give the daily breakdown; the week
+            # total is just their sum.
+            completed_by_day = dict(
+                UserDailyActivity.objects.filter(
                     user=user,
-                    status='completed',
-                    completed_at__date=day
-                ).count()
-
-                daily_stats.append({
-                    'date': day.strftime('%Y-%m-%d'),
-                    'day_name': day_name,
-                    'completed_tasks': completed_count,
-                    'is_today': day == today
-                })
+                    date__range=(monday, sunday)
+                ).values_list('date', 'completed')
+            )
 
             # Get total tasks available (for completion percentage)
             total_tasks = Task.objects.filter(user=user).count()
 
-            # Calculate weekly completion percentage
-            max_possible_completions = total_tasks * 7  # 7 days
-            completion_percentage = (completed_this_week / max_possible_completions * 100) if max_possible_completions > 0 else 0
-
-            return Response({
-                'week_start': monday.strftime('%Y-%m-%d'),
-                'week_end': sunday.strftime('%Y-%m-%d'),
-                'total_completed_this_week': completed_this_week,
-                'total_available_tasks': total_tasks,
-                'completion_percentage': round(completion_percentage, 1),
-                'daily_breakdown': daily_stats
-            })
+            return Response(self.stats(today, completed_by_day, total_tasks))
 
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @staticmethod
+    def week(today):
+        """(Monday, Sunday) of today's week"""
+        monday = today - timedelta(days=today.weekday())
+        return monday, monday + timedelta(days=6)
+
+    @classmethod
+    def stats(cls, today, completed_by_day, total_tasks):
+        monday, sunday = cls.week(today)
+        completed_this_week = sum(completed_by_day.values())
+
+        # Get daily breakdown for the week
+        daily_stats = []
+        for i in range(7):
+            day = monday + timedelta(days=i)
+            day_name = day.strftime('%A')[:3]  # Mon, Tue, Wed, etc.
+
+            daily_stats.append({
+                'date': day.strftime('%Y-%m-%d'),
+                'day_name': day_name,
+                'completed_tasks': completed_by_day.get(day, 0),
+                'is_today': day == today
+            })
+
+        # Calculate weekly completion percentage
+        max_possible_completions = total_tasks * 7  # 7 days
+        completion_percentage = (completed_this_week / max_possible_completions * 100) if max_possible_completions > 0 else 0
+
+        return {
+            'week_start': monday.strftime('%Y-%m-%d'),
+            'week_end': sunday.strftime('%Y-%m-%d'),
+            'total_completed_this_week': completed_this_week,
+            'total_available_tasks': total_tasks,
+            'completion_percentage': round(completion_percentage, 1),
+            'daily_breakdown': daily_stats
+        }
+
 
 class DynamicTaskCompleteView(APIView):
     """API view for completing dynamic tasks (daily tasks, time-limited tasks)"""
+    @transaction.atomic
     def post(self, request):
         user = request.user
         task_title = request.data.get('task_title', '')
@@ -1068,9 +960,9 @@ class DynamicTaskCompleteView(APIView):
 
         try:
 
-            # Store old level and exp for level-up detection
+            # Store old level for level-up detection
             old_level = user.level
-            old_exp = user.exp
+            previous_activity_date = user.last_activity_date
 
             # For time-limited tasks, create unique task each time to allow multiple completions
             if task_type == 'time_limited':
@@ -1089,7 +981,7 @@ class DynamicTaskCompleteView(APIView):
                     is_random=True
                 )
 
-                UserTaskLog.objects.create(
+                task_log = UserTaskLog.objects.create(
                     user=user,
                     task=task,
                     status='completed',
@@ -1098,36 +990,19 @@ class DynamicTaskCompleteView(APIView):
 
                 # Add EXP when completing time-limited task
                 exp_gained = calculate_task_exp(task)
-                user.exp += exp_gained
-
-                # Update level based on new EXP
-                new_level = calculate_level_from_exp(user.exp)
-                user.level = new_level
-
-                # Check for level up
-                leveled_up = new_level > old_level
+                record_completion_activity(user, task_log, exp_gained)
+                apply_reward(user, exp=exp_gained)
 
                 # Update user streak
                 user.update_streak()
 
-                # Save user changes
-                user.save()
-
                 return Response({
                     'success': True,
                     'message': f'Time-limited task completed successfully',
                     'task_completed': True,
                     'streak': user.current_streak,
-                    'user_stats': {
-                        'level': user.level,
-                        'exp': user.exp,
-                        'level_up': leveled_up,
-                        'old_level': old_level,
-                        'next_level_exp': get_exp_for_level(user.level + 1),
-                        'current_level_exp': get_exp_for_level(user.level),
-                        'exp_progress': user.exp - get_exp_for_level(user.level),
-                        'exp_needed': get_exp_for_level(user.level + 1) - get_exp_for_level(user.level)
-                    }
+                    'user_stats': user_stats(user, old_level),
+                    'titles_awarded': award_completion_titles(user, task_log, previous_activity_date),
                 })
 
             else:
@@ -1144,59 +1019,44 @@ class DynamicTaskCompleteView(APIView):
                         'is_random': True
                     }
                 )
+                if created:
+                    DailySelection.invalidate(user)
 
-                today = date.today()
+                today_start, today_end = day_bounds(date.today())
                 existing_log = UserTaskLog.objects.filter(
                     user=user,
                     task=task,
                     status='completed',
-                    completed_at__date=today
+                    completed_at__gte=today_start,
+                    completed_at__lt=today_end
                 ).first()
 
                 if not existing_log:
-                    UserTaskLog.objects.create(
+                    task_log = UserTaskLog.objects.create(
                         user=user,
                         task=task,
                         status='completed',
                         completed_at=timezone.now()
                     )
 
-                    # Add EXP when completing daily task
+                    # Add EXP and the reward string's attribute changes
                     exp_gained = calculate_task_exp(task)
-                    user.exp += exp_gained
-
-                    # Apply attribute changes from reward string
-                    if reward_string:
-                        apply_attribute_changes(user, reward_string)
-
-                    # Update level based on new EXP
-                    new_level = calculate_level_from_exp(user.exp)
-                    user.level = new_level
-
-                    # Check for level up
-                    leveled_up = new_level > old_level
+                    record_completion_activity(user, task_log, exp_gained)
+                    attribute_deltas = parse_reward_string(reward_string)
+                    apply_reward(user, exp=exp_gained, attribute_deltas=attribute_deltas)
 
                     # Update user streak
                     user.update_streak()
 
-                    # Save user changes
-                    user.save()
-
                     return Response({
                         'success': True,
                         'message': f'Daily task completed successfully',
                         'task_completed': True,
                         'streak': user.current_streak,
-                        'user_stats': {
-                            'level': user.level,
-                            'exp': user.exp,
-                            'level_up': leveled_up,
-                            'old_level': old_level,
-                            'next_level_exp': get_exp_for_level(user.level + 1),
-                            'current_level_exp': get_exp_for_level(user.level),
-                            'exp_progress': user.exp - get_exp_for_level(user.level),
-                            'exp_needed': get_exp_for_level(user.level + 1) - get_exp_for_level(user.level)
-                        }
+                        'user_stats': user_stats(user, old_level),
+                        'titles_awarded': award_completion_titles(
+                            user, task_log, previous_activity_date, attribute_deltas
+                        ),
                     })
                 else:
                     return Response({
@@ -1212,87 +1072,54 @@ class DynamicTaskCompleteView(APIView):
                 'error': 'User not found'
             }, status=404)
         except Exception as e:
+            transaction.set_rollback(True)
             return Response({
                 'success': False,
                 'error': str(e)
             }, status=500)
 
 
+def resolve_task_by_title(user, title):
+    """The user's task a title sent back by the frontend refers to, or None.
+
+    Matches on normalize_title() with one indexed query; an exact title
+    match wins over other tasks that normalize the same way.
+    """
+    key = normalize_title(title)
+    if not key:
+        return Task.objects.filter(user=user, title=title).first()
+    return (
+        Task.objects.filter(user=user, normalized_title=key)
+        .order_by(Case(When(title=title, then=Value(0)), default=Value(1)), 'pk')
+        .first()
+    )
+
+
 class DynamicTaskUncompleteView(APIView):
-    """API view for uncompleting dynamic daily tasks"""
+    """API view for uncompleting dynamic daily tasks.
+
+    Takes the task's task_id where the frontend has it, falling back to
+    task_title (see resolve_task_by_title) for tasks it only knows by name.
+    """
+    @transaction.atomic
     def post(self, request):
         user = request.user
+        task_id = request.data.get('task_id')
         task_title = request.data.get('task_title', '')
         reward_string = request.data.get('reward_string', '')  # For reversing attribute changes
 
-        logger.info(f"DynamicTaskUncompleteView: Uncompleting task '{task_title}' for user '{user.username}'")
-        logger.info(f"Request data: {request.data}")
-
         try:
-            logger.info(f"Found user: {user.username}")
-
-            # Find the task by title for this user (both random and regular tasks)
-            # First try exact match
-            task = Task.objects.filter(
-                title=task_title,
-                user=user
-            ).first()
-
-            # If exact match fails, try partial match for common title mismatches
-            if not task:
-                # Try to find task by removing emojis and checking if core title matches
-                core_title = re.sub(r'[^\w\s-]', '', task_title).strip()
-
-                # Remove potential timestamp from the search title
-                clean_search_title = re.sub(r' - \d{2}:\d{2}:\d{2}$', '', task_title)
-                clean_core_title = re.sub(r'[^\w\s-]', '', clean_search_title).strip()
-
-                # Enhanced fallback search strategies
-                possible_titles = [
-                    task_title,
-                    task_title.strip(),
-                    clean_search_title,
-                    clean_core_title
-                ]
-
-                # Also try removing common emoji patterns and special characters
-                emoji_cleaned = re.sub(r'[^\w\s-]', '', task_title).strip()
-                possible_titles.append(emoji_cleaned)
-
-                # Try various matching strategies
-                for search_title in possible_titles:
-                    if search_title:
-                        # Try exact match first
-                        task = Task.objects.filter(title=search_title, user=user).first()
-                        if task:
-                            break
-
-                        # Try case-insensitive contains match
-                        task = Task.objects.filter(title__icontains=search_title, user=user).first()
-                        if task:
-                            break
-
-                # If still not found, try finding by similar keywords
-                if not task and len(clean_core_title) > 3:
-                    words = clean_core_title.lower().split()
-                    for word in words:
-                        if len(word) > 3:  # Only search meaningful words
-                            task = Task.objects.filter(title__icontains=word, user=user).first()
-                            if task:
-                                logger.info(f"Found task by keyword '{word}': {task.title}")
-                                break
-
-            logger.info(f"Task search result: {task}")
-            if task:
-                logger.info(f"Found task ID: {task.id}, Title: '{task.title}'")
+            if task_id is not None:
+                try:
+                    task_id = int(task_id)
+                except (TypeError, ValueError):
+                    return Response({'success': False, 'error': 'task_id must be an integer'}, status=400)
+                task = Task.objects.filter(pk=task_id, user=user).first()
+            else:
+                task = resolve_task_by_title(user, task_title)
 
             if not task:
-                logger.warning(f"Task '{task_title}' not found for user '{username}'")
-                # List all tasks for debugging
-                all_tasks = Task.objects.filter(user=user)
-                logger.info(f"Available tasks for user '{username}':")
-                for t in all_tasks:
-                    logger.info(f"  ID: {t.id}, Title: '{t.title}'")
+                logger.warning(f"Dynamic task {task_id or repr(task_title)} not found for user '{user.username}'")
                 return Response({
                     'success': False,
                     'error': 'Dynamic task not found'
@@ -1300,61 +1127,39 @@ class DynamicTaskUncompleteView(APIView):
 
             # Find today's completion log for this task
             today = date.today()
-            completion_logs = UserTaskLog.objects.filter(
+            today_start, today_end = day_bounds(today)
+            completion_log = UserTaskLog.objects.filter(
                 user=user,
                 task=task,
                 status='completed',
-                completed_at__date=today
-            )
-
-            logger.info(f"Found {completion_logs.count()} completion logs for task '{task_title}' on {today}")
-
-            completion_log = completion_logs.first()
+                completed_at__gte=today_start,
+                completed_at__lt=today_end
+            ).first()
 
             if completion_log:
-                # Store old level and exp for level-up detection
+                # Store old level for the response
                 old_level = user.level
-                old_exp = user.exp
 
-                # Subtract EXP when uncompleting
+                # Subtract EXP and reverse attribute changes when uncompleting
                 exp_lost = calculate_task_exp(task)
-                user.exp = max(0, user.exp - exp_lost)
-
-                # Reverse attribute changes
-                if reward_string:
-                    reverse_attribute_changes(user, reward_string)
-
-                # Update level based on new EXP
-                new_level = calculate_level_from_exp(user.exp)
-                user.level = new_level
+                apply_reward(user, exp=-exp_lost, attribute_deltas=reversed_reward(reward_string))
 
                 # Delete the completion log
                 log_id = completion_log.id
                 completion_log.delete()
+                record_completion_activity(user, completion_log, exp_lost, undo=True)
                 logger.info(f"Deleted completion log with ID {log_id}")
 
                 # Update user streak
                 user.update_streak()
                 logger.info(f"Updated user streak to {user.current_streak}")
 
-                # Save user changes
-                user.save()
-
                 return Response({
                     'success': True,
                     'message': 'Daily task uncompleted successfully',
                     'task_completed': False,
                     'streak': user.current_streak,
-                    'user_stats': {
-                        'level': user.level,
-                        'exp': user.exp,
-                        'level_up': False,
-                        'old_level': old_level,
-                        'next_level_exp': get_exp_for_level(user.level + 1),
-                        'current_level_exp': get_exp_for_level(user.level),
-                        'exp_progress': user.exp - get_exp_for_level(user.level),
-                        'exp_needed': get_exp_for_level(user.level + 1) - get_exp_for_level(user.level)
-                    }
+                    'user_stats': user_stats(user, old_level)
                 })
             else:
                 return Response({
@@ -1365,6 +1170,7 @@ class DynamicTaskUncompleteView(APIView):
                 })
 
         except Exception as e:
+            transaction.set_rollback(True)
             return Response({
                 'success': False,
                 'error': str(e)
@@ -1372,118 +1178,217 @@ class DynamicTaskUncompleteView(APIView):
 
 
 class CompletedTasksHistoryView(APIView):
-    """API view to get user's completed tasks history"""
-    def get(self, request):
-        user = request.user
-        limit = int(request.GET.get('limit', 50))  # Default to 50 recent completed tasks
+    """
+    GET /api/tasks/completed-history/?limit=50&cursor=...
+    Completed tasks, newest first, a page at a time: pass next_cursor back as
+    cursor for the next page (it is null on the last one). Pages are keyset
+    ranges on (completed_at, id), so deep pages cost the same as the first.
 
-        logger.info(f"CompletedTasksHistoryView: Fetching completed tasks for user '{user.username}' (limit: {limit})")
+    ?export=1 streams the whole history as one JSON array instead, reading
+    the logs in chunks rather than all at once.
+    """
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 100
+    EXPORT_CHUNK_SIZE = 2000
+    TASK_FIELDS = ('id', 'display_title', 'description', 'reward_point', 'difficulty', 'attribute')
+
+    def get(self, request):
+        logs = (
+            UserTaskLog.objects.filter(user=request.user, status='completed', completed_at__isnull=False)
+            .select_related('task')
+            .only('completed_at', *(f'task__{field}' for field in self.TASK_FIELDS))
+            .order_by('-completed_at', '-id')
+        )
+        if request.GET.get('export', '').lower() in ('1', 'true', 'yes'):
+            return self.export(logs)
 
         try:
+            limit = int(request.GET.get('limit', self.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return Response({'success': False, 'error': 'limit must be an integer'}, status=400)
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
 
-            # Get completed task logs with task details
-            completed_logs = UserTaskLog.objects.filter(
-                user=user,
-                status='completed'
-            ).select_related('task').order_by('-completed_at')[:limit]
-
-            logger.info(f"Found {completed_logs.count()} completed task logs")
-
-            completed_tasks = []
-            for log in completed_logs:
-                task = log.task
-                # Clean task title by removing timestamp pattern (e.g., " - 14:25:35")
-                clean_title = task.title
-                clean_title = re.sub(r' - \d{2}:\d{2}:\d{2}$', '', clean_title)
-
-                completed_tasks.append({
-                    'id': task.id,
-                    'title': clean_title,  # Use cleaned title without timestamp
-                    'description': task.description,
-                    'reward_point': task.reward_point,
-                    'difficulty': task.difficulty,
-                    'attribute': task.attribute,
-                    'completed_at': log.completed_at.strftime('%Y-%m-%d'),
-                    'completed_time': log.completed_at.strftime('%H:%M')
-                })
+        cursor = request.GET.get('cursor')
+        if cursor:
+            try:
+                completed_at, log_id = self.decode_cursor(cursor)
+            except ValueError:
+                return Response({'success': False, 'error': 'Invalid cursor'}, status=400)
+            logs = logs.filter(Q(completed_at__lt=completed_at) | Q(completed_at=completed_at, id__lt=log_id))
+
+        page = list(logs[:limit + 1])
+        next_cursor = self.encode_cursor(page[limit - 1]) if len(page) > limit else None
+        page = page[:limit]
+        return Response({
+            'success': True,
+            'completed_tasks': [self.entry(log) for log in page],
+            'total_count': len(page),
+            'next_cursor': next_cursor,
+        })
 
-            return Response({
-                'success': True,
-                'completed_tasks': completed_tasks,
-                'total_count': len(completed_tasks)
-            })
+    def export(self, logs):
+        # An async iterator, like the chat stream: under ASGI Django would
+        # collect a sync one into a list before sending the first byte.
+        async def chunks():
+            yield '['
+            first = True
+            async for log in logs.aiterator(chunk_size=self.EXPORT_CHUNK_SIZE):
+                yield ('' if first else ',') + json.dumps(self.entry(log))
+                first = False
+            yield ']'
+
+        response = StreamingHttpResponse(chunks(), content_type='application/json')
+        response['Content-Disposition'] = 'attachment; filename="completed-tasks.json"'
+        return response
+
+    @staticmethod
+    def entry(log):
+        task = log.task
+        return {
+            'id': task.id,
+            'title': task.display_title,
+            'description': task.description,
+            'reward_point': task.reward_point,
+            'difficulty': task.difficulty,
+            'attribute': task.attribute,
+            'completed_at': log.completed_at.strftime('%Y-%m-%d'),
+            'completed_time': log.completed_at.strftime('%H:%M'),
+        }
 
-        except Exception as e:
-            return Response({
-                'success': False,
-                'error': str(e),
-                'completed_tasks': [],
-                'total_count': 0
-            })
+    @staticmethod
+    def encode_cursor(log):
+        raw = f"{log.completed_at.isoformat()}|{log.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """(completed_at, id) from encode_cursor(); ValueError if it isn't one"""
+        completed_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        completed_at = datetime.fromisoformat(completed_at)
+        if timezone.is_naive(completed_at):
+            raise ValueError(cursor)
+        return completed_at, int(log_id)
 
 
 class ProgressStatsView(APIView):
-    """API view to get user's progress statistics"""
+    """
+    GET /api/user/progress/?range=today|week|month
+    GET /api/user/progress/?start=2026-01-01&end=2026-03-31&granularity=week
+
+    Totals for the period, summed from the UserDailyActivity rollup. With a
+    granularity (day, week or month) the response also carries a "series"
+    with the totals per day/week/month, gaps included, for charts. Both come
+    from one query: a GROUP BY per bucket, whose rows also make the totals.
+    """
+    GRANULARITIES = ('day', 'week', 'month')
+    MAX_PERIOD_DAYS = 3 * 366
+
     def get(self, request):
         user = request.user
-        range_type = request.GET.get('range', 'today')  # today, week, month
-
         try:
-            today = date.today()
-
-            if range_type == 'today':
-                start_date = today
-                end_date = today
-            elif range_type == 'week':
-                # Calculate start of week (Monday)
-                start_date = today - timedelta(days=today.weekday())
-                end_date = today
-            elif range_type == 'month':
-                start_date = today.replace(day=1)
-                end_date = today
-            else:
-                start_date = today
-                end_date = today
-
-            # Get assigned tasks in the date range
-            assigned_tasks = UserTaskLog.objects.filter(
-                user=user,
-                assigned_at__date__range=[start_date, end_date]
+            range_type, start_date, end_date = self.period(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        granularity = request.GET.get('granularity')
+        if granularity is not None and granularity not in self.GRANULARITIES:
+            return Response(
+                {"error": f"granularity must be one of {', '.join(self.GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-            total_assigned = assigned_tasks.count()
-            total_completed = assigned_tasks.filter(status='completed').count()
+        days = UserDailyActivity.objects.filter(user=user, date__range=(start_date, end_date))
+        sums = {'assigned': Sum('assigned'), 'completed': Sum('completed'), 'missed': Sum('missed')}
+        if granularity:
+            bucket = {'day': F('date'), 'week': TruncWeek('date'), 'month': TruncMonth('date')}[granularity]
+            rows = {
+                row['bucket']: row
+                for row in days.annotate(bucket=bucket).values('bucket').annotate(**sums).order_by('bucket')
+            }
+            series = []
+            period_start = self.bucket_start(start_date, granularity)
+            while period_start <= end_date:
+                row = rows.get(period_start, {})
+                series.append(self.counts(row, start=period_start.strftime('%Y-%m-%d')))
+                period_start = self.next_bucket(period_start, granularity)
+            totals = {name: sum(row[name] or 0 for row in rows.values()) for name in sums}
+        else:
+            totals = days.aggregate(**sums)
+
+        counts = self.counts(totals)
+        response = {
+            "range": range_type,
+            "period": {
+                "start": start_date.strftime('%Y-%m-%d'),
+                "end": end_date.strftime('%Y-%m-%d')
+            },
+            "assigned": counts['assigned'],
+            "completed": counts['completed'],
+            "completion_rate": counts['completion_rate'],
+            "streak": user.current_streak,
+            "details": {
+                "pending": counts['pending'],
+                "missed": counts['missed']
+            }
+        }
+        if granularity:
+            response['granularity'] = granularity
+            response['series'] = series
+        return Response(response)
 
-            # Calculate completion rate
-            completion_rate = total_completed / total_assigned if total_assigned > 0 else 0
+    def period(self, request):
+        """(range label, start date, end date); ValueError with a message if malformed"""
+        today = date.today()
+        if 'start' in request.GET or 'end' in request.GET:
+            try:
+                start_date = date.fromisoformat(request.GET['start'])
+                end_date = date.fromisoformat(request.GET.get('end') or today.isoformat())
+            except KeyError:
+                raise ValueError("start is required with end")
+            except ValueError:
+                raise ValueError("start and end must be dates (YYYY-MM-DD)")
+            if start_date > end_date:
+                raise ValueError("start must not be after end")
+            if (end_date - start_date).days >= self.MAX_PERIOD_DAYS:
+                raise ValueError(f"The period can be at most {self.MAX_PERIOD_DAYS} days")
+            return 'custom', start_date, end_date
 
-            # Get current streak
-            current_streak = user.current_streak
+        range_type = request.GET.get('range', 'today')  # today, week, month
+        if range_type == 'week':
+            # Calculate start of week (Monday)
+            return range_type, today - timedelta(days=today.weekday()), today
+        if range_type == 'month':
+            return range_type, today.replace(day=1), today
+        return range_type, today, today
+
+    @staticmethod
+    def counts(sums, **extra):
+        assigned = sums.get('assigned') or 0
+        completed = sums.get('completed') or 0
+        missed = sums.get('missed') or 0
+        return {
+            **extra,
+            'assigned': assigned,
+            'completed': completed,
+            'missed': missed,
+            'pending': max(0, assigned - completed - missed),
+            'completion_rate': round(completed / assigned, 2) if assigned > 0 else 0,
+        }
 
-            return Response({
-                "range": range_type,
-                "period": {
-                    "start": start_date.strftime('%Y-%m-%d'),
-                    "end": end_date.strftime('%Y-%m-%d')
-                },
-                "assigned": total_assigned,
-                "completed": total_completed,
-                "completion_rate": round(completion_rate, 2),
-                "streak": current_streak,
-                "details": {
-                    "pending": assigned_tasks.filter(status='pending').count(),
-                    "missed": assigned_tasks.filter(status='missed').count()
-                }
-            })
+    @staticmethod
+    def bucket_start(day, granularity):
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
 
-        except User.DoesNotExist:
-            return Response({
-                "error": "User not found"
-            }, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({
-                "error": str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    @staticmethod
+    def next_bucket(day, granularity):
+        if granularity == 'week':
+            return day + timedelta(days=7)
+        if granularity == 'month':
+            return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return day + timedelta(days=1)
 
 
 class RootView(APIView):
@@ -1685,25 +1590,13 @@ You MUST respond with valid JSON only — no markdown fences, no extra text. Sch
   "evaluation": "<optional: 1 sentence evaluating host's recent performance>"
 }}"""
 
-def _build_user_prompt(user, context_type: str, user_message: str) -> str:
-    attrs = {a.name: a.value for a in UserAttribute.objects.filter(user=user)}
-    goal = Goal.objects.filter(user=user).first()
-    goal_title = goal.title if goal else 'No goal set'
-    goal_desc = goal.description if goal else ''
-
-    week_ago = date.today() - timedelta(days=7)
-    recent_logs = UserTaskLog.objects.filter(
-        user=user, assigned_at__date__gte=week_ago
-    )
-    total = recent_logs.count()
-    completed = recent_logs.filter(status='completed').count()
-    completion_rate = round((completed / total * 100) if total > 0 else 0)
-
-    recent_titles = list(
-        UserTaskLog.objects.filter(user=user, status='completed')
-        .order_by('-completed_at')
-        .values_list('task__title', flat=True)[:3]
-    )
+def _build_user_prompt(snapshot, context_type: str, user_message: str) -> str:
+    user = snapshot.user
+    attrs = snapshot.attributes
+    goal_title = snapshot.goal_title or 'No goal set'
+    goal_desc = snapshot.goal_description
+    completion_rate = snapshot.completion_rate
+    recent_titles = snapshot.recent_titles
 
     context_instructions = {
         'morning_brief': (
@@ -1731,100 +1624,192 @@ Context: {context_type}
 {context_instructions}"""
 
 
-def _award_title(user, title_key: str) -> bool:
-    """Award a title if not already earned. Returns True if newly awarded."""
-    _, created = UserTitle.objects.get_or_create(user=user, title_key=title_key)
-    if created:
-        UserTitle.objects.filter(user=user, is_active=True).update(is_active=False)
-        UserTitle.objects.filter(user=user, title_key=title_key).update(is_active=True)
-    return created
+def _call_ai_provider(system_prompt, user_prompt):
+    """Call the configured AI provider (settings.AI_PROVIDER) and return its raw text response."""
+    return get_provider().complete(system_prompt, user_prompt)
 
 
-def _check_and_award_titles(user) -> list:
-    """Check all title conditions and award any newly earned titles."""
-    awarded = []
-    attrs = {a.name: a.value for a in UserAttribute.objects.filter(user=user)}
+def _stream_ai_provider(system_prompt, user_prompt):
+    """Like _call_ai_provider, but yields the raw text in chunks as it's generated."""
+    yield from get_provider().stream(system_prompt, user_prompt)
 
-    if user.current_streak >= 7:
-        if _award_title(user, 'iron_will'):
-            awarded.append('iron_will')
 
-    if attrs.get('intelligence', 0) >= 200:
-        if _award_title(user, 'consistent_scholar'):
-            awarded.append('consistent_scholar')
+class SystemChatError(Exception):
+    """The AI provider call failed or returned something unusable.
 
-    today_completed = UserTaskLog.objects.filter(
-        user=user, status='completed', completed_at__date=date.today()
-    ).count()
-    if today_completed >= 5:
-        if _award_title(user, 'overachiever'):
-            awarded.append('overachiever')
+    The message is safe to show the client; the underlying detail is logged.
+    """
 
-    return awarded
 
+def _parse_ai_response(raw):
+    raw = raw.strip()
+    # Strip markdown fences if present
+    if raw.startswith('```'):
+        raw = re.sub(r'^```\w*\n?', '', raw)
+        raw = re.sub(r'\n?```$', '', raw)
+    parsed = json.loads(raw)
+    if not isinstance(parsed, dict):
+        raise ValueError('model returned non-object JSON')
+    return parsed
+
+
+@transaction.atomic
+def _persist_chat_result(snapshot, context_type, parsed):
+    """Save the missions, titles and SystemLog for a parsed AI reply; returns the response payload"""
+    user = snapshot.user
+    system_message = parsed.get('system_message', '')
+    missions_data = parsed.get('missions', [])
+    evaluation = parsed.get('evaluation', '')
+    if not isinstance(missions_data, list):
+        missions_data = []
+
+    # Persist missions as Tasks in one INSERT. Every model-supplied field
+    # goes through MISSION_SCHEMA — the model's output is not trusted to fit
+    # the schema.
+    missions = [
+        (m, fields) for m in missions_data if (fields := MISSION_SCHEMA.clean(m)) is not None
+    ]
+    deadline = timezone.now() + timedelta(days=1)
+    # bulk_create skips Task.save(), so derive its fields here.
+    tasks = Task.objects.bulk_create([
+        Task(
+            user=user,
+            deadline=deadline,
+            is_random=False,
+            **derived_task_fields(fields['title'], fields['description']),
+            **fields,
+        )
+        for _, fields in missions
+    ])
+    created_missions = [
+        {
+            'id': task.id,
+            'title': task.title,
+            'description': task.description,
+            'mission_type': task.mission_type,
+            'attribute': task.attribute,
+            'reward': m.get('reward', f'+{task.reward_point} {task.attribute.title()}'),
+            'difficulty': task.difficulty,
+            'flavor_text': task.system_flavor,
+            'prefix': MISSION_PREFIXES.get(task.mission_type, '◈'),
+        }
+        for (m, _), task in zip(missions, tasks)
+    ]
+
+    if created_missions:
+        DailySelection.invalidate(user)
+    User.bump_state_version(user)
+
+    # First contact, plus anything the snapshot shows was met earlier
+    titles_awarded = award_titles(user, snapshot_events(snapshot), earned=snapshot.earned_titles)
+
+    # Persist system log
+    log_content = system_message
+    if evaluation:
+        log_content += f'\n\n[Evaluation] {evaluation}'
+    # message_type drives the label in the chat history — 'daily_brief'
+    # renders as "Morning Brief" in SystemMessageBox.
+    log_type_map = {'morning_brief': 'daily_brief', 'evening_eval': 'evening_eval'}
+    SystemLog.objects.create(
+        user=user,
+        message_type=log_type_map.get(context_type, 'chat_response'),
+        content=log_content,
+        missions_issued=created_missions,
+    )
+    snapshot.has_system_log = True
+
+    return {
+        'system_message': system_message,
+        'evaluation': evaluation,
+        'missions': created_missions,
+        'titles_awarded': titles_awarded,
+        'personality': user.system_personality,
+    }
 
-def _call_ai_provider(system_prompt, user_prompt):
-    """Call the configured AI provider and return its raw text response.
-
-    AI_PROVIDER selects the backend ('nvidia' by default, or 'anthropic').
-    NVIDIA's hosted NIM API (sign up at build.nvidia.com, calls served from
-    integrate.api.nvidia.com) is free and rate-limited rather than billed
-    per token, which is why it's the default for a guest-accessible
-    endpoint — 'anthropic' stays available as an opt-in for higher-quality
-    output once that cost is worth paying for.
-    """
-    import os
-    provider = os.environ.get('AI_PROVIDER', 'nvidia').lower()
 
-    if provider == 'anthropic':
-        try:
-            import anthropic as _anthropic
-        except ImportError:
-            raise RuntimeError('anthropic package not installed')
-        api_key = os.environ.get('ANTHROPIC_API_KEY', '')
-        if not api_key:
-            raise RuntimeError('ANTHROPIC_API_KEY not configured')
-        client = _anthropic.Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model='claude-haiku-4-5-20251001',
-            max_tokens=1024,
-            system=system_prompt,
-            messages=[{'role': 'user', 'content': user_prompt}],
-        )
-        return response.content[0].text
+# Briefs and evaluations ignore the message text, so their prompt is fully
+# determined by the host's state and repeats until that state changes.
+CACHEABLE_CONTEXT_TYPES = ('morning_brief', 'evening_eval')
 
-    # Default: NVIDIA NIM — OpenAI-compatible endpoint, free tier.
-    try:
-        from openai import OpenAI
-    except ImportError:
-        raise RuntimeError('openai package not installed')
-    api_key = os.environ.get('NVIDIA_API_KEY', '')
-    if not api_key:
-        raise RuntimeError('NVIDIA_API_KEY not configured')
-    client = OpenAI(api_key=api_key, base_url='https://integrate.api.nvidia.com/v1')
-    model = os.environ.get('NVIDIA_MODEL', 'meta/llama-3.1-70b-instruct')
-    response = client.chat.completions.create(
-        model=model,
-        max_tokens=1024,
-        messages=[
-            {'role': 'system', 'content': system_prompt},
-            {'role': 'user', 'content': user_prompt},
-        ],
+brief_cache = ResponseCache(settings.AI_RESPONSE_CACHE_SIZE, settings.AI_RESPONSE_CACHE_TTL)
+# brief_cache is per process; these add up every process's lookups.
+counter_cache = ConnectionProxy(caches, 'counters')
+BRIEF_CACHE_COUNTERS = {True: 'brief_cache_hits', False: 'brief_cache_misses'}
+
+
+def _brief_cache_key(user, context_type, system_prompt, user_prompt):
+    """Fingerprint of a cacheable chat request, or None if it must always reach the model"""
+    if context_type not in CACHEABLE_CONTEXT_TYPES:
+        return None
+    provider = settings.AI_PROVIDER
+    model = settings.AI_PROVIDERS[provider].get('MODEL', '')
+    # The cached payload holds this host's Task ids and today's deadlines,
+    # so it's only ever replayed to the same user on the same day.
+    return brief_cache.fingerprint(
+        user.id, date.today(), system_prompt, user_prompt, provider, model,
+    )
+
+
+def _cached_chat_result(cache_key):
+    """The payload of an earlier identical brief, or None"""
+    if not cache_key:
+        return None
+    payload = brief_cache.get(cache_key)
+    increment(counter_cache, BRIEF_CACHE_COUNTERS[payload is not None])
+    stats = brief_cache.stats()
+    logger.info(
+        f"Brief cache {'hit' if payload is not None else 'miss'} "
+        f"({stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries in this process)"
     )
-    return response.choices[0].message.content
+    if payload is None:
+        return None
+    # Its missions and log entry already exist; nothing new was awarded.
+    return {**payload, 'titles_awarded': []}
+
+
+def run_system_chat(user, context_type, user_message):
+    """Build the prompts, call the AI provider and persist the result.
+
+    A repeat of a recent brief or evaluation (same prompts, same day) is
+    answered from brief_cache instead, without creating its Tasks again.
+    Returns the payload SystemChatJobView serves for a finished job.
+    Raises SystemChatError if the provider call or its JSON fails.
+    """
+    snapshot = UserContextSnapshot.load(user)
+    system_prompt = _build_system_prompt(user.system_personality or 'logical')
+    user_prompt = _build_user_prompt(snapshot, context_type, user_message)
+    cache_key = _brief_cache_key(user, context_type, system_prompt, user_prompt)
+    cached = _cached_chat_result(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        parsed = _parse_ai_response(_call_ai_provider(system_prompt, user_prompt))
+    except Exception as e:
+        # Log the detail but keep it out of the response — SDK errors can
+        # include request IDs and upstream bodies the client shouldn't see.
+        logger.error(f"AI provider error: {e}")
+        raise SystemChatError('AI generation failed. Please try again') from e
+
+    payload = _persist_chat_result(snapshot, context_type, parsed)
+    if cache_key:
+        brief_cache.set(cache_key, payload)
+    return payload
 
 
 class SystemChatView(APIView):
     """
     POST /api/system/chat/
-    Calls the configured AI provider (see _call_ai_provider) and returns a
+    Queues a SystemChatJob and answers 202 with its job id straight away;
+    `manage.py run_chat_worker` makes the AI provider call (see
+    run_system_chat) and the client polls SystemChatJobView for the
     System message + missions.
     Body: { message, context_type }
     """
     # Two throttle layers: per-account (scoped) plus per-IP, so rotating
     # guest accounts cannot dodge the cap on this endpoint. Even the free
     # NVIDIA tier is rate-limited, and the optional Anthropic path is billed.
-    throttle_classes = [ScopedRateThrottle, SystemChatIPThrottle]
+    throttle_classes = [ScopedThrottle, SystemChatIPThrottle]
     throttle_scope = 'system_chat'
 
     # Chat input goes straight into the AI prompt, so it must be bounded.
@@ -1832,127 +1817,133 @@ class SystemChatView(APIView):
 
     VALID_CONTEXT_TYPES = ('morning_brief', 'evening_eval', 'user_input')
 
-    def post(self, request):
-        import json
-
-        user = request.user
+    def clean(self, request):
+        """Validate the request body: ((context_type, message), None) or (None, error Response)"""
         user_message = request.data.get('message', '')
         context_type = request.data.get('context_type', 'user_input')
 
         if not isinstance(user_message, str):
-            return Response({'error': 'Message must be a string'}, status=400)
+            return None, Response({'error': 'Message must be a string'}, status=400)
         user_message = user_message.strip()
         if len(user_message) > self.MAX_MESSAGE_LENGTH:
-            return Response(
+            return None, Response(
                 {'error': f'Message too long (max {self.MAX_MESSAGE_LENGTH} characters)'},
                 status=400,
             )
         if context_type not in self.VALID_CONTEXT_TYPES:
-            return Response(
+            return None, Response(
                 {'error': f"Invalid context_type. Expected one of: {', '.join(self.VALID_CONTEXT_TYPES)}"},
                 status=400,
             )
         # Briefs and evaluations ignore the message text, so empty is fine
         # there — but an empty user_input would just waste a Claude call.
         if context_type == 'user_input' and not user_message:
-            return Response({'error': 'Message is required'}, status=400)
+            return None, Response({'error': 'Message is required'}, status=400)
+        return (context_type, user_message), None
 
-        system_prompt = _build_system_prompt(user.system_personality or 'logical')
-        user_prompt = _build_user_prompt(user, context_type, user_message)
+    def post(self, request):
+        user = request.user
+        cleaned, error = self.clean(request)
+        if error:
+            return error
+        context_type, user_message = cleaned
+
+        job = SystemChatJob.objects.create(user=user, context_type=context_type, message=user_message)
+        status_url = reverse('system-chat-job', args=[job.id])
+        return Response(
+            {'job_id': job.id, 'status': job.status, 'status_url': status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': status_url},
+        )
 
-        try:
-            raw = _call_ai_provider(system_prompt, user_prompt).strip()
-            # Strip markdown fences if present
-            if raw.startswith('```'):
-                raw = re.sub(r'^```\w*\n?', '', raw)
-                raw = re.sub(r'\n?```$', '', raw)
-            parsed = json.loads(raw)
-            if not isinstance(parsed, dict):
-                raise ValueError('model returned non-object JSON')
-        except Exception as e:
-            # Log the detail but keep it out of the response — SDK errors can
-            # include request IDs and upstream bodies the client shouldn't see.
-            logger.error(f"AI provider error: {e}")
-            return Response({'error': 'AI generation failed. Please try again'}, status=500)
-
-        system_message = parsed.get('system_message', '')
-        missions_data = parsed.get('missions', [])
-        evaluation = parsed.get('evaluation', '')
-        if not isinstance(missions_data, list):
-            missions_data = []
-
-        # Persist missions as Tasks. Every model-supplied field is validated
-        # or clamped — the model's output is not trusted to fit the schema.
-        deadline = timezone.now() + timedelta(days=1)
-        created_missions = []
-        for m in missions_data:
-            if not isinstance(m, dict):
-                continue
-            attr = m.get('attribute', 'discipline')
-            if attr not in [c[0] for c in Task.ATTRIBUTE_CHOICES]:
-                attr = 'discipline'
-            mission_type = m.get('mission_type', 'system_generated')
-            if mission_type not in [c[0] for c in Task.MISSION_TYPE_CHOICES]:
-                mission_type = 'system_generated'
-            try:
-                difficulty = int(m.get('difficulty', 1))
-            except (TypeError, ValueError):
-                difficulty = 1
-            difficulty = max(1, min(3, difficulty))
-            task = Task.objects.create(
-                user=user,
-                title=str(m.get('title') or 'System Mission')[:150],
-                # Capped like title — an open model is more likely than Claude
-                # to ignore the "one sentence" instruction in the prompt.
-                description=str(m.get('description') or '')[:500],
-                attribute=attr,
-                difficulty=difficulty,
-                reward_point=max(3, min(15, difficulty * 4 + 2)),
-                deadline=deadline,
-                is_random=False,
-                mission_type=mission_type,
-                system_flavor=str(m.get('flavor_text') or '')[:500],
-            )
-            created_missions.append({
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
-                'mission_type': task.mission_type,
-                'attribute': task.attribute,
-                'reward': m.get('reward', f'+{task.reward_point} {attr.title()}'),
-                'difficulty': task.difficulty,
-                'flavor_text': task.system_flavor,
-                'prefix': MISSION_PREFIXES.get(task.mission_type, '◈'),
-            })
 
-        # Award first-contact title on first system use
-        titles_awarded = []
-        if not SystemLog.objects.filter(user=user).exists():
-            if _award_title(user, 'first_system_contact'):
-                titles_awarded.append('first_system_contact')
-        titles_awarded += _check_and_award_titles(user)
-
-        # Persist system log
-        log_content = system_message
-        if evaluation:
-            log_content += f'\n\n[Evaluation] {evaluation}'
-        # message_type drives the label in the chat history — 'daily_brief'
-        # renders as "Morning Brief" in SystemMessageBox.
-        log_type_map = {'morning_brief': 'daily_brief', 'evening_eval': 'evening_eval'}
-        SystemLog.objects.create(
-            user=user,
-            message_type=log_type_map.get(context_type, 'chat_response'),
-            content=log_content,
-            missions_issued=created_missions,
-        )
+class SystemChatJobView(APIView):
+    """
+    GET /api/system/chat/jobs/<id>/
+    Poll a job queued by SystemChatView. Once status is 'done' the response
+    also carries the chat payload (system_message, missions, ...); a
+    'failed' job carries an error message instead.
+    """
 
-        return Response({
-            'system_message': system_message,
-            'evaluation': evaluation,
-            'missions': created_missions,
-            'titles_awarded': titles_awarded,
-            'personality': user.system_personality,
-        })
+    def get(self, request, pk):
+        job = SystemChatJob.objects.filter(pk=pk, user=request.user).first()
+        if job is None:
+            return Response({'error': 'Job not found'}, status=404)
+        payload = {'job_id': job.id, 'status': job.status}
+        if job.status == 'done':
+            payload.update(job.result or {})
+        elif job.status == 'failed':
+            payload['error'] = job.error
+        return Response(payload)
+
+
+async def _chat_event_stream(snapshot, context_type, system_prompt, user_prompt):
+    """Server-sent events for one streamed chat reply.
+
+    'token' events carry system_message text as the model writes it; once
+    the whole JSON has arrived the missions are persisted and a 'done'
+    event carries the same payload a finished SystemChatJob would. A
+    provider or parse failure ends the stream with an 'error' event.
+    A brief_cache hit is sent as one token and done straight away.
+    """
+    cache_key = _brief_cache_key(snapshot.user, context_type, system_prompt, user_prompt)
+    cached = _cached_chat_result(cache_key)
+    if cached is not None:
+        yield sse_event('token', {'text': cached['system_message']})
+        yield sse_event('done', cached)
+        return
+
+    chunks = _stream_ai_provider(system_prompt, user_prompt)
+    # The SDK clients block, so each chunk is awaited in a worker thread.
+    next_chunk = sync_to_async(next, thread_sensitive=False)
+    message = SystemMessageStream()
+    raw = []
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            raw.append(chunk)
+            text = message.feed(chunk)
+            if text:
+                yield sse_event('token', {'text': text})
+        parsed = _parse_ai_response(''.join(raw))
+        payload = await sync_to_async(_persist_chat_result)(snapshot, context_type, parsed)
+    except Exception as e:
+        logger.error(f"AI provider error: {e}")
+        yield sse_event('error', {'error': 'AI generation failed. Please try again'})
+        return
+
+    if cache_key:
+        brief_cache.set(cache_key, payload)
+    yield sse_event('done', payload)
+
+
+class SystemChatStreamView(SystemChatView):
+    """
+    POST /api/system/chat/stream/
+    Same body, validation and throttles as SystemChatView, but answers in
+    this request as a text/event-stream (see _chat_event_stream) instead of
+    queueing a job. Tokens only reach the client as they're generated when
+    the app is served through backend/asgi.py; a WSGI server buffers the
+    whole stream first.
+    """
+
+    def post(self, request):
+        user = request.user
+        cleaned, error = self.clean(request)
+        if error:
+            return error
+        context_type, user_message = cleaned
+
+        snapshot = UserContextSnapshot.load(user)
+        system_prompt = _build_system_prompt(user.system_personality or 'logical')
+        user_prompt = _build_user_prompt(snapshot, context_type, user_message)
+        response = StreamingHttpResponse(
+            _chat_event_stream(snapshot, context_type, system_prompt, user_prompt),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx-style proxies from holding the events back.
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 
 class SystemMessagesView(APIView):
@@ -1960,7 +1951,8 @@ class SystemMessagesView(APIView):
     def get(self, request):
         user = request.user
         logs = SystemLog.objects.filter(user=user).order_by('-created_at')[:10]
-        SystemLog.objects.filter(user=user, was_read=False).update(was_read=True)
+        if SystemLog.objects.filter(user=user, was_read=False).update(was_read=True):
+            User.bump_state_version(user)
         return Response([{
             'id': log.id,
             'message_type': log.message_type,
@@ -1973,13 +1965,14 @@ class SystemMessagesView(APIView):
 
 class SystemDailyStatusView(APIView):
     """GET /api/system/daily-status/"""
+    @conditional_on_state_version
     def get(self, request):
         user = request.user
         today = date.today()
 
         has_brief_today = SystemLog.objects.filter(
             user=user,
-            message_type__in=['daily_brief', 'chat_response'],
+            message_type__in=SystemLog.BRIEF_MESSAGE_TYPES,
             created_at__date=today,
         ).exists()
 
@@ -1987,96 +1980,76 @@ class SystemDailyStatusView(APIView):
 
         active_title = UserTitle.objects.filter(user=user, is_active=True).first()
 
-        return Response({
+        return Response(self.daily_status(
+            user, has_brief_today, unread, active_title.title_key if active_title else None
+        ))
+
+    @staticmethod
+    def daily_status(user, has_brief_today, unread, active_title_key):
+        return {
             'has_seen_morning_brief': has_brief_today,
             'unread_messages': unread,
             'active_title': {
-                'key': active_title.title_key,
-                'display': active_title.get_title_key_display(),
-            } if active_title else None,
+                'key': active_title_key,
+                'display': UserTitle(title_key=active_title_key).get_title_key_display(),
+            } if active_title_key else None,
             'personality': user.system_personality,
-        })
+        }
 
 
-class PunishmentCheckView(APIView):
+class DashboardView(APIView):
     """
-    POST /api/system/punishment-check/
-    Called once daily on app open. Applies attribute penalty if yesterday was poor.
+    GET /api/dashboard/
+    What the home screen loads on open, in one request: today's board and
+    the user stats, weekly stats and daily status, each in the same shape
+    as its own endpoint. The stats come from one DashboardSnapshot instead
+    of each view's separate queries.
     """
-    def post(self, request):
+    @conditional_on_state_version
+    def get(self, request):
         user = request.user
         today = date.today()
-        yesterday = today - timedelta(days=1)
-
-        # Only apply punishment once per day
-        already_checked = SystemLog.objects.filter(
-            user=user,
-            message_type='punishment',
-            created_at__date=today,
-        ).exists()
-        if already_checked:
-            return Response({'punishment_applied': False, 'reason': 'already_checked_today'})
-
-        # Check yesterday's completion
-        yesterday_logs = UserTaskLog.objects.filter(user=user, assigned_at__date=yesterday)
-        total = yesterday_logs.count()
-        completed = yesterday_logs.filter(status='completed').count()
-
-        if total == 0:
-            return Response({'punishment_applied': False, 'reason': 'no_tasks_yesterday'})
-
-        rate = completed / total
-
-        if rate >= 0.3:
-            return Response({'punishment_applied': False, 'reason': 'good_performance', 'rate': rate})
-
-        # Apply punishment
-        severity = 'heavy' if rate == 0 else 'light'
-        if severity == 'heavy':
-            penalty_str = '-5 Discipline, +8 Stress'
-            system_msg = 'Host completed zero tasks yesterday. System is disappointed. Penalty applied: -5 Discipline, +8 Stress.'
-        else:
-            penalty_str = '-2 Discipline, +3 Stress'
-            system_msg = f'Host completion rate was only {round(rate * 100)}% yesterday. Inactivity recorded. Light penalty applied: -2 Discipline, +3 Stress.'
-
-        apply_attribute_changes(user, penalty_str)
+        snapshot = DashboardSnapshot.load(user, today)
+        return Response({
+            'tasks': [TaskListView.entry(task) for task in TaskListView.board(user, today)],
+            'user_stats': UserStatsView.stats(user, snapshot.attributes, snapshot.total_completed),
+            'weekly_stats': WeeklyStatsView.stats(today, snapshot.completed_by_day, snapshot.task_count),
+            'daily_status': SystemDailyStatusView.daily_status(
+                user, snapshot.has_brief_today, snapshot.unread_messages, snapshot.active_title_key
+            ),
+        })
 
-        # Create punishment task
-        punishment_task = Task.objects.create(
-            user=user,
-            title='Redemption Quest',
-            description="Complete this mission to atone for yesterday's inactivity.",
-            attribute='discipline',
-            difficulty=2,
-            reward_point=8,
-            deadline=timezone.now() + timedelta(hours=24),
-            is_random=False,
-            mission_type='punishment',
-            system_flavor='System directive: execute immediately. Inactivity will not be tolerated.',
-        )
 
-        SystemLog.objects.create(
-            user=user,
-            message_type='punishment',
-            content=system_msg,
-            missions_issued=[{
-                'id': punishment_task.id,
-                'title': punishment_task.title,
-                'mission_type': 'punishment',
-                'attribute': 'discipline',
-                'reward': '+8 Discipline',
-            }],
+class PunishmentCheckView(APIView):
+    """
+    POST /api/system/punishment-check/
+    Called on app open. Delivers yesterday's penalty, once, if the nightly
+    run_daily_judgement command issued one.
+    """
+    def post(self, request):
+        yesterday = date.today() - timedelta(days=1)
+        judgement = (
+            DailyJudgement.objects.filter(user=request.user, date=yesterday)
+            .select_related('task')
+            .first()
         )
+        if judgement is None:
+            return Response({'punishment_applied': False, 'reason': 'no_penalty'})
+        # Conditional UPDATE so two tabs opening at once can't both show it
+        claimed = DailyJudgement.objects.filter(pk=judgement.pk, delivered=False).update(delivered=True)
+        if not claimed:
+            return Response({'punishment_applied': False, 'reason': 'already_checked_today'})
 
+        task = judgement.task
         return Response({
             'punishment_applied': True,
-            'severity': severity,
-            'penalty': penalty_str,
-            'system_message': system_msg,
+            'severity': judgement.severity,
+            'penalty': PENALTIES[judgement.severity],
+            'system_message': judgement_message(judgement.severity, judgement.completion_rate),
             'punishment_task': {
-                'id': punishment_task.id,
-                'title': punishment_task.title,
-                'description': punishment_task.description,
-                'reward': '+8 Discipline',
-            },
+                'id': task.id,
+                'title': task.title,
+                'description': task.description,
+                'reward': REDEMPTION_REWARD,
+            } if task else None,
         })
@@ -0,0 +1,57 @@
+"""
+Shared setup for the scripts in this directory.
+
+Every benchmark runs against a throwaway test database created the same way
+`python manage.py test` creates one, so seeding millions of rows never
+touches the data behind DATABASE_URL. Point DATABASE_URL at Postgres to get
+numbers (and query plans) that resemble production; sqlite works too.
+
+    DEBUG=1 SECRET_KEY=x DATABASE_URL=postgres://... python benchmarks/<script>.py
+"""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create a migrated scratch database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(fn, repeat=50, warmup=3):
+    """Call fn() repeatedly and return (p50, p99, mean) wall times in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return statistics.median(samples), p99, statistics.fmean(samples)
+
+
+def report(label, timings):
+    p50, p99, mean = timings
+    print(f"  {label:<44} p50 {p50:9.3f} ms   p99 {p99:9.3f} ms   mean {mean:9.3f} ms")
@@ -0,0 +1,67 @@
+"""
+Cost of the AI provider client per System chat call: building a new SDK
+client for every call (what _call_ai_provider used to do) vs the one
+backend.ai.get_provider() keeps per process.
+
+Offline, this times client construction alone and a whole run_system_chat()
+against the 'fake' provider (prompt building + persistence, no network).
+With --live it also calls the configured provider (settings.AI_PROVIDER)
+both ways, where a fresh client pays a new TCP + TLS handshake each time:
+
+    python benchmarks/ai_provider.py
+    AI_PROVIDER=nvidia NVIDIA_API_KEY=... python benchmarks/ai_provider.py --live --repeat 10
+"""
+import argparse
+
+from _bootstrap import measure, report, test_database
+
+from django.conf import settings
+from django.test import override_settings
+from django.utils.module_loading import import_string
+
+from backend.accounts import provision_user
+from backend.ai import get_provider
+from backend.views import run_system_chat
+
+LIVE_SYSTEM_PROMPT = 'Reply with the single word OK.'
+
+
+def fresh_provider(alias):
+    params = settings.AI_PROVIDERS[alias]
+    return import_string(params['BACKEND'])(alias, params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--live', action='store_true', help='also call the configured provider')
+    args = parser.parse_args()
+
+    print('\nclient setup per chat call')
+    for alias, params in settings.AI_PROVIDERS.items():
+        if params['BACKEND'] == 'backend.ai.FakeProvider':
+            continue
+        with override_settings(AI_PROVIDERS={alias: {**params, 'API_KEY': params['API_KEY'] or 'bench'}}):
+            report(f'{alias} / new client', measure(lambda: fresh_provider(alias), repeat=args.repeat))
+            report(f'{alias} / get_provider()', measure(lambda: get_provider(alias), repeat=args.repeat))
+
+    with test_database(), override_settings(AI_PROVIDER='fake'):
+        user = provision_user('bench')
+        print('\nrun_system_chat() against the fake provider')
+        report('morning_brief', measure(lambda: run_system_chat(user, 'morning_brief', ''), repeat=args.repeat))
+
+    if args.live:
+        print(f'\none {settings.AI_PROVIDER} call')
+        repeat = max(1, args.repeat // 20)
+        report('new client', measure(
+            lambda: fresh_provider(settings.AI_PROVIDER).complete(LIVE_SYSTEM_PROMPT, 'Go.'),
+            repeat=repeat, warmup=1,
+        ))
+        report('get_provider()', measure(
+            lambda: get_provider().complete(LIVE_SYSTEM_PROMPT, 'Go.'),
+            repeat=repeat, warmup=1,
+        ))
+
+
+if __name__ == '__main__':
+    main()
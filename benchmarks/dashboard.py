@@ -0,0 +1,88 @@
+"""
+Home-screen load: GET /api/dashboard/ vs the four requests it replaces
+(tasks, user stats, weekly stats, daily status), end to end through the
+middleware, token authentication and the views.
+
+Query counts include each request's token lookup, one more than the
+force-authenticated DashboardViewTests see.
+
+Each sample is a full fetch with no If-None-Match; the last line shows a
+revalidation of the dashboard that gets a 304. In-memory sqlite has no
+network between the app and the database, so --rtt-ms adds a simulated
+round trip to every query (or point DATABASE_URL at a remote Postgres).
+
+    python benchmarks/dashboard.py --repeat 100 --completions 500 --rtt-ms 1
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from _bootstrap import measure, report, test_database
+
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from backend.accounts import provision_user
+from backend.models import SystemLog, Task, UserDailyActivity, UserTaskLog
+
+SEPARATE = ('task-list', 'user-stats', 'weekly-stats', 'system-daily-status')
+
+
+def seed(user, completions):
+    """A host with months of history: completed logs, rollup rows and messages"""
+    now = timezone.now()
+    tasks = list(Task.objects.filter(user=user))
+    UserTaskLog.objects.bulk_create(
+        UserTaskLog(user=user, task=tasks[i % len(tasks)], status='completed',
+                    completed_at=now - timedelta(days=i // 3))
+        for i in range(completions)
+    )
+    UserDailyActivity.objects.bulk_create(
+        UserDailyActivity(user=user, date=(now - timedelta(days=day)).date(), assigned=4, completed=3)
+        for day in range(completions // 3 + 1)
+    )
+    SystemLog.objects.bulk_create(
+        SystemLog(user=user, message_type='chat_response', content='Carry on.') for _ in range(20)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--completions', type=int, default=500)
+    parser.add_argument('--rtt-ms', type=float, default=0,
+                        help='simulated network round trip added to each query')
+    args = parser.parse_args()
+
+    def round_trip(execute, sql, params, many, context):
+        time.sleep(args.rtt_ms / 1000)
+        return execute(sql, params, many, context)
+
+    with test_database() as connection:
+        user = provision_user('bench')
+        seed(user, args.completions)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        # Draw today's board once, as the first visit of the day would
+        client.get(reverse('task-list'))
+        etag = client.get(reverse('dashboard'))['ETag']
+
+        variants = {
+            'four separate GETs': lambda: [client.get(reverse(name)) for name in SEPARATE],
+            'GET dashboard': lambda: client.get(reverse('dashboard')),
+            'GET dashboard, If-None-Match (304)': lambda: client.get(
+                reverse('dashboard'), HTTP_IF_NONE_MATCH=etag),
+        }
+        print(f'\n{connection.vendor}, {args.completions} completed logs, {args.rtt_ms} ms per round trip')
+        for label, fn in variants.items():
+            with CaptureQueriesContext(connection) as ctx:
+                fn()
+            with connection.execute_wrapper(round_trip):
+                report(f'{label} [{len(ctx.captured_queries)} queries]', measure(fn, repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Request latency under each database connection mode from settings.DATABASES:
+
+  * per-request   CONN_MAX_AGE=0, a new connection for every request (the default without the pool)
+  * persistent    CONN_MAX_AGE=60 with CONN_HEALTH_CHECKS
+  * pool          psycopg 3 pool (DB_POOL=1, the default), Postgres only
+
+Each of --workers threads plays a server worker and serves --requests
+requests. A request is Django's real connection lifecycle
+(request_started -> one small query -> request_finished), so the numbers
+include whatever connect / TLS / health-check cost the mode implies.
+
+Run it against a local Postgres standing in for Neon; add sslmode=require
+to the URL to include the TLS handshake:
+
+    docker run --rm -p 5432:5432 -e POSTGRES_PASSWORD=pw postgres:16
+    DEBUG=1 SECRET_KEY=x DATABASE_URL=postgres://postgres:pw@localhost/postgres \\
+        python benchmarks/db_connections.py --workers 4 --requests 500
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from _bootstrap import report
+
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+
+MODES = {
+    'per-request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': None},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True, 'pool': None},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True, 'pool': {'min_size': 1, 'max_size': 4}},
+}
+
+
+def serve(n_requests, samples):
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        request_finished.send(sender=None)
+        samples.append((time.perf_counter() - start) * 1000)
+    connection.close()
+
+
+def run(mode, workers, n_requests):
+    settings_dict = connections.settings['default']
+    settings_dict['CONN_MAX_AGE'] = mode['CONN_MAX_AGE']
+    settings_dict['CONN_HEALTH_CHECKS'] = mode['CONN_HEALTH_CHECKS']
+    settings_dict.setdefault('OPTIONS', {}).pop('pool', None)
+    if mode['pool']:
+        settings_dict['OPTIONS']['pool'] = mode['pool']
+
+    samples = []
+    threads = [threading.Thread(target=serve, args=(n_requests, samples)) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if mode['pool']:
+        connection.close_pool()
+
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return statistics.median(samples), p99, statistics.fmean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=500, help='requests per worker')
+    args = parser.parse_args()
+
+    print(f'\n{connection.vendor}, {args.workers} workers x {args.requests} requests')
+    for name, mode in MODES.items():
+        if mode['pool'] and connection.vendor != 'postgresql':
+            print(f'  {name:<44} skipped (Postgres only)')
+            continue
+        report(name, run(mode, args.workers, args.requests))
+
+
+if __name__ == '__main__':
+    main()
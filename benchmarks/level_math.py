@@ -0,0 +1,66 @@
+"""
+Micro-benchmark: level maths before and after the precomputed threshold table.
+
+Compares the old per-call ``math.pow`` formula and linear level scan with
+``backend.rewards``' table lookup and bisect, and the old inline user_stats
+block (six formula evaluations per response) with ``rewards.user_stats``.
+No database needed.
+
+    python benchmarks/level_math.py
+"""
+import math
+import random
+
+from _bootstrap import measure, report
+
+from backend.models import User
+from backend.rewards import MAX_LEVEL, calculate_level_from_exp, get_exp_for_level, user_stats
+
+
+def old_get_exp_for_level(level):
+    if level <= 1:
+        return 0
+    return math.floor(100 * math.pow(1.3, level - 1))
+
+
+def old_calculate_level_from_exp(total_exp):
+    level = 1
+    while level < MAX_LEVEL and total_exp >= old_get_exp_for_level(level + 1):
+        level += 1
+    return level
+
+
+def old_user_stats(user, old_level):
+    return {
+        "level": user.level,
+        "exp": user.exp,
+        "level_up": user.level > old_level,
+        "old_level": old_level,
+        "next_level_exp": old_get_exp_for_level(user.level + 1),
+        "current_level_exp": old_get_exp_for_level(user.level),
+        "exp_progress": user.exp - old_get_exp_for_level(user.level),
+        "exp_needed": old_get_exp_for_level(user.level + 1) - old_get_exp_for_level(user.level),
+    }
+
+
+def main():
+    rng = random.Random(0)
+    top = get_exp_for_level(MAX_LEVEL)
+    samples = [rng.randint(0, top) for _ in range(10_000)]
+    users = [User(exp=exp, level=calculate_level_from_exp(exp)) for exp in samples[:1_000]]
+
+    print(f"\n{len(samples):,} level lookups, EXP uniform in [0, {top:,}]")
+    report("old (linear scan, pow per step)", measure(
+        lambda: [old_calculate_level_from_exp(e) for e in samples], repeat=20, warmup=1))
+    report("new (bisect over LEVEL_THRESHOLDS)", measure(
+        lambda: [calculate_level_from_exp(e) for e in samples], repeat=20, warmup=1))
+
+    print(f"\n{len(users):,} user_stats blocks")
+    report("old (inline, six pow calls)", measure(
+        lambda: [old_user_stats(u, u.level) for u in users], repeat=50))
+    report("new (rewards.user_stats)", measure(
+        lambda: [user_stats(u, u.level) for u in users], repeat=50))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Signup latency: the old row-at-a-time account seeding vs
+``backend.accounts.provision_user``, plus the two signup endpoints end to end.
+
+"old" replays what GuestLoginView used to do: hash a random password, then
+one INSERT per attribute, goal and task under autocommit. Point
+DATABASE_URL at a remote Postgres to see the round trips add up.
+
+    python benchmarks/signup.py --repeat 50
+"""
+import argparse
+import itertools
+import secrets
+from datetime import timedelta
+
+from _bootstrap import measure, report, test_database
+
+from django.contrib.auth.hashers import make_password
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.accounts import STARTER_TASKS, provision_user
+from backend.models import Goal, Task, User, UserAttribute
+from backend.views import GuestLoginView, RegisterView
+
+
+def old_provision(username):
+    user = User.objects.create(username=username, password=make_password(secrets.token_urlsafe(16)))
+    for name, _ in UserAttribute.ATTRIBUTE_CHOICES:
+        UserAttribute.objects.create(user=user, name=name, value=0)
+    Goal.objects.create(user=user, title='Getting Started', description='')
+    deadline = timezone.now() + timedelta(days=3650)
+    for task in STARTER_TASKS:
+        Task.objects.create(user=user, deadline=deadline, **task)
+    return user
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    # Signup endpoints are IP-throttled; this measures the work behind them.
+    RegisterView.throttle_classes = GuestLoginView.throttle_classes = []
+    names = (f'bench{i}' for i in itertools.count())
+    client = APIClient()
+
+    with test_database() as connection:
+        variants = {
+            'old (INSERT per row)': lambda: old_provision(next(names)),
+            'provision_user (bulk_create, atomic)': lambda: provision_user(next(names)),
+            'POST guest-login': lambda: client.post(
+                reverse('guest-login'), {'guest_id': f'guest_{next(names)[5:]}'}, format='json'),
+            'POST register': lambda: client.post(reverse('register'), {
+                'username': next(names), 'password': 'benchpass123', 'goal_title': 'Get fit',
+            }, format='json'),
+        }
+        print(f'\n{connection.vendor}, {args.repeat} signups each')
+        for label, fn in variants.items():
+            with CaptureQueriesContext(connection) as ctx:
+                fn()
+            report(f'{label} [{len(ctx.captured_queries)} queries]', measure(fn, repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
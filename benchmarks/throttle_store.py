@@ -0,0 +1,83 @@
+"""
+Per-request throttle overhead for each store THROTTLE_CACHE can select.
+
+Times allow_request() for one client that has already made --rate requests,
+comparing DRF's ScopedRateThrottle (a --rate-entry history list read and
+rewritten on every call) with backend.throttles.ScopedThrottle (one GCRA
+float updated by compare_and_set), against:
+
+  * locmem    per-process memory (reference; not shared between workers)
+  * sqlite    backend.cache.SQLiteCache, the WAL file shared on a host
+  * database  DatabaseCache on the database behind DATABASE_URL
+  * redis     only when REDIS_URL is set
+
+    REDIS_URL=redis://localhost:6379/0 python benchmarks/throttle_store.py --rate 100
+"""
+import argparse
+import os
+import tempfile
+
+from _bootstrap import measure, report, test_database
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
+
+from backend.throttles import ScopedThrottle, throttle_cache
+
+
+class BenchView(APIView):
+    throttle_scope = 'bench'
+
+
+def stores(tmpdir):
+    yield 'locmem', {'BACKEND': 'backend.cache.LocMemCache'}
+    yield 'sqlite', {'BACKEND': 'backend.cache.SQLiteCache', 'LOCATION': os.path.join(tmpdir, 'throttle.sqlite3')}
+    yield 'database', {'BACKEND': 'backend.cache.DatabaseCache', 'LOCATION': 'bench_throttle'}
+    if os.environ.get('REDIS_URL'):
+        yield 'redis', {'BACKEND': 'backend.cache.RedisCache', 'LOCATION': os.environ['REDIS_URL']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rate', type=int, default=100, help='allowed requests per hour')
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    # Headroom above --rate so the timed calls are never rejected and each
+    # does its full read-update-write.
+    rates = {'bench': f'{args.rate + args.repeat + 10}/hour'}
+
+    class HistoryThrottle(ScopedRateThrottle):
+        cache = throttle_cache
+        THROTTLE_RATES = rates
+
+    class BenchThrottle(ScopedThrottle):
+        THROTTLE_RATES = rates
+
+    request = APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+    request.user = AnonymousUser()
+    view = BenchView()
+
+    with test_database(), tempfile.TemporaryDirectory() as tmpdir:
+        print(f'\nallow_request() after {args.rate} earlier requests from the same client')
+        for name, config in stores(tmpdir):
+            with override_settings(CACHES={'default': config, 'throttle': config}):
+                if name == 'database':
+                    call_command('createcachetable', 'bench_throttle', verbosity=0)
+                for label, throttle_class in (('DRF history', HistoryThrottle), ('GCRA', BenchThrottle)):
+                    caches['throttle'].clear()
+
+                    def hit():
+                        throttle_class().allow_request(request, view)
+
+                    for _ in range(args.rate):
+                        hit()
+                    report(f'{name} / {label}', measure(hit, repeat=args.repeat))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Query plans for the per-day UserTaskLog lookups, before and after the
+composite indexes from migration 0007.
+
+Seeds a scratch table with --logs rows spread over a year, then for the
+"what did this user complete today" filter compares:
+
+  * the old ``completed_at__date=today`` lookup vs the half-open range
+    built by ``backend.dates.day_bounds``
+  * with and without the (user, status, completed_at) and
+    (user, assigned_at) indexes
+
+and prints each query's plan plus its latency.
+
+    python benchmarks/usertasklog_indexes.py --logs 2000000
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from _bootstrap import measure, report, test_database
+
+from django.db import connection
+from django.utils import timezone
+
+from backend.dates import day_bounds
+from backend.models import Task, User, UserTaskLog
+
+BATCH = 20_000
+
+
+def seed(n_logs, n_users):
+    deadline = timezone.now() + timedelta(days=365)
+    users = User.objects.bulk_create(
+        User(username=f'bench_{i}', password='!') for i in range(n_users)
+    )
+    tasks = Task.objects.bulk_create(
+        Task(user=u, title=f'Task {j}', description='', attribute='discipline', deadline=deadline)
+        for u in users for j in range(5)
+    )
+    tasks_by_user = {}
+    for t in tasks:
+        tasks_by_user.setdefault(t.user_id, []).append(t.id)
+
+    # Raw INSERTs: assigned_at is auto_now_add, which bulk_create would
+    # overwrite with "now" for every row.
+    sql = (
+        f'INSERT INTO {UserTaskLog._meta.db_table} '
+        '(user_id, task_id, assigned_at, completed_at, status) VALUES (%s, %s, %s, %s, %s)'
+    )
+    rng = random.Random(0)
+    now = timezone.now()
+    user_ids = list(tasks_by_user)
+    with connection.cursor() as cursor:
+        for offset in range(0, n_logs, BATCH):
+            rows = []
+            for i in range(offset, min(offset + BATCH, n_logs)):
+                user_id = user_ids[i % len(user_ids)]
+                task_id = rng.choice(tasks_by_user[user_id])
+                # Microsecond offset keeps (user, task, assigned_at) unique.
+                assigned = now - timedelta(days=rng.randrange(365), microseconds=i)
+                status = rng.choices(('completed', 'missed', 'pending'), (6, 3, 1))[0]
+                completed = assigned + timedelta(hours=1) if status == 'completed' else None
+                rows.append((user_id, task_id, assigned, completed, status))
+            cursor.executemany(sql, rows)
+    return users[len(users) // 2]
+
+
+def set_indexes(enabled):
+    with connection.schema_editor() as editor:
+        for index in UserTaskLog._meta.indexes:
+            if enabled:
+                editor.add_index(UserTaskLog, index)
+            else:
+                editor.remove_index(UserTaskLog, index)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {UserTaskLog._meta.db_table}')
+
+
+def explain(qs):
+    if connection.vendor == 'postgresql':
+        return qs.explain(analyze=True, buffers=True)
+    return qs.explain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logs', type=int, default=2_000_000)
+    parser.add_argument('--users', type=int, default=2_000)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    with test_database():
+        print(f'Seeding {args.logs:,} logs for {args.users:,} users on {connection.vendor}...')
+        user = seed(args.logs, args.users)
+        today = date.today()
+        today_start, today_end = day_bounds(today)
+
+        variants = {
+            'completed_at__date=today': lambda: UserTaskLog.objects.filter(
+                user=user, status='completed', completed_at__date=today
+            ),
+            'completed_at in [today, tomorrow)': lambda: UserTaskLog.objects.filter(
+                user=user, status='completed',
+                completed_at__gte=today_start, completed_at__lt=today_end,
+            ),
+        }
+
+        for enabled in (False, True):
+            set_indexes(enabled)
+            print(f"\n=== {'with' if enabled else 'without'} composite indexes ===")
+            for label, build in variants.items():
+                print(f'\n-- {label}\n{explain(build())}')
+            print()
+            for label, build in variants.items():
+                report(label, measure(lambda: build().count(), repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Micro-benchmark: the old nested weighted_sample closure from TaskListView.get
+vs the module-level backend.views.weighted_sample, at 10, 1k and 100k tasks.
+
+Both pick k=6 items (the largest daily board) and k=min(n/2, 1000) to show
+how the old re-summing, pop-from-the-middle loop degrades as k grows.
+No database needed.
+
+    python benchmarks/weighted_sampler.py
+"""
+import random
+
+from _bootstrap import measure, report
+
+from backend.views import weighted_sample
+
+
+def old_weighted_sample(pool, weights, n):
+    """The weighted_sample closure TaskListView.get used to define inline, unchanged."""
+    picked = []
+    remaining = list(zip(pool, weights))
+    for _ in range(min(n, len(pool))):
+        total = sum(w for _, w in remaining)
+        if total <= 0:
+            break
+        r = random.uniform(0, total)
+        acc = 0
+        for i, (task, w) in enumerate(remaining):
+            acc += w
+            if r <= acc:
+                picked.append(task)
+                remaining.pop(i)
+                break
+    return picked
+
+
+def main():
+    rng = random.Random(0)
+    for n in (10, 1_000, 100_000):
+        pool = list(range(n))
+        weights = [rng.choice((1, 3)) for _ in pool]
+        for k in sorted({6, min(n // 2, 1_000)}):
+            # The old sampler is O(n*k): keep the large cases to a few runs.
+            repeat = 3 if n * k > 10_000_000 else 50
+            print(f"\nn={n:,} k={k:,}")
+            report("old (re-sum + list.pop per pick)", measure(
+                lambda: old_weighted_sample(pool, weights, k), repeat=repeat, warmup=1))
+            report("new (exponential keys + heapq)", measure(
+                lambda: weighted_sample(pool, weights, k, rng=rng), repeat=repeat, warmup=1))
+
+
+if __name__ == '__main__':
+    main()
@@ -29,6 +29,8 @@ export const API_ENDPOINTS = {
 
   // System / AI
   systemChat: `${API_BASE}/system/chat/`,
+  systemChatJob: (jobId) => `${API_BASE}/system/chat/jobs/${jobId}/`,
+  systemChatStream: `${API_BASE}/system/chat/stream/`,
   systemMessages: `${API_BASE}/system/messages/`,
   systemDailyStatus: `${API_BASE}/system/daily-status/`,
   systemPunishmentCheck: `${API_BASE}/system/punishment-check/`,
@@ -130,4 +132,67 @@ export const apiRequest = async (url, options = {}) => {
   throw lastError || new Error("Connection error: max retries exceeded");
 };
 
+// POST /system/chat/stream/ answers with server-sent events: "token" events
+// carry the System's message as the model writes it (passed to onToken),
+// then "done" carries the full reply, or "error" says why it failed.
+const parseEvent = (block) => {
+  const fields = Object.fromEntries(
+    block.split("\n").map((line) => {
+      const colon = line.indexOf(":");
+      return [line.slice(0, colon), line.slice(colon + 1).trim()];
+    }),
+  );
+  return { event: fields.event, data: JSON.parse(fields.data) };
+};
+
+export const streamSystemChat = async (body, onToken) => {
+  const config = {
+    method: "POST",
+    mode: "cors",
+    headers: { "Content-Type": "application/json", ...getAuthHeaders() },
+    body: JSON.stringify(body),
+  };
+
+  let response;
+  for (let attempt = 0; ; attempt++) {
+    try {
+      response = await fetch(API_ENDPOINTS.systemChatStream, config);
+    } catch (error) {
+      throw new Error(`Connection error: ${error.message}`);
+    }
+    // Same cold-start retries as apiRequest; nothing has been generated yet.
+    if (!RETRYABLE_STATUS.has(response.status) || attempt === RETRY_DELAYS_MS.length) break;
+    await sleep(RETRY_DELAYS_MS[attempt]);
+  }
+
+  if (!response.ok) {
+    let errorMessage = `HTTP error! status: ${response.status}`;
+    try {
+      const errorData = await response.json();
+      errorMessage = errorData.error || errorData.detail || errorMessage;
+    } catch (parseError) {
+      console.error("Failed to parse error response:", parseError);
+    }
+    throw new Error(errorMessage);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const { event, data } = parseEvent(buffer.slice(0, end));
+      buffer = buffer.slice(end + 2);
+      if (event === "token") onToken?.(data.text);
+      else if (event === "done") return data;
+      else if (event === "error") throw new Error(data.error || "AI generation failed. Please try again");
+    }
+  }
+  throw new Error("The System's reply was cut off. Please try again");
+};
+
 export default API_ENDPOINTS;
@@ -343,6 +343,8 @@ export default function HomePage({
           mode: "cors",
           headers: { "Content-Type": "application/json", ...getAuthHeaders() },
           body: JSON.stringify({
+            // Fallback tasks' ids are local placeholders; send their title only
+            task_id: task.offline ? undefined : task.id,
             task_title: task.title,
             reward_string: task.reward || "",
           }),
@@ -530,7 +532,9 @@ export default function HomePage({
             attribute: "intelligence",
           },
         ];
-        const selectedTasks = selectDailyTasks(fallbackTasks);
+        const selectedTasks = selectDailyTasks(
+          fallbackTasks.map((t) => ({ ...t, offline: true })),
+        );
         setTasks(selectedTasks);
         setError(null); // Don't show error if we have fallback data
         debugLog("📋 Fallback tasks loaded:", selectedTasks);
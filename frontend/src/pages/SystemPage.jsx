@@ -1,6 +1,6 @@
 import { useState, useEffect, useRef } from 'react';
 import { Cpu, Send } from 'lucide-react';
-import { API_ENDPOINTS, apiRequest } from '../config/api.js';
+import { API_ENDPOINTS, apiRequest, streamSystemChat } from '../config/api.js';
 import { useAppContext } from '../context/AppContext.jsx';
 import BottomNav from '../components/BottomNav.jsx';
 import SystemMessageBox from '../components/SystemMessageBox.jsx';
@@ -12,6 +12,8 @@ export default function SystemPage({ onNavigateToHome, onNavigateToTaskManager,
   const [loading, setLoading] = useState(false);
   const [historyLoading, setHistoryLoading] = useState(true);
   const [newTitles, setNewTitles] = useState([]);
+  // The reply as it streams in; null until its first token arrives
+  const [streaming, setStreaming] = useState(null);
   const bottomRef = useRef(null);
 
   useEffect(() => {
@@ -30,7 +32,7 @@ export default function SystemPage({ onNavigateToHome, onNavigateToTaskManager,
 
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [messages]);
+  }, [messages, streaming]);
 
   const sendToSystem = async (contextType = 'user_input', customMessage = null) => {
     // Briefs/evals ignore the message, so don't send whatever is sitting in
@@ -38,27 +40,30 @@ export default function SystemPage({ onNavigateToHome, onNavigateToTaskManager,
     const msg = customMessage ?? (contextType === 'user_input' ? inputText.trim() : '');
     if (contextType === 'user_input' && !msg) return;
     setLoading(true);
+    const messageType = contextType === 'morning_brief' ? 'daily_brief'
+                      : contextType === 'evening_eval' ? 'evening_eval'
+                      : 'chat_response';
 
     try {
-      const { data } = await apiRequest(API_ENDPOINTS.systemChat, {
-        method: 'POST',
-        body: JSON.stringify({
-          message: msg,
-          context_type: contextType,
-        }),
-      });
+      const data = await streamSystemChat(
+        { message: msg, context_type: contextType },
+        (text) => setStreaming(prev => ({
+          message_type: messageType,
+          content: (prev?.content ?? '') + text,
+          missions_issued: [],
+        })),
+      );
 
       const newEntry = {
         id: Date.now(),
-        message_type: contextType === 'morning_brief' ? 'daily_brief'
-                    : contextType === 'evening_eval' ? 'evening_eval'
-                    : 'chat_response',
+        message_type: messageType,
         content: data.system_message,
         evaluation: data.evaluation,
         missions_issued: data.missions,
         created_at: new Date().toISOString(),
         was_read: true,
-        isNew: true,
+        // Already shown token by token, so no typewriter replay
+        isNew: false,
       };
 
       setMessages(prev => [...prev, newEntry]);
@@ -80,6 +85,7 @@ export default function SystemPage({ onNavigateToHome, onNavigateToTaskManager,
         is_error: true,
       }]);
     } finally {
+      setStreaming(null);
       setLoading(false);
     }
   };
@@ -134,7 +140,7 @@ export default function SystemPage({ onNavigateToHome, onNavigateToTaskManager,
         )}
 
         {/* Loading indicator */}
-        {loading && (
+        {loading && !streaming && (
           <div className="rpg-window px-5 py-4">
             <div className="rpg-header text-xs">[SYSTEM] ▸ Transmitting…</div>
             <p className="px-5 py-3 text-xs text-ink-mute font-mono animate-pulse">
@@ -166,6 +172,8 @@ export default function SystemPage({ onNavigateToHome, onNavigateToTaskManager,
           ))
         )}
 
+        {streaming && <SystemMessageBox log={streaming} />}
+
         <div ref={bottomRef} />
       </div>
 
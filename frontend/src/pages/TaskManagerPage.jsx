@@ -193,6 +193,7 @@ export default function TaskManagerPage({ currentUser, onNavigateToHome, onNavig
   const [editData, setEditData] = useState(null);
   const [activeTab, setActiveTab] = useState('active');
   const [refreshTrigger, setRefreshTrigger] = useState(0); // Add refresh trigger for weekly stats
+  const [historyCursor, setHistoryCursor] = useState(null); // next_cursor of the last history page
 
   // In-app confirmation for Complete/Delete — replaces window.confirm(),
   // which is a native browser dialog that looks nothing like the rest of
@@ -309,10 +310,12 @@ export default function TaskManagerPage({ currentUser, onNavigateToHome, onNavig
     }
   };
 
-  const fetchCompletedHistory = async () => {
+  // Without a cursor, loads the first page; with one, appends the next page
+  const fetchCompletedHistory = async (cursor = null) => {
     try {
       debugLog('🔍 Fetching completed tasks history from API...');
-      const { data } = await apiRequest(`${API_ENDPOINTS.completedHistory}?limit=50`);
+      const query = cursor ? `?limit=50&cursor=${encodeURIComponent(cursor)}` : '?limit=50';
+      const { data } = await apiRequest(`${API_ENDPOINTS.completedHistory}${query}`);
 
       if (data.success && data.completed_tasks) {
         const transformedHistory = data.completed_tasks.map(task => ({
@@ -326,16 +329,17 @@ export default function TaskManagerPage({ currentUser, onNavigateToHome, onNavig
           completedTime: task.completed_time
         }));
 
-        updateCompletedTasksState(transformedHistory);
+        updateCompletedTasksState(prev => (cursor ? [...prev, ...transformedHistory] : transformedHistory));
+        setHistoryCursor(data.next_cursor || null);
         debugLog('✅ Loaded', transformedHistory.length, 'completed tasks from API');
-      } else {
+      } else if (!cursor) {
         debugLog('⚠️ No completed tasks found in API response');
         updateCompletedTasksState([]);
       }
     } catch (error) {
       console.error('❌ Error fetching completed tasks history:', error);
       // Don't show fallback data for completed history
-      updateCompletedTasksState([]);
+      if (!cursor) updateCompletedTasksState([]);
     }
   };
 
@@ -789,6 +793,15 @@ export default function TaskManagerPage({ currentUser, onNavigateToHome, onNavig
                 />
               ))
             )}
+            {historyCursor && (
+              <button
+                type="button"
+                onClick={() => fetchCompletedHistory(historyCursor)}
+                className="rpg-btn-secondary w-full mt-3"
+              >
+                Load more
+              </button>
+            )}
           </div>
         )}
       </div>